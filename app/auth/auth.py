@@ -9,6 +9,9 @@ load_dotenv()
 JWT_SECRET = os.getenv("JWT_SECRET", "dev_secret_key")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_MINUTES = 30
+# Durée de vie des jetons de renouvellement (voir create_refresh_token)
+REFRESH_TOKEN_EXPIRATION_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRATION_DAYS", "7"))
+REFRESH_TOKEN_TYPE = "refresh"
 
 # -------------------- PASSWORD HASH----------
 
@@ -47,12 +50,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 # -------------------- JWT Token --------------------
 
 
-def create_token(user_id: int) -> str:
+def create_token(
+    user_id: int, department: str = None, token_version: int = 0
+) -> str:
     """
     Crée un token JWT pour un utilisateur donné.
 
+    Si le département est fourni, il est embarqué (signé) dans le token avec
+    la version de jeton du collaborateur : les permissions peuvent alors être
+    vérifiées sans recharger l'utilisateur et son département.
+
     Args:
         user_id (int): L'ID de l'utilisateur pour lequel générer le token.
+        department (str, optional): Le nom du département de l'utilisateur.
+        token_version (int): La version de jeton courante du collaborateur.
 
     Returns:
         str: Le token JWT généré.
@@ -61,10 +72,37 @@ def create_token(user_id: int) -> str:
         "user_id": user_id,
         "exp": datetime.now(timezone.utc) + timedelta(minutes=JWT_EXPIRATION_MINUTES),
     }
+    if department is not None:
+        payload["department"] = department
+        payload["ver"] = token_version
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return token
 
 
+def create_refresh_token(user_id: int, token_version: int = 0) -> str:
+    """
+    Crée un jeton de renouvellement : il ne donne accès à aucune commande
+    mais permet d'obtenir un nouveau token d'accès sans ressaisir le mot de
+    passe (voir app.auth.token_cache.refresh_access_token). La version de
+    jeton embarquée le rend invalide après un changement de département ou
+    une suppression.
+
+    Args:
+        user_id (int): L'ID de l'utilisateur.
+        token_version (int): La version de jeton courante du collaborateur.
+
+    Returns:
+        str: Le jeton de renouvellement.
+    """
+    payload = {
+        "user_id": user_id,
+        "ver": token_version,
+        "typ": REFRESH_TOKEN_TYPE,
+        "exp": datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRATION_DAYS),
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
 def decode_token(token: str):
     """
     Décode un token JWT et retourne l'ID de l'utilisateur.
@@ -77,6 +115,8 @@ def decode_token(token: str):
     """
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        if payload.get("typ") == REFRESH_TOKEN_TYPE:
+            return None
         return payload["user_id"]
     except jwt.ExpiredSignatureError:
         return None
@@ -98,10 +138,55 @@ def verify_token(token: str) -> dict:
     Returns:
         int: L'ID de l'utilisateur si le token est valide.
     """
+    return verify_claims(token)["user_id"]
+
+
+def verify_claims(token: str) -> dict:
+    """
+    Vérifie la validité d'un token JWT et retourne l'ensemble de ses claims.
+
+    Args:
+        token (str): Le token JWT à vérifier.
+
+    Raises:
+        jwt.ExpiredSignatureError: Si le token a expiré.
+        jwt.InvalidTokenError: Si le token est invalide.
+
+    Returns:
+        dict: Les claims du token (user_id, et department / ver s'ils sont présents).
+    """
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload["user_id"]
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise jwt.ExpiredSignatureError("Le token a expiré.")
     except jwt.InvalidTokenError:
         raise jwt.InvalidTokenError("Token invalide.")
+    if claims.get("typ") == REFRESH_TOKEN_TYPE:
+        # Un jeton de renouvellement n'est pas un token d'accès
+        raise jwt.InvalidTokenError("Token invalide.")
+    return claims
+
+
+def verify_refresh_claims(token: str) -> dict:
+    """
+    Vérifie un jeton de renouvellement et retourne ses claims.
+
+    Args:
+        token (str): Le jeton de renouvellement.
+
+    Raises:
+        jwt.ExpiredSignatureError: Si le jeton a expiré.
+        jwt.InvalidTokenError: Si le jeton est invalide ou n'est pas un jeton de renouvellement.
+
+    Returns:
+        dict: Les claims du jeton (user_id, ver).
+    """
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise jwt.ExpiredSignatureError("Le jeton de renouvellement a expiré.")
+    except jwt.InvalidTokenError:
+        raise jwt.InvalidTokenError("Jeton de renouvellement invalide.")
+    if claims.get("typ") != REFRESH_TOKEN_TYPE:
+        raise jwt.InvalidTokenError("Jeton de renouvellement invalide.")
+    return claims
@@ -1,9 +1,137 @@
+import os
+import time
 import click
 from functools import wraps
-from app.db.session import SessionLocal
-from app.auth.auth import verify_token
+from sqlalchemy.orm import joinedload
+from app.db.session import session_scope
+from app.auth.auth import verify_claims
 from app.models.collaborator import Collaborator
-import sentry_sdk
+from app.logging.sentry import capture_exception
+
+# Durée (secondes) pendant laquelle la version de jeton d'un collaborateur est
+# considérée comme à jour sans interroger la base.
+PERMISSION_CACHE_TTL = int(os.getenv("PERMISSION_CACHE_TTL", "60"))
+
+_token_versions = {}
+
+
+class AuthContext:
+    """
+    Contexte d'une invocation de commande authentifiée.
+
+    Construit une seule fois par `check_permission` / `authenticated` puis
+    transmis à la commande via le contexte click (voir `pass_auth`) : le token
+    n'est décodé qu'une fois, l'utilisateur chargé au plus une fois, et la
+    même session sert à toute la commande.
+
+    Attributes:
+        user_id (int): L'ID de l'utilisateur authentifié.
+        department (str | None): Le département issu des claims du token.
+        session (Session): La session SQLAlchemy de la commande.
+    """
+
+    def __init__(self, user_id, department, session):
+        self.user_id = user_id
+        self.department = department
+        self.session = session
+        self._user = None
+
+    @property
+    def user(self):
+        """Le collaborateur authentifié, chargé (avec son département) au premier accès."""
+        if self._user is None:
+            self._user = self.session.get(
+                Collaborator,
+                self.user_id,
+                options=[joinedload(Collaborator.department)],
+            )
+        return self._user
+
+
+pass_auth = click.make_pass_decorator(AuthContext)
+
+
+def current_token_version(session, user_id):
+    """
+    Retourne la version de jeton d'un collaborateur (None s'il n'existe plus),
+    en la gardant en cache PERMISSION_CACHE_TTL secondes.
+    """
+    now = time.monotonic()
+    cached = _token_versions.get(user_id)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    version = session.query(Collaborator.token_version).filter_by(id=user_id).scalar()
+    _token_versions[user_id] = (version, now + PERMISSION_CACHE_TTL)
+    return version
+
+
+def warm_token_versions(session):
+    """
+    Charge en une requête la version de jeton de tous les collaborateurs.
+
+    Utilisé par le démon avant de lancer ses processus fils : chaque commande
+    hérite ainsi d'un cache déjà rempli au lieu d'interroger la base.
+
+    Returns:
+        float: L'instant (`time.monotonic`) où ces entrées expirent.
+    """
+    expires = time.monotonic() + PERMISSION_CACHE_TTL
+    versions = session.query(Collaborator.id, Collaborator.token_version).all()
+    _token_versions.clear()
+    _token_versions.update((user_id, (version, expires)) for user_id, version in versions)
+    return expires
+
+
+def _authenticate(token, session):
+    """
+    Construit le contexte d'authentification à partir du token.
+
+    Retourne None (après avoir affiché la raison) si le token a été révoqué.
+    """
+    claims = verify_claims(token)
+    auth = AuthContext(claims["user_id"], claims.get("department"), session)
+
+    if auth.department is None:
+        # Token émis sans claims : le département est lu en base
+        if auth.user and auth.user.department:
+            auth.department = auth.user.department.name
+    elif current_token_version(session, auth.user_id) != claims.get("ver"):
+        click.echo("Token révoqué : veuillez vous reconnecter.")
+        return None
+
+    click.get_current_context().obj = auth
+    return auth
+
+
+def authenticated(f):
+    """
+    Un décorateur pour les commandes accessibles à tout utilisateur authentifié.
+
+    Vérifie le jeton une seule fois, construit l'`AuthContext` de la commande dans
+    un `session_scope` (session annulée en cas d'erreur, fermée à la fin).
+    """
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        token = kwargs.get("token")
+        if not token:
+            click.echo("Erreur : aucun token fourni.")
+            return
+
+        try:
+            with session_scope() as session:
+                if _authenticate(token, session) is None:
+                    return
+                return f(*args, **kwargs)
+        except click.exceptions.Exit:
+            # Code de sortie demandé par la commande (ex. export incomplet)
+            raise
+        except Exception as e:
+            capture_exception(e)
+            click.echo(f"Erreur d’authentification : {str(e)}")
+
+    return wrapper
 
 
 def check_permission(allowed_departments):
@@ -11,8 +139,12 @@ def check_permission(allowed_departments):
     Un décorateur pour vérifier les permissions d'un utilisateur basé sur son département.
 
     Ce décorateur vérifie si l'utilisateur associé au jeton d'authentification a un rôle dans l'un
-    des départements autorisés à effectuer l'action. Si l'utilisateur n'est pas authentifié ou si
-    son département ne correspond pas aux départements autorisés, l'accès est refusé.
+    des départements autorisés à effectuer l'action. Le département est lu dans les claims signés
+    du jeton ; seule la version de jeton du collaborateur est contrôlée (avec un cache court) pour
+    invalider les jetons émis avant un changement de département ou une suppression. Les jetons
+    sans claims retombent sur une lecture du département en base.
+
+    Le contexte construit (`AuthContext`) est transmis à la commande via `pass_auth`.
 
     Args:
         allowed_departments (list): Liste des départements autorisés à accéder à la fonctionnalité.
@@ -33,23 +165,28 @@ def check_permission(allowed_departments):
                 return
 
             try:
-                user_id = verify_token(token)
-                session = SessionLocal()
-                user = session.get(Collaborator, user_id)
-                if not user or not user.department:
-                    click.echo("Utilisateur ou département introuvable.")
-                    return
+                with session_scope() as session:
+                    auth = _authenticate(token, session)
+                    if auth is None:
+                        return
 
-                if user.department.name not in allowed_departments:
-                    click.echo(
-                        f"Accès refusé : cette action est réservée au(x) département(s) : {', '.join(allowed_departments)}"
-                    )
-                    return
+                    if not auth.department:
+                        click.echo("Utilisateur ou département introuvable.")
+                        return
 
-                return f(*args, **kwargs)
+                    if auth.department not in allowed_departments:
+                        click.echo(
+                            f"Accès refusé : cette action est réservée au(x) département(s) : {', '.join(allowed_departments)}"
+                        )
+                        return
+
+                    return f(*args, **kwargs)
 
+            except click.exceptions.Exit:
+                # Code de sortie demandé par la commande (ex. export incomplet)
+                raise
             except Exception as e:
-                sentry_sdk.capture_exception(e)
+                capture_exception(e)
                 click.echo(f"Erreur de permission : {str(e)}")
 
         return wrapper
@@ -0,0 +1,142 @@
+import json
+import os
+import time
+
+import click
+import jwt
+from app.auth.auth import create_token, verify_claims, verify_refresh_claims
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Un token d'accès qui expire dans moins de REFRESH_MARGIN secondes est
+# renouvelé avant usage (évite qu'il expire pendant la commande)
+REFRESH_MARGIN = 60
+
+
+class RefreshError(Exception):
+    """Le jeton de renouvellement ne permet plus d'obtenir de token d'accès."""
+
+
+def cache_path():
+    """Chemin du cache de jetons (EPIC_TOKEN_CACHE, sinon ~/.config/epic/credentials.json)."""
+    path = os.getenv("EPIC_TOKEN_CACHE")
+    if path:
+        return path
+    config_dir = os.getenv("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(config_dir, "epic", "credentials.json")
+
+
+def load():
+    """
+    Lit le cache de jetons.
+
+    Returns:
+        dict | None: access_token, refresh_token et user_id, ou None si le
+        cache est absent, illisible ou lisible par d'autres utilisateurs
+        (ignoré, comme une clé SSH trop ouverte).
+    """
+    path = cache_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            if os.fstat(f.fileno()).st_mode & 0o077:
+                click.echo(
+                    f"Cache de jetons ignoré : {path} est accessible à d'autres utilisateurs (chmod 600).",
+                    err=True,
+                )
+                return None
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def save(access_token, refresh_token, user_id):
+    """Écrit le cache de jetons, lisible par le seul utilisateur courant."""
+    path = cache_path()
+    os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+    data = {"access_token": access_token, "refresh_token": refresh_token, "user_id": user_id}
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def clear():
+    """Supprime le cache de jetons. Retourne True s'il existait."""
+    try:
+        os.unlink(cache_path())
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _usable(access_token):
+    try:
+        claims = verify_claims(access_token)
+    except jwt.InvalidTokenError:
+        return False
+    return claims["exp"] - time.time() > REFRESH_MARGIN
+
+
+def refresh_access_token(refresh_token):
+    """
+    Émet un nouveau token d'accès à partir d'un jeton de renouvellement.
+
+    Le département et la version de jeton sont relus en base (une requête) :
+    pas de vérification bcrypt du mot de passe, mais un collaborateur
+    supprimé ou dont le département a changé doit se reconnecter.
+
+    Raises:
+        RefreshError: Si le jeton est expiré, invalide ou révoqué.
+
+    Returns:
+        str: Le nouveau token d'accès.
+    """
+    from sqlalchemy.orm import joinedload
+    from app.db.session import session_scope
+    from app.models.collaborator import Collaborator
+
+    try:
+        claims = verify_refresh_claims(refresh_token)
+    except jwt.InvalidTokenError as e:
+        raise RefreshError(str(e))
+
+    with session_scope() as session:
+        user = session.get(
+            Collaborator, claims["user_id"], options=[joinedload(Collaborator.department)]
+        )
+        if user is None or user.token_version != claims.get("ver"):
+            raise RefreshError("Jeton de renouvellement révoqué : veuillez vous reconnecter.")
+        department = user.department.name if user.department else None
+        return create_token(user.id, department, user.token_version)
+
+
+def cached_access_token():
+    """
+    Le token d'accès du cache, renouvelé silencieusement s'il a expiré (ou
+    est sur le point d'expirer) et que le jeton de renouvellement est valide.
+
+    Returns:
+        str | None: Le token d'accès, ou None s'il faut se connecter.
+    """
+    cache = load()
+    if not cache:
+        return None
+    access_token = cache.get("access_token")
+    if access_token and _usable(access_token):
+        return access_token
+    refresh_token = cache.get("refresh_token")
+    if not refresh_token:
+        return None
+    try:
+        access_token = refresh_access_token(refresh_token)
+    except RefreshError as e:
+        click.echo(f"Renouvellement du token impossible : {e}", err=True)
+        return None
+    save(access_token, refresh_token, cache.get("user_id"))
+    logger.info(f"Token renouvelé pour l'utilisateur {cache.get('user_id')}")
+    return access_token
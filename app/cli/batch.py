@@ -0,0 +1,326 @@
+from itertools import islice
+
+import click
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+
+from app.auth.permissions import authenticated, pass_auth
+from app.cli import rules
+from app.cli.bulk import read_records
+from app.cli.inputs import token_option
+from app.cli.output import output_option
+from app.cli.rules import OperationError
+from app.logging.sentry import capture_exception
+from app.models.collaborator import Collaborator
+from app.models.contract import Contract
+from app.models.event import Event
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+INPUT_FORMATS = ("ndjson", "yaml")
+
+# Relations chargées avec les entités préchargées d'une transaction
+_PREFETCH_OPTIONS = {Collaborator: [joinedload(Collaborator.department)]}
+
+
+class BatchOperation:
+    """
+    Une opération acceptée par run-batch : fonction appliquée dans la session
+    du lot, départements autorisés, paramètres (nom -> type click) et entités
+    préchargées par transaction (paramètre -> modèle).
+    """
+
+    def __init__(self, apply, departments, params, required=(), prefetch=None):
+        self.apply = apply
+        self.departments = departments
+        self.params = params
+        self.required = required
+        self.prefetch = prefetch or {}
+
+    def parse(self, record):
+        """Valide et convertit les paramètres d'une ligne. Retourne les kwargs."""
+        kwargs = {}
+        for key, value in record.items():
+            if key == "op":
+                continue
+            name = key.replace("-", "_")
+            if name not in self.params:
+                raise OperationError(f"paramètre inconnu : {key}")
+            if value is None:
+                continue
+            try:
+                kwargs[name] = self.params[name].convert(value, None, None)
+            except click.BadParameter as e:
+                raise OperationError(f"{key} : {e.format_message()}")
+        missing = [name for name in self.required if name not in kwargs]
+        if missing:
+            raise OperationError(f"paramètre manquant : {', '.join(missing)}")
+        return kwargs
+
+
+def _sign_contract(auth, contract_id):
+    return {"contract_id": rules.sign_contract(auth, contract_id).id}
+
+
+def _update_contract(auth, contract_id, amount=None, remaining_amount=None):
+    contract = rules.update_contract(auth, contract_id, amount, remaining_amount)
+    return {"contract_id": contract.id}
+
+
+def _assign_support_to_event(auth, event_id, support_id):
+    event = rules.assign_support_to_event(auth, event_id, support_id)
+    return {"event_id": event.id, "support_id": support_id}
+
+
+# Les règles sont celles des commandes du même nom (app.cli.rules)
+OPERATIONS = {
+    "sign-contracts": BatchOperation(
+        _sign_contract,
+        ["commercial", "gestion"],
+        {"contract_id": click.INT},
+        required=("contract_id",),
+        prefetch={"contract_id": Contract},
+    ),
+    "update-contract": BatchOperation(
+        _update_contract,
+        ["commercial", "gestion"],
+        {"contract_id": click.INT, "amount": click.FLOAT, "remaining_amount": click.FLOAT},
+        required=("contract_id",),
+        prefetch={"contract_id": Contract},
+    ),
+    "assign-support-to-event": BatchOperation(
+        _assign_support_to_event,
+        ["gestion"],
+        {"event_id": click.INT, "support_id": click.INT},
+        required=("event_id", "support_id"),
+        prefetch={"event_id": Event, "support_id": Collaborator},
+    ),
+}
+
+
+def read_yaml_operations(stream):
+    """
+    Lit une liste YAML d'opérations.
+
+    Yields:
+        tuple: (numéro de ligne de l'élément, dict ou None si illisible).
+    """
+    import yaml
+
+    text = stream.read()
+    node = yaml.compose(text, Loader=yaml.SafeLoader)
+    if node is None:
+        return
+    if not isinstance(node, yaml.SequenceNode):
+        raise OperationError("le fichier YAML doit contenir une liste d'opérations")
+    for item, record in zip(node.value, yaml.safe_load(text)):
+        yield item.start_mark.line + 1, record if isinstance(record, dict) else None
+
+
+def parse_operation(auth, record):
+    """
+    Résout l'opération d'une ligne et vérifie le département de l'utilisateur.
+
+    Returns:
+        tuple: (nom, BatchOperation, kwargs).
+    """
+    if record is None:
+        raise OperationError("ligne illisible")
+    name = record.get("op")
+    operation = OPERATIONS.get(name)
+    if operation is None:
+        raise OperationError(f"opération inconnue : {name}")
+    if auth.department not in operation.departments:
+        raise OperationError(
+            f"Accès refusé : cette action est réservée au(x) département(s) : {', '.join(operation.departments)}"
+        )
+    return name, operation, operation.parse(record)
+
+
+def prefetch(session, parsed):
+    """
+    Charge en une requête par modèle les entités visées par une transaction.
+    La liste retournée doit rester référencée pendant la transaction : les
+    `session.get` des opérations sont alors servis par la carte d'identité.
+    """
+    ids = {}
+    for _, _, operation, kwargs, _ in parsed:
+        for param, model in operation.prefetch.items():
+            if param in kwargs:
+                ids.setdefault(model, set()).add(kwargs[param])
+    loaded = []
+    for model, model_ids in ids.items():
+        query = session.query(model).filter(model.id.in_(model_ids))
+        loaded.extend(query.options(*_PREFETCH_OPTIONS.get(model, ())).all())
+    return loaded
+
+
+def run_transaction(auth, lines, report):
+    """
+    Applique une transaction d'opérations, chacune dans un point de sauvegarde :
+    une opération en échec est annulée seule et rapportée pour sa ligne.
+
+    Args:
+        lines (list): Les (numéro de ligne, dict) de la transaction.
+        report (callable): Appelée avec (ligne, opération, erreur, résultat).
+
+    Returns:
+        int: Le nombre d'opérations en échec.
+    """
+    session = auth.session
+    parsed = []
+    for line, record in lines:
+        try:
+            parsed.append((line, *parse_operation(auth, record), None))
+        except OperationError as e:
+            parsed.append((line, (record or {}).get("op"), None, None, str(e)))
+
+    loaded = prefetch(session, [p for p in parsed if p[4] is None])
+    errors = 0
+    for line, name, operation, kwargs, error in parsed:
+        result = None
+        if error is None:
+            try:
+                with session.begin_nested():
+                    result = operation.apply(auth, **kwargs)
+            except OperationError as e:
+                error = str(e)
+            except SQLAlchemyError as e:
+                capture_exception(e)
+                error = f"Erreur base de données : {e}"
+        if error is not None:
+            errors += 1
+        report(line, name, error, result)
+    loaded.clear()
+    return errors
+
+
+@click.command(
+    "run-batch",
+    short_help="Exécute un fichier d'opérations en une seule authentification.",
+)
+@token_option
+@click.argument("source", type=click.File("r", encoding="utf-8-sig"))
+@click.option(
+    "--input-format",
+    type=click.Choice(INPUT_FORMATS),
+    default=None,
+    help="Format du fichier (déduit de l'extension par défaut, NDJSON sinon)",
+)
+@click.option(
+    "--transaction-size",
+    default=100,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Nombre d'opérations par transaction",
+)
+@click.option(
+    "--all-or-nothing",
+    is_flag=True,
+    help="Une seule transaction, annulée entièrement si une opération échoue",
+)
+@output_option
+@authenticated
+@pass_auth
+def run_batch(auth, token, source, input_format, transaction_size, all_or_nothing, output):
+    """
+    Exécute un fichier d'opérations en une seule authentification.
+
+    Chaque ligne NDJSON (ou élément d'une liste YAML) décrit une opération :
+    {"op": "sign-contracts", "contract_id": 12},
+    {"op": "update-contract", "contract_id": 12, "amount": 900},
+    {"op": "assign-support-to-event", "event_id": 4, "support_id": 7}.
+    Les règles et départements autorisés sont ceux des commandes du même nom.
+    Le jeton est vérifié une fois, la même session sert à tout le lot, et les
+    opérations sont validées par transactions de --transaction-size ; une
+    opération en échec est rapportée avec son numéro de ligne sans annuler
+    les autres. Avec --all-or-nothing, rien n'est validé si une opération
+    échoue : les lignes sont alors rapportées avec le statut rolled_back.
+
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+        source (file): Le fichier d'opérations (`-` pour stdin).
+        input_format (str | None): ndjson ou yaml.
+        transaction_size (int): Nombre d'opérations par transaction.
+        all_or_nothing (bool): Tout valider ou tout annuler.
+        output (Output): La sortie de la commande (--format).
+
+    Returns:
+        None
+    """
+    session = auth.session
+    name = getattr(source, "name", "-")
+    if input_format is None:
+        input_format = "yaml" if name.endswith((".yaml", ".yml")) else "ndjson"
+
+    counts = {"ok": 0, "error": 0}
+    # Avec --all-or-nothing, les lignes ne sont écrites qu'une fois l'issue
+    # de la transaction connue : "ok" après validation, "rolled_back" sinon
+    pending = []
+
+    def emit(line, op, error, result, status="ok"):
+        if error:
+            output.row(
+                {"line": line, "op": op, "status": "error", "error": error},
+                f"Ligne {line} ({op or '?'}) : {error}",
+            )
+        elif status == "rolled_back":
+            output.row(
+                {"line": line, "op": op, "status": status, **result},
+                f"Ligne {line} ({op}) : annulée",
+            )
+        else:
+            output.row({"line": line, "op": op, "status": status, **result})
+
+    def report(line, op, error, result):
+        counts["error" if error else "ok"] += 1
+        if all_or_nothing:
+            pending.append((line, op, error, result))
+        else:
+            emit(line, op, error, result)
+
+    try:
+        if input_format == "yaml":
+            records = read_yaml_operations(source)
+        else:
+            records = read_records(source, "ndjson")
+        if all_or_nothing:
+            transaction_size = None
+        committed = 0
+        while True:
+            lines = list(islice(records, transaction_size))
+            if not lines:
+                break
+            errors = run_transaction(auth, lines, report)
+            if all_or_nothing and errors:
+                session.rollback()
+                for row in pending:
+                    emit(*row, status="rolled_back")
+                output.message(
+                    f"{errors} opération(s) en échec : aucune opération n'a été appliquée."
+                )
+                return
+            session.commit()
+            for row in pending:
+                emit(*row)
+            pending.clear()
+            committed += len(lines) - errors
+    except OperationError as e:
+        session.rollback()
+        output.message(f"Fichier d'opérations invalide : {e}")
+        return
+    except Exception as e:
+        session.rollback()
+        capture_exception(e)
+        output.message(f"Erreur lors de l'exécution du lot : {e}")
+        return
+
+    logger.info(
+        f"Lot exécuté par l'utilisateur {auth.user_id} : {counts['ok']} opération(s), {counts['error']} échec(s)"
+    )
+    output.message(
+        f"{committed} opération(s) appliquée(s), {counts['error']} en échec."
+    )
@@ -0,0 +1,704 @@
+import csv
+import io
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import click
+from app.logging.sentry import capture_exception
+from sqlalchemy import and_, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.auth.permissions import check_permission, pass_auth
+from app.cli.inputs import token_option
+from app.cli.output import output_option
+from app.models.client import Client, ENCRYPTED_FIELDS, SEARCH_INDEX_FIELDS, content_digest
+from app.models.collaborator import Collaborator
+from app.models.client_search_token import ClientSearchToken
+from app.security.crypto import blind_index_many, decrypt_many, encrypt_many
+from app.security.search_index import index_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+INPUT_FORMATS = ("csv", "ndjson")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+$")
+
+_clients = Client.__table__
+_tokens = ClientSearchToken.__table__
+
+
+def read_records(stream, fmt):
+    """
+    Lit un fichier CSV (avec en-tête) ou NDJSON au fil de l'eau.
+
+    Yields:
+        tuple: (numéro de ligne, dict) ; dict vaut None pour une ligne NDJSON
+        illisible, signalée comme rejet plutôt que d'interrompre l'import.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+
+def validate(record):
+    """
+    Nettoie et valide un enregistrement client.
+
+    Returns:
+        tuple: (valeurs nettoyées, None) ou (None, message d'erreur).
+    """
+    if record is None:
+        return None, "ligne illisible"
+    values = {}
+    for field in ENCRYPTED_FIELDS:
+        value = record.get(field)
+        value = str(value).strip() if value is not None else ""
+        if not value:
+            return None, f"champ {field} manquant"
+        values[field] = value
+    if not EMAIL_PATTERN.match(values["email"]):
+        return None, f"email invalide : {values['email']}"
+    return values, None
+
+
+def prepare_batch(batch, commercial_contact_id, with_search_index):
+    """
+    Chiffre et indexe un lot de clients valides (hors base, parallélisable).
+
+    Returns:
+        tuple: (lignes à insérer dans clients, jetons de recherche par ligne)
+    """
+    columns = {field: encrypt_many([values[field] for _, _, values in batch]) for field in ENCRYPTED_FIELDS}
+    bidx = blind_index_many([values["email"] for _, _, values in batch])
+    rows = [
+        dict(
+            {field: columns[field][i] for field in ENCRYPTED_FIELDS},
+            email_bidx=bidx[i],
+            content_digest=content_digest(values),
+            commercial_contact_id=commercial_contact_id,
+        )
+        for i, (_, _, values) in enumerate(batch)
+    ]
+    tokens = [
+        [
+            (field, token)
+            for field, kinds in SEARCH_INDEX_FIELDS.items()
+            for token in index_tokens(field, values[field], kinds)
+        ]
+        if with_search_index
+        else []
+        for _, _, values in batch
+    ]
+    return rows, tokens
+
+
+class RejectFile:
+    """Fichier NDJSON des lignes rejetées, ouvert à la première ligne."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def write(self, number, record, reason):
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(
+            json.dumps({"line": number, "error": reason, "record": record}, ensure_ascii=False, default=str)
+            + "\n"
+        )
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _existing_bidx(session, bidx):
+    return set(
+        session.execute(select(_clients.c.email_bidx).where(_clients.c.email_bidx.in_(bidx))).scalars()
+    )
+
+
+def _copy_tokens(session, token_rows):
+    """
+    Écrit les jetons de recherche directement par le pilote : plusieurs
+    dizaines de jetons par client, l'exécution Core (paramètres construits
+    ligne à ligne) coûterait plus que le chiffrement. COPY sous PostgreSQL,
+    executemany du pilote ailleurs. Les jetons sont hexadécimaux et les noms
+    de champs fixes : aucun échappement n'est nécessaire.
+    """
+    conn = session.connection()
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO(
+            "".join(f"{client_id}\t{field}\t{token}\n" for client_id, field, token in token_rows)
+        )
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {_tokens.name} (client_id, field, token) FROM STDIN", buffer
+            )
+        finally:
+            cursor.close()
+        return
+    placeholder = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    conn.exec_driver_sql(
+        f"INSERT INTO {_tokens.name} (client_id, field, token) "
+        f"VALUES ({placeholder}, {placeholder}, {placeholder})",
+        token_rows,
+    )
+
+
+def _insert_batch(session, rows, tokens):
+    """Insère un lot (executemany / insertmanyvalues) et ses jetons de recherche."""
+    ids = session.execute(
+        insert(_clients).returning(_clients.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    token_rows = [
+        (client_id, field, token)
+        for client_id, client_tokens in zip(ids, tokens)
+        for field, token in client_tokens
+    ]
+    if token_rows:
+        # Ordre de l'index (field, token) : insertions groupées dans ses pages
+        token_rows.sort(key=lambda row: (row[1], row[2]))
+        _copy_tokens(session, token_rows)
+    return len(ids)
+
+
+def _batches(records, size):
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _valid_batches(records, size, rejects):
+    """Lots de (ligne, enregistrement, valeurs) valides, les invalides partant aux rejets."""
+    for batch in _batches(records, size):
+        valid = []
+        for number, record in batch:
+            values, error = validate(record)
+            if error:
+                rejects.write(number, record, error)
+            else:
+                valid.append((number, record, values))
+        if valid:
+            yield valid
+
+
+def _flush(session, batch, future, seen, rejects):
+    """
+    Insère un lot préparé en écartant les doublons d'email, puis valide la
+    transaction. Retourne le nombre de clients insérés.
+    """
+    rows, tokens = future.result()
+
+    for attempt in range(2):
+        existing = _existing_bidx(session, [row["email_bidx"] for row in rows])
+        keep = []
+        for (number, record, _), row, row_tokens in zip(batch, rows, tokens):
+            if row["email_bidx"] in existing or row["email_bidx"] in seen:
+                rejects.write(number, record, "email déjà existant")
+            else:
+                seen.add(row["email_bidx"])
+                keep.append(((number, record, None), row, row_tokens))
+        if not keep:
+            return 0
+        try:
+            inserted = _insert_batch(session, [k[1] for k in keep], [k[2] for k in keep])
+            session.commit()
+            return inserted
+        except IntegrityError:
+            # Email inséré entre la vérification et l'insertion : on revérifie
+            session.rollback()
+            if attempt:
+                raise
+            for _, row, _ in keep:
+                seen.discard(row["email_bidx"])
+            batch, rows, tokens = (list(x) for x in zip(*keep))
+    return 0
+
+
+def import_records(
+    session,
+    records,
+    commercial_contact_id,
+    rejects,
+    batch_size=1000,
+    with_search_index=True,
+    progress=None,
+):
+    """
+    Insère des enregistrements clients par lots, une transaction par lot.
+
+    Le chiffrement et l'index aveugle du lot suivant sont calculés dans un
+    thread pendant l'insertion du lot courant.
+
+    Args:
+        session (Session): La session SQLAlchemy.
+        records (iterable): Couples (numéro de ligne, dict) de `read_records`.
+        commercial_contact_id (int): Le commercial attitré des clients.
+        rejects (RejectFile): Reçoit les lignes invalides ou en doublon.
+        batch_size (int): Nombre de clients par transaction.
+        with_search_index (bool): Écrire les jetons de `search-clients`.
+        progress (callable | None): Appelé avec le total importé après chaque lot.
+
+    Returns:
+        int: Le nombre de clients insérés.
+    """
+    imported = 0
+    seen = set()
+
+    with ThreadPoolExecutor(max_workers=1) as preparer:
+        pending = None
+        for batch in _valid_batches(records, batch_size, rejects):
+            future = preparer.submit(prepare_batch, batch, commercial_contact_id, with_search_index)
+            if pending is not None:
+                imported += _flush(session, *pending, seen, rejects)
+                if progress:
+                    progress(imported)
+            pending = (batch, future)
+        if pending is not None:
+            imported += _flush(session, *pending, seen, rejects)
+    return imported
+
+
+def _upsert_statement(dialect_name):
+    """
+    INSERT ... ON CONFLICT (email_bidx) DO UPDATE (PostgreSQL, SQLite >= 3.24).
+
+    Seules les lignes dont l'empreinte diffère sont réécrites, et seulement si
+    le commercial attitré est celui de la ligne proposée : un client créé
+    entre-temps par un autre commercial n'est pas écrasé.
+    """
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise RuntimeError(f"upsert non disponible pour {dialect_name}")
+    statement = dialect_insert(_clients)
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=[_clients.c.email_bidx],
+        set_={name: excluded[name] for name in ENCRYPTED_FIELDS + ("content_digest",)},
+        where=and_(
+            _clients.c.content_digest.is_distinct_from(excluded.content_digest),
+            _clients.c.commercial_contact_id == excluded.commercial_contact_id,
+        ),
+    ).returning(_clients.c.id, _clients.c.email_bidx)
+
+
+def _existing_clients(session, bidx):
+    """Clients déjà en base pour ces index aveugles, par email_bidx."""
+    rows = session.execute(
+        select(
+            _clients.c.id,
+            _clients.c.email_bidx,
+            _clients.c.content_digest,
+            _clients.c.commercial_contact_id,
+            *(_clients.c[field] for field in ENCRYPTED_FIELDS),
+        ).where(_clients.c.email_bidx.in_(bidx))
+    ).all()
+    return {row.email_bidx: row for row in rows}
+
+
+def _upsert_batch(session, batch, commercial_contact_id, owner_only, seen, rejects, counts):
+    """
+    Synchronise un lot puis valide la transaction.
+
+    Les clients dont l'empreinte n'a pas changé sont ignorés sans être
+    déchiffrés. Pour les autres, seuls les champs dont le clair a changé sont
+    rechiffrés (les autres gardent leur texte chiffré actuel) et seuls leurs
+    jetons de recherche sont réécrits.
+    """
+    bidx = blind_index_many([values["email"] for _, _, values in batch])
+    digests = [content_digest(values) for _, _, values in batch]
+    existing = _existing_clients(session, bidx)
+
+    # Clients modifiés (ou sans empreinte) : valeurs actuelles en clair
+    stale = [
+        existing[key]
+        for key, digest in zip(bidx, digests)
+        if key in existing and existing[key].content_digest != digest
+    ]
+    plaintexts = {
+        field: decrypt_many([row._mapping[field] for row in stale]) for field in ENCRYPTED_FIELDS
+    }
+    current = {
+        row.email_bidx: {field: plaintexts[field][i] for field in ENCRYPTED_FIELDS}
+        for i, row in enumerate(stale)
+    }
+
+    rows = []
+    changes = []
+    to_encrypt = {field: [] for field in ENCRYPTED_FIELDS}
+    for (number, record, values), key, digest in zip(batch, bidx, digests):
+        if key in seen:
+            rejects.write(number, record, "email en double dans le fichier")
+            continue
+        seen.add(key)
+        row = existing.get(key)
+        if row is not None and row.content_digest == digest:
+            counts["unchanged"] += 1
+            continue
+        if row is not None and owner_only and row.commercial_contact_id != commercial_contact_id:
+            rejects.write(number, record, "client attitré à un autre commercial")
+            continue
+
+        if row is None:
+            changed = ENCRYPTED_FIELDS
+            new_row = {"commercial_contact_id": commercial_contact_id}
+        else:
+            changed = tuple(f for f in ENCRYPTED_FIELDS if values[f] != current[key][f])
+            new_row = {f: row._mapping[f] for f in ENCRYPTED_FIELDS if f not in changed}
+            new_row["commercial_contact_id"] = row.commercial_contact_id
+        new_row.update(email_bidx=key, content_digest=digest)
+        for field in changed:
+            to_encrypt[field].append((new_row, values[field]))
+        rows.append(new_row)
+        changes.append((number, record, values, key, row is None, changed))
+
+    if not rows:
+        return
+
+    for field, items in to_encrypt.items():
+        ciphertexts = encrypt_many([value for _, value in items])
+        for (new_row, _), ciphertext in zip(items, ciphertexts):
+            new_row[field] = ciphertext
+
+    statement = _upsert_statement(session.connection().dialect.name)
+    written = {key: client_id for client_id, key in session.execute(statement, rows)}
+
+    cleared = {field: [] for field in SEARCH_INDEX_FIELDS}
+    token_rows = []
+    for number, record, values, key, created, changed in changes:
+        client_id = written.get(key)
+        if client_id is None:
+            # Condition de l'upsert non remplie : modifié entre-temps, ou autre commercial
+            rejects.write(number, record, "client modifié entre-temps ou attitré à un autre commercial")
+            continue
+        counts["inserted" if created else "updated" if changed else "unchanged"] += 1
+        for field, kinds in SEARCH_INDEX_FIELDS.items():
+            if field in changed:
+                cleared[field].append(client_id)
+                token_rows.extend(
+                    (client_id, field, token) for token in index_tokens(field, values[field], kinds)
+                )
+
+    for field, ids in cleared.items():
+        if ids:
+            session.execute(
+                delete(_tokens).where(_tokens.c.field == field, _tokens.c.client_id.in_(ids))
+            )
+    if token_rows:
+        token_rows.sort(key=lambda row: (row[1], row[2]))
+        _copy_tokens(session, token_rows)
+    session.commit()
+
+
+def upsert_records(
+    session,
+    records,
+    commercial_contact_id,
+    rejects,
+    batch_size=1000,
+    owner_only=True,
+    progress=None,
+):
+    """
+    Crée ou met à jour des clients par lots, identifiés par l'index aveugle
+    de leur email, une transaction par lot.
+
+    Args:
+        session (Session): La session SQLAlchemy.
+        records (iterable): Couples (numéro de ligne, dict) de `read_records`.
+        commercial_contact_id (int): Le commercial attitré des nouveaux clients.
+        rejects (RejectFile): Reçoit les lignes invalides ou refusées.
+        batch_size (int): Nombre de clients par transaction.
+        owner_only (bool): Refuser la mise à jour des clients d'un autre
+            commercial (tout sauf la gestion).
+        progress (callable | None): Appelé avec les compteurs après chaque lot.
+
+    Returns:
+        dict: Nombre de clients inserted, updated et unchanged.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    seen = set()
+    for batch in _valid_batches(records, batch_size, rejects):
+        _upsert_batch(session, batch, commercial_contact_id, owner_only, seen, rejects, counts)
+        if progress:
+            progress(counts)
+    return counts
+
+
+def source_options(f):
+    """Options communes des commandes qui lisent un fichier de clients."""
+    decorators = [
+        token_option,
+        click.argument("source", type=click.File("r", encoding="utf-8-sig")),
+        click.option(
+            "--input-format",
+            type=click.Choice(INPUT_FORMATS),
+            default=None,
+            help="Format du fichier (déduit de l'extension par défaut)",
+        ),
+        click.option(
+            "--commercial-id",
+            type=int,
+            default=None,
+            help="Commercial attitré des nouveaux clients (gestion uniquement, soi-même par défaut)",
+        ),
+        click.option(
+            "--batch-size",
+            default=1000,
+            show_default=True,
+            type=int,
+            help="Nombre de clients par transaction",
+        ),
+        click.option(
+            "--rejects",
+            "rejects_path",
+            type=click.Path(dir_okay=False, writable=True),
+            default=None,
+            help="Fichier NDJSON des lignes rejetées (<source>.rejects.ndjson par défaut)",
+        ),
+    ]
+    for decorator in reversed(decorators):
+        f = decorator(f)
+    return f
+
+
+def open_source(auth, source, input_format, commercial_id, rejects_path, output):
+    """
+    Vérifie le commercial cible et prépare la lecture du fichier.
+
+    Returns:
+        tuple | None: (id du commercial, enregistrements, RejectFile), ou None
+        si la commande doit s'arrêter (message déjà affiché).
+    """
+    if commercial_id is None or commercial_id == auth.user_id:
+        commercial_id = auth.user_id
+    elif auth.department != "gestion":
+        output.message("Seule la gestion peut importer des clients pour un autre commercial.")
+        return None
+    elif auth.session.get(Collaborator, commercial_id) is None:
+        output.message("Commercial introuvable.")
+        return None
+
+    name = getattr(source, "name", "-")
+    if input_format is None:
+        input_format = "ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv"
+    if rejects_path is None:
+        stem = click.get_current_context().info_name if name in ("-", "<stdin>") else name
+        rejects_path = f"{stem}.rejects.ndjson"
+    return commercial_id, read_records(source, input_format), RejectFile(rejects_path)
+
+
+@click.command(
+    "import-clients",
+    short_help="Importe des clients depuis un fichier CSV ou NDJSON (`-` pour stdin).",
+)
+@source_options
+@click.option(
+    "--skip-search-index",
+    is_flag=True,
+    help="N'écrit pas les jetons de recherche (à reconstruire ensuite avec rebuild-search-index)",
+)
+@output_option
+@check_permission(["commercial", "gestion"])
+@pass_auth
+def import_clients(
+    auth,
+    token,
+    source,
+    input_format,
+    commercial_id,
+    batch_size,
+    rejects_path,
+    skip_search_index,
+    output,
+):
+    """
+    Importe des clients depuis un fichier CSV ou NDJSON (`-` pour stdin).
+
+    Le fichier est lu au fil de l'eau et traité par lots de --batch-size
+    lignes : chaque lot est validé, chiffré et indexé (en parallèle de
+    l'insertion du lot précédent) puis inséré en une seule requête
+    multi-lignes et validé dans sa propre transaction. Les lignes invalides et
+    les emails déjà présents (index aveugle, en base ou plus haut dans le
+    fichier) sont écrits dans le fichier de rejets.
+
+    Colonnes attendues : first_name, last_name, email, phone, company_name.
+
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+        source (file): Le fichier à importer.
+        input_format (str | None): csv ou ndjson.
+        commercial_id (int | None): Le commercial attitré des clients.
+        batch_size (int): Nombre de clients par transaction.
+        rejects_path (str | None): Le fichier des rejets.
+        skip_search_index (bool): Ne pas écrire les jetons de recherche.
+        output (Output): La sortie de la commande (--format).
+
+    Returns:
+        None
+    """
+    user_id = auth.user_id
+    session = auth.session
+
+    opened = open_source(auth, source, input_format, commercial_id, rejects_path, output)
+    if opened is None:
+        return
+    commercial_id, records, rejects = opened
+
+    started = time.monotonic()
+    imported = 0
+
+    def progress(count):
+        nonlocal imported
+        imported = count
+        output.message(f"{count} clients importés, {rejects.count} rejetés")
+
+    try:
+        imported = import_records(
+            session,
+            records,
+            commercial_id,
+            rejects,
+            batch_size=batch_size,
+            with_search_index=not skip_search_index,
+            progress=progress,
+        )
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Import de {imported} clients ({rejects.count} rejets) par l'utilisateur {user_id}"
+        )
+        output.row(
+            {
+                "imported": imported,
+                "rejected": rejects.count,
+                "rejects_file": rejects.path if rejects.count else None,
+                "seconds": round(elapsed, 2),
+            },
+            f"{imported} clients importés en {elapsed:.1f} s, {rejects.count} rejetés"
+            + (f" (voir {rejects.path})" if rejects.count else ""),
+        )
+    except Exception as e:
+        session.rollback()
+        capture_exception(e)
+        output.message(f"Erreur lors de l'import (après {imported} clients importés) : {e}")
+    finally:
+        rejects.close()
+
+
+@click.command(
+    "upsert-clients",
+    short_help="Crée ou met à jour des clients depuis un fichier CSV ou NDJSON.",
+)
+@source_options
+@output_option
+@check_permission(["commercial", "gestion"])
+@pass_auth
+def upsert_clients(
+    auth,
+    token,
+    source,
+    input_format,
+    commercial_id,
+    batch_size,
+    rejects_path,
+    output,
+):
+    """
+    Crée ou met à jour des clients depuis un fichier CSV ou NDJSON.
+
+    Les clients sont identifiés par leur email (index aveugle) : relancer la
+    commande sur le même fichier ne crée pas de doublon. Un client inchangé
+    est reconnu à son empreinte sans être déchiffré ni réécrit ; pour un
+    client modifié, seuls les champs dont la valeur a changé sont rechiffrés.
+    Un commercial ne met à jour que ses propres clients ; le commercial
+    attitré d'un client existant n'est jamais modifié.
+
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+        source (file): Le fichier à synchroniser.
+        input_format (str | None): csv ou ndjson.
+        commercial_id (int | None): Le commercial attitré des nouveaux clients.
+        batch_size (int): Nombre de clients par transaction.
+        rejects_path (str | None): Le fichier des rejets.
+        output (Output): La sortie de la commande (--format).
+
+    Returns:
+        None
+    """
+    user_id = auth.user_id
+    session = auth.session
+
+    opened = open_source(auth, source, input_format, commercial_id, rejects_path, output)
+    if opened is None:
+        return
+    commercial_id, records, rejects = opened
+
+    started = time.monotonic()
+    counts = {}
+
+    def progress(current):
+        counts.update(current)
+        output.message(
+            f"{current['inserted']} créés, {current['updated']} mis à jour, "
+            f"{current['unchanged']} inchangés, {rejects.count} rejetés"
+        )
+
+    try:
+        counts = upsert_records(
+            session,
+            records,
+            commercial_id,
+            rejects,
+            batch_size=batch_size,
+            owner_only=auth.department != "gestion",
+            progress=progress,
+        )
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Synchronisation de clients par l'utilisateur {user_id} : {counts}, {rejects.count} rejets"
+        )
+        output.row(
+            dict(
+                counts,
+                rejected=rejects.count,
+                rejects_file=rejects.path if rejects.count else None,
+                seconds=round(elapsed, 2),
+            ),
+            f"{counts['inserted']} clients créés, {counts['updated']} mis à jour, "
+            f"{counts['unchanged']} inchangés en {elapsed:.1f} s, {rejects.count} rejetés"
+            + (f" (voir {rejects.path})" if rejects.count else ""),
+        )
+    except Exception as e:
+        session.rollback()
+        capture_exception(e)
+        output.message(f"Erreur lors de la synchronisation ({counts}) : {e}")
+    finally:
+        rejects.close()
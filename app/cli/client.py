@@ -1,80 +1,207 @@
 import click
-import sentry_sdk
-from app.auth.permissions import check_permission
-from app.cli.messages import INVALID_TOKEN_MESSAGE
-from app.db.session import SessionLocal
-from app.models.client import Client
-from app.auth.auth import verify_token
-from app.models.collaborator import Collaborator
+from app.logging.sentry import capture_exception
+from sqlalchemy import func
+from app.auth.permissions import authenticated, check_permission, pass_auth
+from app.cli.filters import BlindIndexField, filter_options
+from app.cli.inputs import ask, token_option
+from app.cli.output import output_option, record
+from app.cli.pagination import iter_pages, pagination_options
+from app.models.client import Client, ENCRYPTED_FIELDS, SEARCH_INDEX_FIELDS
+from app.models.client_search_token import ClientSearchToken
+from app.security.crypto import decrypt_attributes, decrypt_rows
+from app.security.search_index import matches, query_tokens
 import logging
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Colonnes affichées par les listes de clients : seules celles-ci sont lues
+# et déchiffrées, sans charger d'entités Client complètes.
+LIST_COLUMNS = (
+    Client.id,
+    Client.first_name.label("first_name"),
+    Client.last_name.label("last_name"),
+    Client.email.label("email"),
+)
+LIST_ENCRYPTED_FIELDS = ("first_name", "last_name", "email")
+
+# Champs de --where / --sort. Les champs chiffrés ne sont comparables en base
+# que par leur index aveugle (égalité) : noms et société passent par search-clients.
+FILTER_FIELDS = {
+    "id": Client.id,
+    "email": BlindIndexField(Client.email_bidx),
+    "commercial_contact_id": Client.commercial_contact_id,
+}
+
+
+def _client_record(client, fields=ENCRYPTED_FIELDS):
+    """Les champs (déchiffrés) d'un client pour `Output.row`."""
+    data = {"id": client.id}
+    data.update((field, getattr(client, field)) for field in fields)
+    data["commercial_contact_id"] = client.commercial_contact_id
+    return data
+
 
 @click.command("list-clients")
-@click.option("--token", prompt=True, help="Jeton d'authentification JWT")
-def list_clients(token):
+@token_option
+@filter_options(FILTER_FIELDS)
+@pagination_options
+@output_option
+@authenticated
+@pass_auth
+def list_clients(auth, token, where, sort, limit, after_id, page_size, stream, output):
     """
     Affiche la liste des clients.
 
-    Vérifie l'authentification avec le jeton JWT fourni et récupère tous les clients
-    dans la base de données, puis les affiche.
+    Vérifie l'authentification avec le jeton JWT fourni, puis parcourt les clients
+    par pages (ou en flux) et les affiche au fur et à mesure.
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        where (ColumnElement | None): Filtre compilé depuis --where.
+        sort (tuple | None): Clé de tri compilée depuis --sort.
+        limit (int | None): Nombre maximal de clients affichés.
+        after_id (int | None): Reprend la liste après cet id.
+        page_size (int): Nombre de lignes lues par requête.
+        stream (bool): Lecture en flux plutôt que par pages.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    verify_token(token)
-    session = SessionLocal()
-    clients = session.query(Client).all()
+    session = auth.session
+    query = session.query(*LIST_COLUMNS)
+    if where is not None:
+        query = query.filter(where)
+    found = False
+    for rows in iter_pages(
+        query, Client.id, after_id, limit, page_size, stream, sort
+    ):
+        found = True
+        for client in decrypt_rows(rows, LIST_ENCRYPTED_FIELDS):
+            output.row(
+                record(client),
+                f"{client.id} - {client.first_name} {client.last_name} ({client.email})",
+            )
+
+    if not found:
+        output.message("Aucun client trouvé.")
+
+
+@click.command(
+    "search-clients",
+    short_help="Recherche des clients sur un champ chiffré (contient ou commence par).",
+)
+@token_option
+@click.option(
+    "--field",
+    type=click.Choice(sorted(SEARCH_INDEX_FIELDS)),
+    default="last_name",
+    show_default=True,
+    help="Champ sur lequel rechercher",
+)
+@click.option("--prefix", is_flag=True, help="Recherche par début de valeur")
+@click.argument("query")
+@output_option
+@authenticated
+@pass_auth
+def search_clients(auth, token, field, prefix, query, output):
+    """
+    Recherche des clients sur un champ chiffré (contient ou commence par).
+
+    La requête est traduite en jetons d'index aveugle : seuls les clients
+    possédant tous les jetons sont chargés puis déchiffrés pour vérification,
+    sans parcourir ni déchiffrer toute la table. Une recherche « contient »
+    demande au moins 3 caractères ; en dessous, utiliser --prefix.
 
-    if not clients:
-        click.echo("Aucun client trouvé.")
-        return
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+        field (str): Le champ recherché.
+        prefix (bool): Recherche par préfixe plutôt que par sous-chaîne.
+        query (str): Le texte recherché.
+        output (Output): La sortie de la commande (--format).
 
-    for client in clients:
-        click.echo(
-            f"{client.id} - {client.first_name} {client.last_name} ({client.email})"
+    Returns:
+        None
+    """
+
+    session = auth.session
+    try:
+        tokens = query_tokens(field, query, SEARCH_INDEX_FIELDS[field], prefix)
+        candidate_ids = (
+            session.query(ClientSearchToken.client_id)
+            .filter(
+                ClientSearchToken.field == field,
+                ClientSearchToken.token.in_(tokens),
+            )
+            .group_by(ClientSearchToken.client_id)
+            .having(func.count(ClientSearchToken.token) == len(tokens))
         )
+        candidates = (
+            session.query(Client)
+            .filter(Client.id.in_(candidate_ids.scalar_subquery()))
+            .order_by(Client.id)
+            .all()
+        )
+        clients = [c for c in candidates if matches(getattr(c, field), query, prefix)]
+
+        if not clients:
+            output.message("Aucun client trouvé.")
+            return
+
+        decrypt_attributes(clients, LIST_ENCRYPTED_FIELDS)
+        for client in clients:
+            output.row(
+                _client_record(client, LIST_ENCRYPTED_FIELDS),
+                f"{client.id} - {client.first_name} {client.last_name} ({client.email})",
+            )
+    except Exception as e:
+        capture_exception(e)
+        output.message(f"Erreur lors de la recherche : {e}")
 
 
 @click.command("create-client")
-@click.option("--token", prompt=True, help="Token d'authentification JWT")
+@token_option
+@click.option("--first-name", help="Prénom du client")
+@click.option("--last-name", help="Nom du client")
+@click.option("--email", help="Email du client")
+@click.option("--phone", help="Téléphone du client")
+@click.option("--company-name", help="Nom de l’entreprise")
+@output_option
 @check_permission(["commercial"])
-def create_client(token):
+@pass_auth
+def create_client(auth, token, first_name, last_name, email, phone, company_name, output):
     """
     Crée un nouveau client.
 
     Vérifie l'authentification avec le jeton JWT et crée un client dans la base de données
     avec les informations fournies par l'utilisateur, seulement si l'utilisateur a le rôle
-    "commercial".
+    "commercial". Les champs non passés en option sont demandés interactivement.
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        first_name, last_name, email, phone, company_name (str | None): Les
+            champs du client, demandés s'ils ne sont pas fournis.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info("Tentative de création de client avec un token invalide ou expiré")
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
+    user_id = auth.user_id
     try:
-        first_name = click.prompt("Prénom du client")
-        last_name = click.prompt("Nom du client")
-        email = click.prompt("Email")
-        phone = click.prompt("Téléphone")
-        company_name = click.prompt("Nom de l’entreprise")
+        first_name = ask(first_name, "Prénom du client")
+        last_name = ask(last_name, "Nom du client")
+        email = ask(email, "Email")
+        phone = ask(phone, "Téléphone")
+        company_name = ask(company_name, "Nom de l’entreprise")
         commercial_contact_id = user_id
 
-        session = SessionLocal()
+        session = auth.session
         client = Client(
             first_name=first_name,
             last_name=last_name,
@@ -88,80 +215,99 @@ def create_client(token):
         logger.info(
             f"Création du client {first_name} {last_name}, pour l'entreprise {company_name} ajouté avec succès."
         )
-        click.echo(f"Client {first_name} {last_name} ajouté avec succès.")
+        output.row(
+            _client_record(client),
+            f"Client {first_name} {last_name} ajouté avec succès.",
+        )
 
     except Exception as e:
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur lors de la création du client : {e}")
+        capture_exception(e)
+        output.message(f"Erreur lors de la création du client : {e}")
 
 
-@click.command("update-client")
-@click.option("--token", prompt=True, help="Jeton d'authentification JWT")
+@click.command(
+    "update-client",
+    short_help="Met à jour les informations d'un client existant.",
+)
+@token_option
+@click.option("--client-id", type=int, help="ID du client à modifier")
+@click.option("--first-name", help="Nouveau prénom")
+@click.option("--last-name", help="Nouveau nom")
+@click.option("--email", help="Nouvel email")
+@click.option("--phone", help="Nouveau téléphone")
+@click.option("--company-name", help="Nouvelle entreprise")
+@output_option
 @check_permission(["commercial"])
-def update_client(token):
+@pass_auth
+def update_client(
+    auth, token, client_id, first_name, last_name, email, phone, company_name, output
+):
     """
     Met à jour les informations d'un client existant.
 
     Vérifie l'authentification avec le jeton JWT et permet à un utilisateur du rôle
     "commercial" de mettre à jour les informations d'un client dans la base de données,
     mais uniquement si l'utilisateur est le commercial responsable du client.
+    Avec --client-id, la liste des clients n'est ni lue ni affichée ; les champs
+    non passés en option sont demandés (valeur actuelle par défaut).
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        client_id (int | None): Le client à modifier.
+        first_name, last_name, email, phone, company_name (str | None): Les
+            nouvelles valeurs, demandées si elles ne sont pas fournies.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info("Tentaive de mise à jour de clients avec un token non valide")
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    user_id = auth.user_id
+    session = auth.session
     try:
-        user = session.get(Collaborator, user_id)
-        clients = session.query(Client).all()
-        for c in clients:
-            click.echo(f"{c.id} - {c.first_name} {c.last_name} ({c.email})")
+        if client_id is None:
+            rows = session.query(*LIST_COLUMNS).order_by(Client.id).all()
+            for c in decrypt_rows(rows, LIST_ENCRYPTED_FIELDS):
+                output.message(f"{c.id} - {c.first_name} {c.last_name} ({c.email})")
 
-        client_id = click.prompt("ID du client à modifier", type=int)
+        client_id = ask(client_id, "ID du client à modifier", type=int)
         client = session.get(Client, client_id)
 
         if not client:
-            click.echo("Client introuvable.")
-            sentry_sdk.capture_exception(
+            output.message("Client introuvable.")
+            capture_exception(
                 Exception("Tentative de mise à jour d'un client inexistant")
             )
             return
 
         if (
-            user.department.name == "commercial"
-            and client.commercial_contact_id != user.id
+            auth.department == "commercial"
+            and client.commercial_contact_id != user_id
         ):
-            sentry_sdk.capture_exception(
+            capture_exception(
                 Exception(
                     "Tentative de mise à jour de client par un commercial non autorisé"
                 )
             )
-            click.echo(
+            output.message(
                 "Les informations d'un client ne peuvent être mises à jour que par le commercial qui lui est attitré"
             )
             return
 
-        client.first_name = click.prompt("Prénom", default=client.first_name)
-        client.last_name = click.prompt("Nom", default=client.last_name)
-        client.email = click.prompt("Email", default=client.email)
-        client.phone = click.prompt("Téléphone", default=client.phone)
-        client.company_name = click.prompt("Entreprise", default=client.company_name)
+        # Valeurs actuelles déchiffrées seulement pour les champs demandés
+        client.first_name = ask(first_name, "Prénom", default=lambda: client.first_name)
+        client.last_name = ask(last_name, "Nom", default=lambda: client.last_name)
+        client.email = ask(email, "Email", default=lambda: client.email)
+        client.phone = ask(phone, "Téléphone", default=lambda: client.phone)
+        client.company_name = ask(company_name, "Entreprise", default=lambda: client.company_name)
 
         session.commit()
         logger.info(
             f"Client {client_id} mis à jour avec succès par l'utiisateur {user_id}"
         )
-        click.echo("Client mis à jour avec succès.")
+        output.row(_client_record(client), "Client mis à jour avec succès.")
 
     except Exception as e:
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur lors de la mise à jour du client : {e}")
+        capture_exception(e)
+        output.message(f"Erreur lors de la mise à jour du client : {e}")
@@ -1,52 +1,92 @@
 import click
-import sentry_sdk
-from app.auth.permissions import check_permission
-from app.cli.messages import INVALID_TOKEN_MESSAGE
-from app.db.session import SessionLocal
-from app.auth.auth import verify_token
+from app.logging.sentry import capture_exception
+from app.auth.permissions import check_permission, pass_auth
+from app.cli.filters import RelatedField, filter_options
+from app.cli.inputs import ask, ask_confirm, token_option
+from app.cli.output import output_option, record
+from app.cli.pagination import iter_pages, pagination_options
 from app.models.collaborator import Collaborator
+from app.models.department import Department
 import logging
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Colonnes affichées par la liste des collaborateurs (le hash du mot de passe
+# n'est jamais lu)
+LIST_COLUMNS = (
+    Collaborator.id,
+    Collaborator.first_name,
+    Collaborator.last_name,
+    Collaborator.email,
+    Collaborator.department_id,
+)
+
+# Champs de --where / --sort
+FILTER_FIELDS = {
+    "id": Collaborator.id,
+    "first_name": Collaborator.first_name,
+    "last_name": Collaborator.last_name,
+    "email": Collaborator.email,
+    "department_id": Collaborator.department_id,
+    "department": RelatedField(Collaborator.department, Department.name),
+}
+
+
+def _collaborator_record(collaborator):
+    """Les champs d'un collaborateur pour `Output.row` (jamais le mot de passe)."""
+    return {column.key: getattr(collaborator, column.key) for column in LIST_COLUMNS}
+
 
 @click.command("create-collaborator")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
+@token_option
+@click.option("--first-name", help="Prénom du collaborateur")
+@click.option("--last-name", help="Nom du collaborateur")
+@click.option("--email", help="Adresse email du collaborateur")
+@click.option("--department-id", type=int, help="Département de rattachement")
+@click.option(
+    "--password",
+    envvar="EPIC_NEW_PASSWORD",
+    help="Mot de passe initial (ou variable EPIC_NEW_PASSWORD)",
+)
+@output_option
 @check_permission(["gestion"])
-def create_collaborator(token):
+@pass_auth
+def create_collaborator(
+    auth, token, first_name, last_name, email, department_id, password, output
+):
     """
     Crée un nouveau collaborateur.
 
     Vérifie l'authentification avec le jeton JWT fourni et permet à un utilisateur
     ayant le rôle "gestion" de créer un collaborateur dans la base de données.
+    Les champs non passés en option sont demandés interactivement.
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        first_name, last_name, email, password (str | None): Les champs du
+            collaborateur.
+        department_id (int | None): Son département.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative de création de collaborateur avec token invalide ou expiré"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    user_id = auth.user_id
+    session = auth.session
     try:
-        collaborator_name = click.prompt("Prénom du collaborateur", type=str)
-        collaborator_lastname = click.prompt("Nom du collaborateur", type=str)
-        collaborator_email = click.prompt("Adresses email du collaborateur", type=str)
-        collaborator_department_id = click.prompt(
+        collaborator_name = ask(first_name, "Prénom du collaborateur", type=str)
+        collaborator_lastname = ask(last_name, "Nom du collaborateur", type=str)
+        collaborator_email = ask(email, "Adresses email du collaborateur", type=str)
+        collaborator_department_id = ask(
+            department_id,
             "Identifiants du départements auquel le collaborateur sera rattaché",
             type=int,
         )
 
-        collaborator_password = click.prompt("Mot de passe du nouveau collaborateur")
+        collaborator_password = ask(password, "Mot de passe du nouveau collaborateur")
         from app.auth.auth import hash_password
 
         hashed_pw = hash_password(collaborator_password)
@@ -63,157 +103,177 @@ def create_collaborator(token):
         logger.info(
             f"Collaborateur {collaborator_name} {collaborator_lastname} ajouté avec succès par l'utiisateur {user_id}"
         )
-        click.echo("Collaborateur créé avec succès.")
+        output.row(_collaborator_record(collaborator), "Collaborateur créé avec succès.")
     except Exception as e:
         session.rollback()
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur lors de la création : {e}")
-    finally:
-        session.close()
-
-
-@click.command("update-collaborator")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
+        capture_exception(e)
+        output.message(f"Erreur lors de la création : {e}")
+
+
+@click.command(
+    "update-collaborator",
+    short_help="Met à jour les informations d'un collaborateur existant.",
+)
+@token_option
+@click.option("--collaborator-id", "collab_id", type=int, help="ID du collaborateur à modifier")
+@click.option("--first-name", help="Nouveau prénom")
+@click.option("--last-name", help="Nouveau nom")
+@click.option("--email", help="Nouvel email")
+@click.option("--department-id", type=int, help="Nouveau département")
+@output_option
 @check_permission(["gestion"])
-def update_collaborator(token):
+@pass_auth
+def update_collaborator(
+    auth, token, collab_id, first_name, last_name, email, department_id, output
+):
     """
     Met à jour les informations d'un collaborateur existant.
 
     Vérifie l'authentification avec le jeton JWT fourni et permet à un utilisateur
     ayant le rôle "gestion" de mettre à jour les informations d'un collaborateur
-    dans la base de données.
+    dans la base de données. Les champs non passés en option sont demandés
+    (valeur actuelle par défaut).
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        collab_id (int | None): Le collaborateur à modifier.
+        first_name, last_name, email (str | None): Les nouvelles valeurs.
+        department_id (int | None): Le nouveau département.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative de mise à jour d'un collaborateur avec un token expiré ou invalide"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    user_id = auth.user_id
+    session = auth.session
     try:
-        collab_id = click.prompt("ID du collaborateur à modifier", type=int)
+        collab_id = ask(collab_id, "ID du collaborateur à modifier", type=int)
         collaborator = session.query(Collaborator).get(collab_id)
 
         if not collaborator:
-            click.echo("Collaborateur introuvable.")
+            output.message("Collaborateur introuvable.")
             return
 
-        new_first_name = click.prompt("Prénom", default=collaborator.first_name)
-        new_last_name = click.prompt("Nom", default=collaborator.last_name)
-        new_email = click.prompt("Email", default=collaborator.email)
-        new_department_id = click.prompt(
-            "Département ID", default=collaborator.department_id, type=int
+        new_first_name = ask(first_name, "Prénom", default=collaborator.first_name)
+        new_last_name = ask(last_name, "Nom", default=collaborator.last_name)
+        new_email = ask(email, "Email", default=collaborator.email)
+        new_department_id = ask(
+            department_id,
+            "Département ID",
+            default=collaborator.department_id,
+            type=int,
         )
 
         collaborator.first_name = new_first_name
         collaborator.last_name = new_last_name
         collaborator.email = new_email
+        if new_department_id != collaborator.department_id:
+            # Invalide les tokens portant l'ancien département
+            collaborator.token_version += 1
         collaborator.department_id = new_department_id
 
         session.commit()
         logger.info(
             f"Collaborateur {new_first_name} {new_last_name} mis à jour avec succès par l'utiisateur {user_id}"
         )
-        click.echo("Collaborateur mis à jour avec succès.")
+        output.row(
+            _collaborator_record(collaborator), "Collaborateur mis à jour avec succès."
+        )
     except Exception as e:
         session.rollback()
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur : {e}")
-    finally:
-        session.close()
+        capture_exception(e)
+        output.message(f"Erreur : {e}")
 
 
 @click.command("delete-collaborator")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
+@token_option
+@click.option("--collaborator-id", "collab_id", type=int, help="ID du collaborateur à supprimer")
+@click.option("--yes", "confirmed", flag_value=True, default=None, help="Supprime sans confirmation")
+@output_option
 @check_permission(["gestion"])
-def delete_collaborator(token):
+@pass_auth
+def delete_collaborator(auth, token, collab_id, confirmed, output):
     """
     Supprime un collaborateur.
 
     Vérifie l'authentification avec le jeton JWT fourni et permet à un utilisateur
     ayant le rôle "gestion" de supprimer un collaborateur de la base de données
-    après confirmation.
+    après confirmation (ou directement avec --yes).
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        collab_id (int | None): Le collaborateur à supprimer.
+        confirmed (bool | None): True pour ne pas demander de confirmation.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative de suppression d'un collaborateur avec un token invalide ou expiré"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    user_id = auth.user_id
+    session = auth.session
     try:
-        collab_id = click.prompt("ID du collaborateur à supprimer", type=int)
+        collab_id = ask(collab_id, "ID du collaborateur à supprimer", type=int)
         collaborator = session.query(Collaborator).get(collab_id)
 
         if not collaborator:
-            click.echo("Collaborateur introuvable.")
+            output.message("Collaborateur introuvable.")
             return
 
-        confirm = click.confirm(
-            f"Confirmer la suppression de {collaborator.email} ?", default=False
+        confirm = ask_confirm(
+            confirmed, f"Confirmer la suppression de {collaborator.email} ?"
         )
         if not confirm:
-            click.echo("Suppression annulée.")
+            output.message("Suppression annulée.")
             return
 
+        deleted = _collaborator_record(collaborator)
         session.delete(collaborator)
         session.commit()
         logger.info(
             f"Collaborateur {collab_id} supprimé avec succès par l'utiisateur {user_id}"
         )
-        click.echo("Collaborateur supprimé avec succès.")
+        output.row(deleted, "Collaborateur supprimé avec succès.")
     except Exception as e:
         session.rollback()
-        click.echo(f"Erreur : {e}")
-    finally:
-        session.close()
+        output.message(f"Erreur : {e}")
 
 
-@click.command("list-collaborators")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
+@click.command(
+    "list-collaborators",
+    short_help="Affiche la liste des collaborateurs (gestion uniquement)",
+)
+@token_option
+@filter_options(FILTER_FIELDS)
+@pagination_options
+@output_option
 @check_permission(["gestion"])
-def list_collaborators(token):
+@pass_auth
+def list_collaborators(auth, token, where, sort, limit, after_id, page_size, stream, output):
     """Affiche la liste des collaborateurs (gestion uniquement)"""
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative de listing des collaborateurs avec un token invalide ou expiré"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    session = auth.session
     try:
-        collaborators = session.query(Collaborator).all()
-        if not collaborators:
-            click.echo("Aucun collaborateur trouvé.")
-            return
-
-        click.echo("Liste des collaborateurs :")
-        for c in collaborators:
-            click.echo(
-                f"[{c.id}] {c.first_name} {c.last_name} - {c.email} | Département ID: {c.department_id}"
-            )
+        query = session.query(*LIST_COLUMNS)
+        if where is not None:
+            query = query.filter(where)
+        found = False
+        for collaborators in iter_pages(
+            query, Collaborator.id, after_id, limit, page_size, stream, sort
+        ):
+            if not found:
+                output.message("Liste des collaborateurs :")
+                found = True
+            for c in collaborators:
+                output.row(
+                    record(c),
+                    f"[{c.id}] {c.first_name} {c.last_name} - {c.email} | Département ID: {c.department_id}",
+                )
+
+        if not found:
+            output.message("Aucun collaborateur trouvé.")
     except Exception as e:
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur : {e}")
-    finally:
-        session.close()
+        capture_exception(e)
+        output.message(f"Erreur : {e}")
@@ -1,71 +1,115 @@
 from datetime import datetime
 import click
-import sentry_sdk
-from app.auth.permissions import check_permission
-from app.cli.messages import INVALID_TOKEN_MESSAGE
-from app.db.session import SessionLocal
+from app.logging.sentry import capture_exception
+from app.auth.permissions import authenticated, check_permission, pass_auth
+from app.cli import rules
+from app.cli.filters import filter_options, parse_where
+from app.cli.inputs import ask, ask_confirm, token_option
+from app.cli.output import output_option, record
+from app.cli.pagination import iter_pages, pagination_options
+from app.cli.rules import OperationError
 from app.models.client import Client
-from app.models.collaborator import Collaborator
 from app.models.contract import Contract
-from app.auth.auth import verify_token
 import logging
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Colonnes affichées par les listes de contrats (projection sans entités ORM)
+LIST_COLUMNS = (
+    Contract.id,
+    Contract.client_id,
+    Contract.amount,
+    Contract.remaining_amount,
+    Contract.signed,
+    Contract.signed_date,
+)
+
+# Champs de --where / --sort
+FILTER_FIELDS = {
+    "id": Contract.id,
+    "client_id": Contract.client_id,
+    "sales_contact_id": Contract.sales_contact_id,
+    "amount": Contract.amount,
+    "remaining_amount": Contract.remaining_amount,
+    "signed": Contract.signed,
+    "signed_date": Contract.signed_date,
+}
+
+# Filtres prédéfinis de filter-contracts, exprimés dans la syntaxe de --where
+PRESET_FILTERS = {
+    1: "signed=false",
+    2: "remaining_amount>0",
+    3: "signed=false or remaining_amount>0",
+}
+
+
+def _contract_record(contract):
+    """Les champs d'un contrat pour `Output.row`."""
+    data = {column.key: getattr(contract, column.key) for column in LIST_COLUMNS}
+    data["sales_contact_id"] = contract.sales_contact_id
+    return data
+
 
 @click.command("list-contracts")
-@click.option("--token", prompt=True, help="Jeton JWT pour authentification")
-def list_contracts(token):
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info("Tentative de lister les contrats avec un token invalide ou expiré")
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
-    contracts = session.query(Contract).all()
-
-    if not contracts:
-        click.echo("Aucun contrats n'existe en base de données")
-        return
-
-    for contract in contracts:
-        status = "Signé" if contract.signed else "Non signé"
-        click.echo(
-            f"{contract.id} - Client ID {contract.client_id} | Montant: {contract.amount} | "
-            f"Status: {status} | Date de signature: {contract.signed_date}"
-        )
+@token_option
+@filter_options(FILTER_FIELDS)
+@pagination_options
+@output_option
+@authenticated
+@pass_auth
+def list_contracts(auth, token, where, sort, limit, after_id, page_size, stream, output):
+    """Affiche la liste des contrats."""
+    session = auth.session
+    query = session.query(*LIST_COLUMNS)
+    if where is not None:
+        query = query.filter(where)
+    found = False
+    for contracts in iter_pages(
+        query, Contract.id, after_id, limit, page_size, stream, sort
+    ):
+        found = True
+        for contract in contracts:
+            status = "Signé" if contract.signed else "Non signé"
+            output.row(
+                record(contract),
+                f"{contract.id} - Client ID {contract.client_id} | Montant: {contract.amount} | "
+                f"Status: {status} | Date de signature: {contract.signed_date}",
+            )
+
+    if not found:
+        output.message("Aucun contrats n'existe en base de données")
 
 
 @click.command("create-contract")
-@click.option("--token", prompt=True, help="Jeton JWT pour authentification")
+@token_option
+@click.option("--client-id", type=int, help="ID du client")
+@click.option("--amount", type=float, help="Montant total")
+@click.option("--paid-amount", type=float, help="Somme déjà réglée")
+@click.option("--signed/--not-signed", default=None, help="Contrat signé ou non")
+@output_option
 @check_permission(["gestion"])
-def create_contract(token):
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative de création d'un contrat avec un token invalide ou expiré"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+@pass_auth
+def create_contract(auth, token, client_id, amount, paid_amount, signed, output):
+    """Crée un contrat pour un client."""
+    user_id = auth.user_id
+    session = auth.session
     try:
-        client_id = click.prompt("ID du client", type=int)
+        client_id = ask(client_id, "ID du client", type=int)
         client = session.query(Client).filter_by(id=client_id).first()
         if not client:
-            click.echo("Client introuvable.")
+            output.message("Client introuvable.")
             return
 
         sales_contact_id = client.commercial_contact_id
 
-        amount = click.prompt("Montant", type=float)
-        already_payed_amount = click.prompt(
+        amount = ask(amount, "Montant", type=float)
+        already_payed_amount = ask(
+            paid_amount,
             "Si une partie du montant a déjà été réglé, merci de bien vouloir indiquer la somme ici :",
             type=float,
         )
-        signed = click.confirm("Contrat signé ?")
+        signed = ask_confirm(signed, "Contrat signé ?")
         signed_date = datetime.now() if signed else None
 
         contract = Contract(
@@ -80,172 +124,144 @@ def create_contract(token):
         session.add(contract)
         session.commit()
         logger.info(f"Contrat crée avec succès par l'utiisateur {user_id}")
-        click.echo("Contrat créé avec succès.")
+        output.row(_contract_record(contract), "Contrat créé avec succès.")
     except Exception as e:
         session.rollback()
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur lors de la création du contrat : {e}")
-
-
-@click.command("update-contract")
-@click.option("--token", prompt=True, help="Jeton d'authentification JWT")
+        capture_exception(e)
+        output.message(f"Erreur lors de la création du contrat : {e}")
+
+
+@click.command(
+    "update-contract",
+    short_help="Mise à jour d’un contrat existant si autorisé.",
+)
+@token_option
+@click.option("--contract-id", type=int, help="ID du contrat à modifier")
+@click.option("--amount", type=float, help="Nouveau montant total")
+@click.option("--remaining-amount", type=float, help="Nouveau montant restant")
+@output_option
 @check_permission(["commercial", "gestion"])
-def update_contract(token):
+@pass_auth
+def update_contract(auth, token, contract_id, amount, remaining_amount, output):
     """Mise à jour d’un contrat existant si autorisé."""
+    user_id = auth.user_id
+    session = auth.session
     try:
-        user_id = verify_token(token)
-        if not user_id:
-            logger.info(
-                "Tentative de mise à jour d'un contrat avec un token invalide ou expiré"
-            )
-            click.echo(INVALID_TOKEN_MESSAGE)
-            return
-
-        session = SessionLocal()
-        user = session.get(Collaborator, user_id)
-
-        contracts = session.query(Contract).all()
-        if not contracts:
-            click.echo("Aucun contrat disponible.")
-            return
-
-        for contract in contracts:
-            status = "Signé" if contract.signed else "Non signé"
-            click.echo(
-                f"{contract.id} - Client ID: {contract.client_id}, Montant: {contract.amount}, Statut: {status}"
-            )
-
-        contract_id = click.prompt("ID du contrat à modifier", type=int)
-        contract = session.query(Contract).get(contract_id)
-
-        if not contract:
-            click.echo("Contrat introuvable.")
-            return
-
-        if (
-            user.department.name == "commercial"
-            and contract.sales_contact_id != user.id
-        ):
-            click.echo("Vous n’êtes pas autorisé à modifier ce contrat.")
-            return
-
-        contract.amount = click.prompt(
-            "Montant total", default=contract.amount, type=float
-        )
-        contract.remaining_amount = click.prompt(
-            "Montant restant", default=contract.remaining_amount, type=float
+        if contract_id is None:
+            contracts = session.query(*LIST_COLUMNS).order_by(Contract.id).all()
+            if not contracts:
+                output.message("Aucun contrat disponible.")
+                return
+
+            for contract in contracts:
+                status = "Signé" if contract.signed else "Non signé"
+                output.message(
+                    f"{contract.id} - Client ID: {contract.client_id}, Montant: {contract.amount}, Statut: {status}"
+                )
+
+        contract_id = ask(contract_id, "ID du contrat à modifier", type=int)
+        contract = rules.contract_to_update(auth, contract_id)
+
+        amount = ask(amount, "Montant total", default=contract.amount, type=float)
+        remaining_amount = ask(
+            remaining_amount,
+            "Montant restant",
+            default=contract.remaining_amount,
+            type=float,
         )
+        contract = rules.update_contract(auth, contract_id, amount, remaining_amount)
 
         session.commit()
         logger.info(
             f"Contrat {contract_id} mis à jour avec succès par l'utiisateur {user_id}"
         )
-        click.echo("Contrat mis à jour avec succès")
+        output.row(_contract_record(contract), "Contrat mis à jour avec succès")
 
+    except OperationError as e:
+        output.message(str(e))
     except Exception as e:
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur lors de la mise à jour du contrat : {e}")
-
-    finally:
-        session.close()
-
-
-@click.command("filter-contracts")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
+        capture_exception(e)
+        output.message(f"Erreur lors de la mise à jour du contrat : {e}")
+
+
+@click.command(
+    "filter-contracts",
+    short_help="Affiche les contrats filtrés (non signés ou non payés)",
+)
+@token_option
+@click.option(
+    "--choice", "choix", type=click.IntRange(1, 3), help="Filtre prédéfini (1, 2 ou 3)"
+)
+@output_option
 @check_permission(["commercial", "gestion"])
-def filter_contracts(token):
+@pass_auth
+def filter_contracts(auth, token, choix, output):
     """Affiche les contrats filtrés (non signés ou non payés)"""
-    user_id = verify_token(token)
-    if not user_id:
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
+    if choix is None:
+        output.message("\n📋 Critères de filtrage disponibles :")
+        output.message("1 - Contrats non signés")
+        output.message("2 - Contrats avec montant restant à payer")
+        output.message("3 - Les deux")
 
-    click.echo("\n📋 Critères de filtrage disponibles :")
-    click.echo("1 - Contrats non signés")
-    click.echo("2 - Contrats avec montant restant à payer")
-    click.echo("3 - Les deux")
+    choix = ask(choix, "Sélectionnez un filtre (1, 2 ou 3)", type=int)
 
-    choix = click.prompt("Sélectionnez un filtre (1, 2 ou 3)", type=int)
-
-    session = SessionLocal()
+    session = auth.session
     try:
-        query = session.query(Contract)
-
-        if choix == 1:
-            contracts = query.filter(Contract.signed.is_(False)).all()
-        elif choix == 2:
-            contracts = query.filter(Contract.remaining_amount > 0).all()
-        elif choix == 3:
-            contracts = query.filter(
-                (Contract.signed.is_(False)) | (Contract.remaining_amount > 0)
-            ).all()
-        else:
-            click.echo("Choix invalide.")
+        if choix not in PRESET_FILTERS:
+            output.message("Choix invalide.")
             return
 
+        contracts = (
+            session.query(*LIST_COLUMNS)
+            .filter(parse_where(PRESET_FILTERS[choix], FILTER_FIELDS))
+            .order_by(Contract.id)
+            .all()
+        )
+
         if not contracts:
-            click.echo("Aucun contrat correspondant au filtre.")
+            output.message("Aucun contrat correspondant au filtre.")
             return
 
-        click.echo("\n📄 Contrats filtrés :")
+        output.message("\n📄 Contrats filtrés :")
         for c in contracts:
-            click.echo(
-                f"[{c.id}] Client ID: {c.client_id} | Montant: {c.total_amount} € | Restant: {c.remaining_amount} € | Signé: {'Oui' if c.signed else 'Non'}"
+            output.row(
+                record(c),
+                f"[{c.id}] Client ID: {c.client_id} | Montant: {c.amount} € | Restant: {c.remaining_amount} € | Signé: {'Oui' if c.signed else 'Non'}",
             )
 
     except Exception as e:
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur lors du filtrage : {e}")
-    finally:
-        session.close()
+        capture_exception(e)
+        output.message(f"Erreur lors du filtrage : {e}")
 
 
 @click.command("sign-contracts")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
+@token_option
+@click.option("--contract-id", type=int, help="ID du contrat à signer")
+@click.option("--yes", "confirmed", flag_value=True, default=None, help="Signe sans confirmation")
+@output_option
 @check_permission(["commercial", "gestion"])
-def sign_contract(token):
-    user_id = verify_token(token)
-    if not user_id:
-        click.echo(INVALID_TOKEN_MESSAGE)
-        logger.info(
-            "Tentative de signature de contrat avec un token expiré ou invalide"
-        )
-        return
-
+@pass_auth
+def sign_contract(auth, token, contract_id, confirmed, output):
+    """Signe un contrat."""
+    user_id = auth.user_id
+    session = auth.session
     try:
-        session = SessionLocal()
-        user = session.get(Collaborator, user_id)
-
-        contract_id = click.prompt("ID du contrat à modifier", type=int)
-        contract = session.query(Contract).get(contract_id)
+        contract_id = ask(contract_id, "ID du contrat à modifier", type=int)
+        contract = rules.contract_to_sign(auth, contract_id)
 
-        if user.department_id == 2 and contract.sales_contact_id != user_id:
-            click.echo(
-                "Vous n'êtes pas autorisé à signer le contrat d'un autre commercial"
-            )
+        if ask_confirm(
+            confirmed,
+            "Souhaitez vous modifier le statut du contrat ?",
+            default=contract.signed,
+        ):
+            contract = rules.sign_contract(auth, contract_id)
+            session.commit()
             logger.info(
-                "Tentative de signature de contrat par un utilisateur non autorisé"
+                f"Contrat {contract_id} signé avec succès par l'utiisateur {user_id}"
             )
-            return
-
-        if contract.signed is True:
-            click.echo("Ce contrat est déjà signé")
-            return
-
-        contract.signed = click.confirm(
-            "Souhaitez vous modifier le statut du contrat ?", default=contract.signed
-        )
-
-        if contract.signed is True:
-            contract.signed_date = datetime.now()
-
-        session.commit()
-        logger.info(
-            f"Contrat {contract_id} signé avec succès par l'utiisateur {user_id}"
-        )
+        output.row(_contract_record(contract))
 
+    except OperationError as e:
+        output.message(str(e))
     except Exception as e:
-        sentry_sdk.capture_exception(e)
-
-    finally:
-        session.close()
+        capture_exception(e)
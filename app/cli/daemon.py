@@ -0,0 +1,306 @@
+import getpass
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import click
+from app.cli.daemon_client import (
+    FORWARDED_ENV,
+    peer_uid,
+    private_directory,
+    receive_message,
+    send_message,
+    socket_path,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def warm_up():
+    """
+    Prépare tout ce qu'une commande paie d'ordinaire à chaque lancement :
+    modules des commandes, configuration des mappers, clés de chiffrement,
+    Sentry et une première connexion du pool.
+    """
+    from sqlalchemy.orm import configure_mappers
+    from app.cli.lazy import load_command
+    from app.cli.main import COMMANDS
+    from app.db.session import get_engine
+    from app.logging.sentry import init_sentry
+    from app.security import crypto
+
+    for path, _ in COMMANDS.values():
+        load_command(path)
+    configure_mappers()
+    crypto._keyring()
+    crypto._blind_index_hmac()
+    init_sentry()
+    try:
+        with get_engine().connect():
+            pass
+    except Exception as e:
+        click.echo(f"Base de données injoignable pour l'instant : {e}", err=True)
+
+
+def warm_permissions():
+    """
+    Remplit le cache des versions de jeton dans le démon lui-même : les
+    processus fils en héritent au fork. Retourne l'instant où il expire.
+    """
+    from app.auth.permissions import warm_token_versions
+    from app.db.session import session_scope
+
+    try:
+        with session_scope() as session:
+            return warm_token_versions(session)
+    except Exception as e:
+        logger.info(f"Cache des permissions non chargé : {e}")
+        return time.monotonic() + 5
+
+
+def _getpass(prompt="Password: ", stream=None):
+    """
+    `getpass.getpass` sur le terminal du client : le démon n'a pas de
+    terminal de contrôle, l'écho est coupé directement sur le stdin reçu.
+    """
+    fd = sys.stdin.fileno()
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    if not os.isatty(fd):
+        line = sys.stdin.readline()
+    else:
+        import termios
+
+        old = termios.tcgetattr(fd)
+        new = list(old)
+        new[3] &= ~termios.ECHO
+        termios.tcsetattr(fd, termios.TCSAFLUSH, new)
+        try:
+            line = sys.stdin.readline()
+        finally:
+            termios.tcsetattr(fd, termios.TCSAFLUSH, old)
+            sys.stdout.write("\n")
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
+
+def adopt_client(request, fds):
+    """
+    Dans le processus fils : prend le terminal, les variables transmises
+    (FORWARDED_ENV) et le répertoire courant du client. Les descripteurs reçus remplacent 0, 1 et 2,
+    si bien que tout ce qui écrit sur stdout/stderr (click, readline,
+    sous-processus) écrit directement chez le client.
+    """
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = open(0, "r", encoding="utf-8", errors="replace", closefd=False)
+    sys.stdout = open(1, "w", encoding="utf-8", errors="replace", closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", errors="replace", closefd=False)
+    # Seules les variables de FORWARDED_ENV viennent du client ; le reste de
+    # l'environnement (configuration, clés) est celui du démon
+    env = request.get("env", {})
+    for name in FORWARDED_ENV:
+        if name in env:
+            os.environ[name] = env[name]
+        else:
+            os.environ.pop(name, None)
+    os.chdir(request.get("cwd", "/"))
+    # Les connexions du pool appartiennent au démon : le fils ouvre les siennes
+    from app.db import session as db_session
+
+    if "engine" in vars(db_session):
+        db_session.engine.dispose(close=False)
+    getpass.getpass = _getpass
+
+
+def run_request(request):
+    """Exécute une commande transmise par le client. Retourne son code de sortie."""
+    from app.cli.main import cli
+
+    try:
+        cli.main(args=request["argv"], prog_name="epic")
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        sys.stderr.write(f"{e.code}\n")
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except OSError:
+                pass  # client parti (stdout fermé)
+
+
+def bind_socket(path):
+    """
+    Crée le socket d'écoute dans un dossier 0700 de l'utilisateur courant
+    (créé au besoin) ; un dossier partagé ou appartenant à un autre
+    utilisateur est refusé.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not private_directory(directory):
+        raise click.ClickException(
+            f"{directory} doit appartenir à l'utilisateur courant et être en mode 0700"
+        )
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)  # socket d'un démon arrêté
+        else:
+            raise click.ClickException(f"Un démon écoute déjà sur {path}")
+        finally:
+            probe.close()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    return server
+
+
+def handle_connection(conn):
+    """
+    Dans le processus fils : lit la requête, annonce son pid au client (qui
+    lui relaie Ctrl-C), exécute la commande et renvoie son code de sortie.
+    """
+    try:
+        request, fds = receive_message(conn, max_fds=3)
+    except (ConnectionError, ValueError, OSError):
+        return 1
+    if peer_uid(conn) != os.getuid() or len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        return 1
+    send_message(conn, {"pid": os.getpid()})
+    adopt_client(request, fds)
+    code = run_request(request)
+    try:
+        send_message(conn, {"exit": code})
+    except OSError:
+        pass
+    return code
+
+
+def _reap_children():
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def serve_forever(server, idle_timeout=None, should_stop=lambda: False):
+    """
+    Accepte les commandes sur `server` et exécute chacune dans un processus
+    fils (fork du démon déjà chaud) : une commande longue ou interactive ne
+    bloque pas les autres, et les globales du processus (flux, environnement,
+    répertoire courant) ne sont jamais partagées entre deux commandes. Le
+    cache des versions de jeton est tenu à jour dans le démon, avant chaque
+    fork, pour que les fils en héritent.
+    """
+    # Le délai d'attente sert aussi à récupérer régulièrement les fils terminés
+    server.settimeout(1)
+    idle_since = time.monotonic()
+    permissions_until = 0
+    while not should_stop():
+        _reap_children()
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            if idle_timeout and time.monotonic() - idle_since > idle_timeout:
+                return
+            continue
+        except InterruptedError:
+            continue
+        idle_since = time.monotonic()
+        # Le cache est rafraîchi dans le démon (les fils meurent avec le leur)
+        if idle_since >= permissions_until:
+            permissions_until = warm_permissions()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                server.close()
+                conn.settimeout(None)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                code = handle_connection(conn)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        conn.close()
+
+
+@click.command(
+    "serve",
+    short_help="Lance le démon qui exécute les commandes à chaud.",
+)
+@click.option(
+    "--socket",
+    "path",
+    default=None,
+    help="Chemin du socket Unix (EPIC_SOCKET, sinon $XDG_RUNTIME_DIR/epic/daemon.sock)",
+)
+@click.option(
+    "--idle-timeout",
+    type=int,
+    default=0,
+    help="Arrête le démon après ce nombre de secondes sans commande (0 : jamais)",
+)
+def serve(path, idle_timeout):
+    """
+    Lance le démon qui exécute les commandes à chaud.
+
+    Le démon garde chargés les modules, les mappers SQLAlchemy, le pool de
+    connexions, les clés de chiffrement et le cache des permissions. Tant
+    qu'il tourne, `python -m app.cli.main <commande>` lui transmet la
+    commande (avec le terminal, le jeton et le répertoire courant) au
+    lieu de démarrer un interpréteur complet ; sinon la commande s'exécute
+    sur place. Chaque commande s'exécute dans un processus fils du démon :
+    plusieurs commandes peuvent tourner en même temps. EPIC_NO_DAEMON=1 force
+    l'exécution sur place ; `shell` s'exécute toujours sur place. La
+    configuration (base, clés) est celle de l'environnement du démon : le
+    client n'envoie que les variables lues par les commandes (FORWARDED_ENV),
+    et seulement à un démon du même utilisateur, dans un dossier 0700.
+
+    Args:
+        path (str | None): Le chemin du socket.
+        idle_timeout (int): Arrêt automatique après inactivité (secondes).
+
+    Returns:
+        None
+    """
+    path = path or socket_path()
+    warm_up()
+    server = bind_socket(path)
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True) or server.close())
+    click.echo(f"Démon epic à l'écoute sur {path}", err=True)
+    logger.info(f"Démon epic démarré sur {path}")
+    try:
+        serve_forever(server, idle_timeout, should_stop=lambda: bool(stopping))
+    except (KeyboardInterrupt, OSError):
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
@@ -0,0 +1,188 @@
+"""
+Client léger du démon `serve` : transmet la ligne de commande, les quelques
+variables d'environnement lues par les commandes (FORWARDED_ENV), le
+répertoire courant et les descripteurs stdin / stdout / stderr du terminal au
+démon, qui exécute la commande à chaud.
+
+Le socket vit dans un dossier 0700 de l'utilisateur, et le client vérifie
+que le processus à l'écoute lui appartient avant de lui envoyer quoi que ce
+soit : jeton et terminal ne partent jamais chez un autre utilisateur.
+
+Ce module n'importe que la bibliothèque standard : quand le démon tourne, le
+processus `epic` n'importe ni click ni SQLAlchemy.
+"""
+
+import array
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+
+# Commandes toujours exécutées sur place (le shell a besoin de readline et du
+# terminal de ce processus)
+LOCAL_COMMANDS = ("serve", "shell")
+
+
+# Variables d'environnement transmises au démon : celles que les commandes
+# lisent à l'exécution. La configuration (base, clés, JWT_SECRET, Sentry)
+# reste celle du démon et n'est jamais envoyée.
+FORWARDED_ENV = (
+    "EPIC_TOKEN",
+    "EPIC_TOKEN_CACHE",
+    "EPIC_NEW_PASSWORD",
+    "DB_PROFILE",
+    "HOME",
+    "XDG_CONFIG_HOME",
+    "TERM",
+    "COLUMNS",
+    "LINES",
+    "LANG",
+    "LC_ALL",
+    "LC_CTYPE",
+)
+
+
+def socket_path():
+    """
+    Chemin du socket Unix du démon : EPIC_SOCKET, sinon `epic/daemon.sock`
+    dans $XDG_RUNTIME_DIR ou, à défaut, ~/.cache (jamais /tmp, partagé).
+    """
+    path = os.getenv("EPIC_SOCKET")
+    if path:
+        return path
+    runtime_dir = (
+        os.getenv("XDG_RUNTIME_DIR")
+        or os.getenv("XDG_CACHE_HOME")
+        or os.path.expanduser("~/.cache")
+    )
+    return os.path.join(runtime_dir, "epic", "daemon.sock")
+
+
+def private_directory(path):
+    """True si `path` est un dossier (pas un lien) de l'utilisateur, en 0700."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def _trusted_socket(path):
+    """Le socket et son dossier appartiennent à l'utilisateur courant."""
+    if not private_directory(os.path.dirname(os.path.abspath(path))):
+        return False
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def peer_uid(sock):
+    """
+    L'uid du processus à l'autre bout d'un socket Unix, ou None si la
+    plateforme ne permet pas de le connaître (la connexion est alors refusée).
+    """
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        return struct.unpack("3i", credentials)[1]
+    if hasattr(socket, "LOCAL_PEERCRED"):
+        # struct xucred (BSD, macOS) : version, uid, puis les groupes
+        credentials = sock.getsockopt(0, socket.LOCAL_PEERCRED, struct.calcsize("2Ih2x16I"))
+        return struct.unpack_from("2I", credentials)[1]
+    return None
+
+
+def send_message(sock, message, fds=()):
+    """Envoie un message JSON préfixé par sa longueur, avec des descripteurs."""
+    data = json.dumps(message).encode("utf-8")
+    payload = struct.pack("!I", len(data)) + data
+    if fds:
+        sock.sendmsg(
+            [payload], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+        )
+    else:
+        sock.sendall(payload)
+
+
+def receive_message(sock, max_fds=0):
+    """Lit un message de `send_message`. Retourne (message, descripteurs reçus)."""
+    if max_fds:
+        header, fds, _, _ = socket.recv_fds(sock, 4, max_fds)
+    else:
+        header, fds = sock.recv(4), []
+    if not header:
+        raise ConnectionError("Connexion fermée")
+    if len(header) < 4:
+        header += _receive_exactly(sock, 4 - len(header))
+    (length,) = struct.unpack("!I", header)
+    return json.loads(_receive_exactly(sock, length)), fds
+
+
+def _receive_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Connexion au démon interrompue")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def forward(argv):
+    """
+    Exécute `argv` via le démon s'il est joignable.
+
+    Returns:
+        int | None: Le code de sortie de la commande, ou None si elle doit
+        être exécutée dans ce processus (démon arrêté, EPIC_NO_DAEMON,
+        commande locale, socket ou démon n'appartenant pas à l'utilisateur).
+    """
+    if os.getenv("EPIC_NO_DAEMON") or (argv and argv[0] in LOCAL_COMMANDS):
+        return None
+    path = socket_path()
+    if not _trusted_socket(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        if peer_uid(sock) != os.getuid():
+            raise OSError("Démon d'un autre utilisateur")
+    except OSError:
+        sock.close()
+        return None
+
+    with sock:
+        for stream in (sys.stdout, sys.stderr):
+            stream.flush()
+        env = {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ}
+        send_message(
+            sock,
+            {"argv": list(argv), "env": env, "cwd": os.getcwd()},
+            fds=(0, 1, 2),
+        )
+        try:
+            # Le démon annonce d'abord le processus qui exécute la commande :
+            # Ctrl-C lui est relayé comme s'il tournait dans ce terminal
+            hello, _ = receive_message(sock)
+            pid = hello.get("pid")
+            if pid:
+                signal.signal(signal.SIGINT, lambda *_: _interrupt(pid))
+            reply, _ = receive_message(sock)
+        except (ConnectionError, ValueError):
+            print("Le démon epic a interrompu la commande.", file=sys.stderr)
+            return 1
+    return reply.get("exit", 1)
+
+
+def _interrupt(pid):
+    try:
+        os.kill(pid, signal.SIGINT)
+    except ProcessLookupError:
+        pass
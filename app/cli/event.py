@@ -1,114 +1,204 @@
 import click
 from datetime import datetime
-from app.auth.permissions import check_permission
-from app.cli.messages import INVALID_TOKEN_MESSAGE
+from sqlalchemy.orm import joinedload
+from app.auth.permissions import authenticated, check_permission, pass_auth
+from app.cli import rules
+from app.cli.filters import filter_options
+from app.cli.inputs import ask, token_option
+from app.cli.output import output_option, record
+from app.cli.pagination import iter_pages, pagination_options
+from app.cli.rules import OperationError
 from app.models.collaborator import Collaborator
 from app.models.department import Department
 from app.models.event import Event
 from app.models.contract import Contract
-import sentry_sdk
-from app.db.session import SessionLocal
-from app.auth.auth import verify_token
+from app.logging.sentry import capture_exception
 import logging
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Colonnes affichées par les listes d'événements (sans notes ni entités ORM)
+LIST_COLUMNS = (
+    Event.id,
+    Event.name,
+    Event.location,
+    Event.date_start,
+    Event.date_end,
+    Event.contract_id,
+)
+
+# Format des dates saisies (options et invites)
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Champs de --where / --sort
+FILTER_FIELDS = {
+    "id": Event.id,
+    "name": Event.name,
+    "location": Event.location,
+    "date_start": Event.date_start,
+    "date_end": Event.date_end,
+    "attendees": Event.attendees,
+    "contract_id": Event.contract_id,
+    "support_contact_id": Event.support_contact_id,
+}
+
+
+def _event_record(event):
+    """Les champs d'un événement pour `Output.row`."""
+    return {
+        "id": event.id,
+        "name": event.name,
+        "location": event.location,
+        "date_start": event.date_start,
+        "date_end": event.date_end,
+        "attendees": event.attendees,
+        "notes": event.notes,
+        "contract_id": event.contract_id,
+        "support_contact_id": event.support_contact_id,
+    }
+
 
 @click.command("list-events")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
-def list_events(token):
+@token_option
+@filter_options(FILTER_FIELDS)
+@pagination_options
+@output_option
+@authenticated
+@pass_auth
+def list_events(auth, token, where, sort, limit, after_id, page_size, stream, output):
     """
     Affiche la liste des événements.
 
-    Vérifie l'authentification avec le jeton JWT fourni, puis récupère et affiche
-    tous les événements disponibles.
+    Vérifie l'authentification avec le jeton JWT fourni, puis parcourt les
+    événements par pages (ou en flux) et les affiche au fur et à mesure.
     Pas besoin de check_permissions car tous les utilisateurs doivent pouvoir accéder
     à tous les évènements en lecture seule
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        where (ColumnElement | None): Filtre compilé depuis --where.
+        sort (tuple | None): Clé de tri compilée depuis --sort.
+        limit (int | None): Nombre maximal de événements affichés.
+        after_id (int | None): Reprend la liste après cet id.
+        page_size (int): Nombre de lignes lues par requête.
+        stream (bool): Lecture en flux plutôt que par pages.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    try:
-        verify_token(token)
-    except Exception as e:
-        click.echo(f"Erreur d’authentification : {str(e)}")
-        return
-
-    session = SessionLocal()
-    events = session.query(Event).all()
-
-    if not events:
-        click.echo("Aucun événement trouvé.")
-        return
-
-    for e in events:
-        click.echo(
-            f"{e.id} - {e.name} (Du {e.date_start} au {e.date_end}) à {e.location}"
-        )
-
-    session.close()
-
+    session = auth.session
+    query = session.query(*LIST_COLUMNS)
+    if where is not None:
+        query = query.filter(where)
+    found = False
+    for events in iter_pages(
+        query, Event.id, after_id, limit, page_size, stream, sort
+    ):
+        found = True
+        for e in events:
+            output.row(
+                record(e),
+                f"{e.id} - {e.name} (Du {e.date_start} au {e.date_end}) à {e.location}",
+            )
 
-@click.command("create-event")
-@click.option("--token", prompt=True, help="Jeton JWT d'authentification")
+    if not found:
+        output.message("Aucun événement trouvé.")
+
+
+@click.command(
+    "create-event",
+    short_help="Crée un événement en lien avec un contrat signé.",
+)
+@token_option
+@click.option("--contract-id", type=int, help="ID du contrat signé à lier")
+@click.option("--name", help="Nom de l’événement")
+@click.option("--location", help="Lieu")
+@click.option("--date-start", help="Début (YYYY-MM-DD HH:MM)")
+@click.option("--date-end", help="Fin (YYYY-MM-DD HH:MM)")
+@click.option("--attendees", type=int, help="Nombre de participants")
+@click.option("--notes", help="Notes")
+@output_option
 @check_permission(["commercial"])
-def create_event(token):
+@pass_auth
+def create_event(
+    auth, token, contract_id, name, location, date_start, date_end, attendees, notes, output
+):
     """
     Crée un événement en lien avec un contrat signé.
 
     Vérifie le jeton JWT pour l'authentification, récupère les contrats signés
     disponibles, et permet de créer un événement en les associant à un contrat.
+    Avec --contract-id, la liste des contrats disponibles n'est pas lue ; les
+    champs non passés en option sont demandés interactivement.
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        contract_id (int | None): Le contrat signé à lier.
+        name, location, date_start, date_end, notes (str | None): Les champs
+            de l'événement, dates au format YYYY-MM-DD HH:MM.
+        attendees (int | None): Le nombre de participants.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
-    user_id = verify_token(token)
-    session = SessionLocal()
+    user_id = auth.user_id
+    session = auth.session
+
+    if contract_id is None:
+        contracts = (
+            session.query(Contract.id, Contract.client_id, Contract.amount)
+            .filter(Contract.signed.is_(True), ~Contract.event.has())
+            .order_by(Contract.id)
+            .all()
+        )
 
-    contracts = (
-        session.query(Contract)
-        .filter(Contract.signed is True, Contract.event is None)
-        .all()
-    )
+        if not contracts:
+            output.message("Aucun contrat signé disponible.")
+            return
 
-    if not contracts:
-        click.echo("Aucun contrat signé disponible.")
-        return
+        output.message("Contrats signés disponibles :")
+        for contract in contracts:
+            output.message(
+                f"{contract.id} - Client ID: {contract.client_id}, Montant: {contract.amount}"
+            )
 
-    click.echo("Contrats signés disponibles :")
-    for contract in contracts:
-        click.echo(
-            f"{contract.id} - Client ID: {contract.client_id}, Montant: {contract.amount}"
-        )
+    contract_id = ask(contract_id, "ID du contrat à lier à l’événement", type=int)
+
+    # Le client et l'éventuel événement sont chargés avec le contrat (une seule requête)
+    contract = session.get(
+        Contract,
+        contract_id,
+        options=[joinedload(Contract.client), joinedload(Contract.event)],
+    )
+    if not contract or not contract.signed or contract.event is not None:
+        output.message("Contrat introuvable ou déjà lié à un événement.")
+        return
 
-    contract_id = click.prompt("ID du contrat à lier à l’événement", type=int)
     if contract.client.commercial_contact_id != user_id:
-        click.echo("Vous n’êtes pas autorisé à créer un événement pour ce contrat.")
+        output.message("Vous n’êtes pas autorisé à créer un événement pour ce contrat.")
         return
 
-    name = click.prompt("Nom de l’événement")
-    location = click.prompt("Lieu")
+    name = ask(name, "Nom de l’événement")
+    location = ask(location, "Lieu")
 
-    date_start_str = click.prompt("Date et heure de début (YYYY-MM-DD HH:MM)")
-    date_end_str = click.prompt("Date et heure de fin (YYYY-MM-DD HH:MM)")
+    date_start_str = ask(date_start, "Date et heure de début (YYYY-MM-DD HH:MM)")
+    date_end_str = ask(date_end, "Date et heure de fin (YYYY-MM-DD HH:MM)")
 
     try:
-        date_start = datetime.strptime(date_start_str, "%Y-%m-%d %H:%M")
-        date_end = datetime.strptime(date_end_str, "%Y-%m-%d %H:%M")
+        date_start = datetime.strptime(date_start_str, DATE_FORMAT)
+        date_end = datetime.strptime(date_end_str, DATE_FORMAT)
     except ValueError:
-        click.echo("Format de date invalide. Utilise YYYY-MM-DD HH:MM.")
+        output.message("Format de date invalide. Utilise YYYY-MM-DD HH:MM.")
         return
 
-    attendees = click.prompt("Nombre de participants", type=int)
-    notes = click.prompt("Notes", default="")
+    attendees = ask(attendees, "Nombre de participants", type=int)
+    notes = ask(notes, "Notes", default="")
 
     event = Event(
         name=name,
@@ -123,60 +213,86 @@ def create_event(token):
     session.add(event)
     session.commit()
     logger.info(f"Evènement {event.name} crée avec succès par l'utiisateur {user_id}")
-    click.echo("Événement créé avec succès.")
-
-
-@click.command("update-event")
-@click.option("--token", prompt=True, help="Token JWT")
+    output.row(_event_record(event), "Événement créé avec succès.")
+
+
+@click.command(
+    "update-event",
+    short_help="Met à jour un événement pour les utilisateurs support ou gestion.",
+)
+@token_option
+@click.option("--event-id", type=int, help="ID de l’événement à modifier")
+@click.option("--name", help="Nouveau nom")
+@click.option("--location", help="Nouvel emplacement")
+@click.option("--date-start", help="Nouveau début (YYYY-MM-DD HH:MM)")
+@click.option("--date-end", help="Nouvelle fin (YYYY-MM-DD HH:MM)")
+@click.option("--attendees", type=int, help="Nouveau nombre de participants")
+@click.option("--notes", help="Nouvelles notes")
+@click.option("--support-id", type=int, help="Collaborateur support (gestion uniquement)")
+@output_option
 @check_permission(["support", "gestion"])
-def update_event(token):
+@pass_auth
+def update_event(
+    auth,
+    token,
+    event_id,
+    name,
+    location,
+    date_start,
+    date_end,
+    attendees,
+    notes,
+    support_id,
+    output,
+):
     """
     Met à jour un événement pour les utilisateurs support ou gestion.
 
     Vérifie l'authentification avec le jeton JWT et permet aux utilisateurs
     des départements "support" ou "gestion" de mettre à jour un événement
-    existant.
+    existant. Avec --event-id, la liste des événements n'est pas lue ; les
+    champs non passés en option sont demandés (valeur actuelle par défaut).
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        event_id (int | None): L'événement à modifier.
+        name, location, date_start, date_end, notes (str | None): Les
+            nouvelles valeurs, dates au format YYYY-MM-DD HH:MM.
+        attendees (int | None): Le nouveau nombre de participants.
+        support_id (int | None): Le support assigné (gestion uniquement).
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative de mise à jour d'un évènement avec un token invalide ou expiré"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    user_id = auth.user_id
+    session = auth.session
     try:
-        user = session.get(Collaborator, user_id)
-
-        if not user:
-            click.echo("Utilisateur introuvable.")
-            return
-
-        if user.department_id == 1:
-            events = session.query(Event).filter_by(support_contact_id=user_id).all()
-        else:
-            events = session.query(Event).all()
-
-        if not events:
-            click.echo("Aucun événement disponible à modifier.")
-            return
-
-        click.echo("\n📋Événements disponibles :")
-        for e in events:
-            click.echo(
-                f"[{e.id}] {e.name} | Début : {e.date_start} | Lieu : {e.location}"
-            )
-
-        event_id = click.prompt("ID de l’événement à modifier", type=int)
-
-        if user.department.name.lower() == "support":
+        if event_id is None:
+            if auth.department == "support":
+                events = (
+                    session.query(*LIST_COLUMNS)
+                    .filter(Event.support_contact_id == user_id)
+                    .order_by(Event.id)
+                    .all()
+                )
+            else:
+                events = session.query(*LIST_COLUMNS).order_by(Event.id).all()
+
+            if not events:
+                output.message("Aucun événement disponible à modifier.")
+                return
+
+            output.message("\n📋Événements disponibles :")
+            for e in events:
+                output.message(
+                    f"[{e.id}] {e.name} | Début : {e.date_start} | Lieu : {e.location}"
+                )
+
+        event_id = ask(event_id, "ID de l’événement à modifier", type=int)
+
+        if auth.department == "support":
             event = (
                 session.query(Event)
                 .filter_by(id=event_id, support_contact_id=user_id)
@@ -186,35 +302,38 @@ def update_event(token):
             event = session.query(Event).filter_by(id=event_id).first()
 
         if not event:
-            click.echo("Événement introuvable ou accès non autorisé.")
+            output.message("Événement introuvable ou accès non autorisé.")
             return
 
-        event.name = click.prompt("Nom", default=event.name)
-        event.location = click.prompt("Emplacement", default=event.location)
+        event.name = ask(name, "Nom", default=event.name)
+        event.location = ask(location, "Emplacement", default=event.location)
 
         try:
-            date_start_str = click.prompt(
+            date_start_str = ask(
+                date_start,
                 "Date de début (YYYY-MM-DD HH:MM)",
-                default=event.date_start.strftime("%Y-%m-%d %H:%M"),
+                default=event.date_start.strftime(DATE_FORMAT),
             )
-            event.date_start = datetime.strptime(date_start_str, "%Y-%m-%d %H:%M")
+            event.date_start = datetime.strptime(date_start_str, DATE_FORMAT)
 
-            date_end_str = click.prompt(
+            date_end_str = ask(
+                date_end,
                 "Date de fin (YYYY-MM-DD HH:MM)",
-                default=event.date_end.strftime("%Y-%m-%d %H:%M"),
+                default=event.date_end.strftime(DATE_FORMAT),
             )
-            event.date_end = datetime.strptime(date_end_str, "%Y-%m-%d %H:%M")
+            event.date_end = datetime.strptime(date_end_str, DATE_FORMAT)
 
         except ValueError:
-            click.echo(" Format de date invalide.")
+            output.message(" Format de date invalide.")
             return
 
-        event.attendees = click.prompt(
-            "Participants", type=int, default=event.attendees
+        event.attendees = ask(
+            attendees, "Participants", type=int, default=event.attendees
         )
-        event.notes = click.prompt("Notes", default=event.notes or "")
-        if user.department.name.lower() == "gestion":
-            event.support_contact_id = click.prompt(
+        event.notes = ask(notes, "Notes", default=event.notes or "")
+        if auth.department == "gestion":
+            event.support_contact_id = ask(
+                support_id,
                 "Veuillez renseigner l'identifiant du collaborateur support en charge de cet évènement",
                 type=int,
             )
@@ -223,20 +342,23 @@ def update_event(token):
         logger.info(
             f"Evenement {event.name} mis à jour avec succès par l'utilisateur {user_id}"
         )
-        click.echo("Événement mis à jour avec succès.")
+        output.row(_event_record(event), "Événement mis à jour avec succès.")
 
     except Exception as e:
         session.rollback()
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur : {e}")
-    finally:
-        session.close()
+        capture_exception(e)
+        output.message(f"Erreur : {e}")
 
 
-@click.command("list-unassigned-events")
-@click.option("--token", prompt=True, help="Jeton d’authentification JWT")
+@click.command(
+    "list-unassigned-events",
+    short_help="Liste les événements sans collaborateur support assigné.",
+)
+@token_option
+@output_option
 @check_permission(["gestion", "support"])
-def list_unassigned_events(token):
+@pass_auth
+def list_unassigned_events(auth, token, output):
     """
     Liste les événements sans collaborateur support assigné.
 
@@ -244,114 +366,121 @@ def list_unassigned_events(token):
     qui n'ont pas encore de support assigné.
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative de lister les évènements non assignés avec un token invalide ou expiré"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    session = auth.session
     try:
-        events = session.query(Event).filter(Event.support_contact_id.is_(None)).all()
+        events = (
+            session.query(*LIST_COLUMNS)
+            .filter(Event.support_contact_id.is_(None))
+            .order_by(Event.id)
+            .all()
+        )
 
         if not events:
-            click.echo("Tous les événements ont un support assigné.")
+            output.message("Tous les événements ont un support assigné.")
             return
 
-        click.echo("Événements sans support :")
+        output.message("Événements sans support :")
         for e in events:
-            click.echo(
-                f"[{e.id}] {e.name} | Client ID: {e.client_id} | Début: {e.event_date_start} | Lieu: {e.location}"
+            output.row(
+                record(e),
+                f"[{e.id}] {e.name} | Contrat ID: {e.contract_id} | Début: {e.date_start} | Lieu: {e.location}",
             )
     except Exception as e:
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur lors de la récupération des événements : {e}")
-    finally:
-        session.close()
-
-
-@click.command("assign-support-to-event")
-@click.option("--token", prompt=True, help="Token JWT")
+        capture_exception(e)
+        output.message(f"Erreur lors de la récupération des événements : {e}")
+
+
+@click.command(
+    "assign-support-to-event",
+    short_help="Assigne un collaborateur support à un événement.",
+)
+@token_option
+@click.option("--event-id", type=int, help="ID de l'événement à assigner")
+@click.option("--support-id", type=int, help="ID du collaborateur support")
+@output_option
 @check_permission(["gestion"])
-def assign_support_to_event(token):
+@pass_auth
+def assign_support_to_event(auth, token, event_id, support_id, output):
     """
     Assigne un collaborateur support à un événement.
 
     Permet à un utilisateur du département "gestion" d'assigner un collaborateur
-    support à un événement sans support assigné.
+    support à un événement sans support assigné. Les listes de choix ne sont
+    lues que pour les identifiants non passés en option.
 
     Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
         token (str): Le jeton JWT d'authentification.
+        event_id (int | None): L'événement à assigner.
+        support_id (int | None): Le collaborateur support.
+        output (Output): La sortie de la commande (--format).
 
     Returns:
         None
     """
 
-    user_id = verify_token(token)
-    if not user_id:
-        logger.info(
-            "Tentative d'assignation d'évènement avec un token invalide ou expiré"
-        )
-        click.echo(INVALID_TOKEN_MESSAGE)
-        return
-
-    session = SessionLocal()
+    session = auth.session
     try:
+        if event_id is None:
+            events = (
+                session.query(*LIST_COLUMNS)
+                .filter(Event.support_contact_id.is_(None))
+                .order_by(Event.id)
+                .all()
+            )
+            if not events:
+                output.message("Tous les événements ont déjà un support.")
+                return
+
+            output.message("\nÉvénements sans support :")
+            for e in events:
+                output.message(f"[{e.id}] {e.name} | {e.date_start} | Lieu : {e.location}")
+
+        event_id = ask(event_id, "\nID de l'événement à assigner", type=int)
+        rules.event_to_assign(auth, event_id)
+
+        if support_id is None:
+            supports = (
+                session.query(
+                    Collaborator.id,
+                    Collaborator.first_name,
+                    Collaborator.last_name,
+                    Collaborator.email,
+                )
+                .join(Collaborator.department)
+                .filter(Department.name.ilike("support"))
+                .all()
+            )
+            if not supports:
+                output.message("Aucun collaborateur support disponible.")
+                return
 
-        events = session.query(Event).filter(Event.support_contact_id.is_(None)).all()
-        if not events:
-            click.echo("Tous les événements ont déjà un support.")
-            return
-
-        click.echo("\nÉvénements sans support :")
-        for e in events:
-            click.echo(f"[{e.id}] {e.name} | {e.date_start} | Lieu : {e.location}")
-
-        event_id = click.prompt("\nID de l'événement à assigner", type=int)
-        event = session.query(Event).get(event_id)
-        if not event:
-            click.echo("Événement introuvable.")
-            return
-
-        supports = (
-            session.query(Collaborator)
-            .join(Collaborator.department)
-            .filter(Department.name.ilike("support"))
-            .all()
-        )
-        if not supports:
-            click.echo("Aucun collaborateur support disponible.")
-            return
-
-        click.echo("\nCollaborateurs support disponibles :")
-        for s in supports:
-            click.echo(f"[{s.id}] {s.first_name} {s.last_name} | {s.email}")
-
-        support_id = click.prompt("\nID du collaborateur support à assigner", type=int)
-        support_user = session.query(Collaborator).get(support_id)
-
-        if not support_user or support_user.department.name.lower() != "support":
-            click.echo("Collaborateur invalide ou non support.")
-            return
+            output.message("\nCollaborateurs support disponibles :")
+            for s in supports:
+                output.message(f"[{s.id}] {s.first_name} {s.last_name} | {s.email}")
 
-        event.support_contact_id = support_id
+        support_id = ask(support_id, "\nID du collaborateur support à assigner", type=int)
+        event = rules.assign_support_to_event(auth, event_id, support_id)
         session.commit()
         logger.info(
             f"Collaborateur support assigné avec succès à l'évènement {event_id}"
         )
-        click.echo("Collaborateur support assigné avec succès à l’événement.")
+        output.row(
+            _event_record(event),
+            "Collaborateur support assigné avec succès à l’événement.",
+        )
 
+    except OperationError as e:
+        output.message(str(e))
     except Exception as e:
         session.rollback()
-        sentry_sdk.capture_exception(e)
-        click.echo(f"Erreur : {e}")
-    finally:
-        session.close()
+        capture_exception(e)
+        output.message(f"Erreur : {e}")
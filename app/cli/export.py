@@ -0,0 +1,259 @@
+import csv
+import gzip
+import io
+import json
+import time
+
+import click
+from app.logging.sentry import capture_exception
+from app.auth.permissions import check_permission, pass_auth
+from app.cli import client as client_cli, contract as contract_cli, event as event_cli
+from app.cli.filters import FilterError, parse_where
+from app.cli.inputs import token_option
+from app.cli.pagination import iter_pages
+from app.models.client import Client, ENCRYPTED_FIELDS
+from app.models.contract import Contract
+from app.models.event import Event
+from app.security.crypto import decrypt_rows
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+EXPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_EXPORT_PAGE_SIZE = 2000
+
+
+class ExportSpec:
+    """
+    Une table ou jointure exportable : colonnes projetées (aucune entité ORM
+    chargée), colonne d'id servant d'ordre et de point de reprise, colonnes
+    chiffrées à déchiffrer et champs acceptés par --where.
+    """
+
+    def __init__(self, columns, id_column, encrypted=(), fields=None, joins=()):
+        self.columns = columns
+        self.id_column = id_column
+        self.encrypted = encrypted
+        self.fields = fields or {}
+        self.joins = joins
+
+    def query(self, session):
+        query = session.query(*self.columns)
+        for target in self.joins:
+            query = query.join(target)
+        return query
+
+
+_CONTRACT_COLUMNS = contract_cli.LIST_COLUMNS + (Contract.sales_contact_id,)
+_EVENT_COLUMNS = event_cli.LIST_COLUMNS + (
+    Event.attendees,
+    Event.notes,
+    Event.support_contact_id,
+)
+
+EXPORTS = {
+    "clients": ExportSpec(
+        (Client.id,)
+        + tuple(getattr(Client, field).label(field) for field in ENCRYPTED_FIELDS)
+        + (Client.commercial_contact_id,),
+        Client.id,
+        ENCRYPTED_FIELDS,
+        client_cli.FILTER_FIELDS,
+    ),
+    "contracts": ExportSpec(_CONTRACT_COLUMNS, Contract.id, (), contract_cli.FILTER_FIELDS),
+    "events": ExportSpec(_EVENT_COLUMNS, Event.id, (), event_cli.FILTER_FIELDS),
+    # Contrats avec la société et l'email (déchiffrés) de leur client
+    "contracts-clients": ExportSpec(
+        _CONTRACT_COLUMNS
+        + (
+            Client.company_name.label("client_company_name"),
+            Client.email.label("client_email"),
+        ),
+        Contract.id,
+        ("client_company_name", "client_email"),
+        contract_cli.FILTER_FIELDS,
+        joins=(Contract.client,),
+    ),
+    # Événements avec leur contrat et la société de leur client
+    "events-clients": ExportSpec(
+        _EVENT_COLUMNS
+        + (
+            Contract.client_id,
+            Client.company_name.label("client_company_name"),
+        ),
+        Event.id,
+        ("client_company_name",),
+        event_cli.FILTER_FIELDS,
+        joins=(Event.contract, Contract.client),
+    ),
+}
+
+
+class ExportWriter:
+    """
+    Écrit les lignes exportées en CSV ou NDJSON, compressées en gzip si
+    demandé, sur un fichier ou stdout (`-`). En ajout (reprise), l'en-tête
+    CSV n'est pas répété ; un fichier gzip reçoit un nouveau membre, ce qui
+    reste un gzip valide.
+    """
+
+    def __init__(self, path, fmt, compress=False, append=False):
+        self.format = fmt
+        self.rows = 0
+        if path == "-":
+            self._file = None
+            binary = click.get_binary_stream("stdout")
+        else:
+            self._file = binary = open(path, "ab" if append else "wb")
+        self._gzip = gzip.GzipFile(fileobj=binary, mode="wb") if compress else None
+        self._text = io.TextIOWrapper(self._gzip or binary, encoding="utf-8", newline="")
+        self._csv = None
+        self._header = not append
+
+    def write(self, row):
+        if self.format == "ndjson":
+            self._text.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        else:
+            if self._csv is None:
+                self._csv = csv.DictWriter(self._text, fieldnames=list(row))
+                if self._header:
+                    self._csv.writeheader()
+            self._csv.writerow(row)
+        self.rows += 1
+
+    def flush(self):
+        self._text.flush()
+
+    def close(self):
+        self._text.flush()
+        # Détache le flux texte pour ne pas fermer stdout
+        self._text.detach()
+        if self._gzip is not None:
+            self._gzip.close()
+        if self._file is not None:
+            self._file.close()
+        else:
+            click.get_binary_stream("stdout").flush()
+
+
+def _where_callback(ctx, param, value):
+    """Analyse --where avant l'exécution : une expression invalide est une erreur d'usage."""
+    if value is None or ctx.resilient_parsing:
+        return None
+    try:
+        return parse_where(value, EXPORTS[ctx.params["entity"]].fields)
+    except FilterError as e:
+        raise click.BadParameter(str(e))
+
+
+@click.command(
+    "export",
+    short_help="Exporte une table ou une jointure en CSV ou NDJSON.",
+)
+@token_option
+# Argument lu en premier : --where est analysé selon les champs de l'entité
+@click.argument("entity", type=click.Choice(sorted(EXPORTS)), is_eager=True)
+@click.option(
+    "--output",
+    "-o",
+    "path",
+    default="-",
+    show_default=True,
+    help="Fichier de destination (- pour stdout)",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(EXPORT_FORMATS),
+    default=None,
+    help="Format du fichier (déduit de l'extension, csv par défaut)",
+)
+@click.option("--gzip", "compress", is_flag=True, help="Compresse la sortie (implicite pour un fichier .gz)")
+@click.option(
+    "--where",
+    default=None,
+    callback=_where_callback,
+    help="Filtre en base, même syntaxe que les commandes list-*",
+)
+@click.option(
+    "--after-id",
+    type=int,
+    default=None,
+    help="Reprend l'export après cet id (dernier id affiché en cas d'interruption)",
+)
+@click.option("--append", is_flag=True, help="Ajoute au fichier existant (reprise, sans en-tête CSV)")
+@click.option(
+    "--page-size",
+    type=int,
+    default=DEFAULT_EXPORT_PAGE_SIZE,
+    show_default=True,
+    help="Nombre de lignes lues et déchiffrées à la fois",
+)
+@check_permission(["gestion"])
+@pass_auth
+def export(auth, token, entity, path, fmt, compress, where, after_id, append, page_size):
+    """
+    Exporte une table ou une jointure en CSV ou NDJSON.
+
+    Les lignes sont lues en flux sur un curseur serveur, par ordre d'id,
+    déchiffrées par paquets de --page-size sur plusieurs threads puis écrites
+    aussitôt : la mémoire utilisée ne dépend pas de la taille de la table.
+    En cas d'interruption, le dernier id écrit est affiché pour reprendre avec
+    --after-id (et --append vers le même fichier). Réservé au département
+    gestion : l'export déchiffre les données de tous les clients.
+
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+        entity (str): La table ou jointure exportée (voir EXPORTS).
+        path (str): Le fichier de destination, - pour stdout.
+        fmt (str | None): csv ou ndjson.
+        compress (bool): Compresser en gzip.
+        where (ColumnElement | None): Le filtre --where analysé.
+        after_id (int | None): Reprise après cet id.
+        append (bool): Ajouter au fichier existant.
+        page_size (int): Nombre de lignes par paquet.
+
+    Returns:
+        None
+    """
+    spec = EXPORTS[entity]
+    session = auth.session
+    name = path[:-3] if path.endswith(".gz") else path
+    compress = compress or path.endswith(".gz")
+    if fmt is None:
+        fmt = "ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv"
+
+    query = spec.query(session)
+    if where is not None:
+        query = query.filter(where)
+
+    started = time.monotonic()
+    writer = ExportWriter(path, fmt, compress, append)
+    last_id = after_id
+    failed = False
+    try:
+        for rows in iter_pages(query, spec.id_column, after_id, None, page_size, stream=True):
+            for row in decrypt_rows(rows, spec.encrypted):
+                writer.write(row._asdict())
+            writer.flush()
+            last_id = rows[-1].id
+            if path != "-":
+                click.echo(f"{writer.rows} lignes exportées (dernier id : {last_id})", err=True)
+
+        elapsed = time.monotonic() - started
+        logger.info(f"Export {entity} ({writer.rows} lignes) par l'utilisateur {auth.user_id}")
+        click.echo(f"Export {entity} terminé : {writer.rows} lignes en {elapsed:.1f} s.", err=True)
+    except Exception as e:
+        capture_exception(e)
+        click.echo(
+            f"Erreur lors de l'export : {e}. Reprendre avec --after-id {last_id or 0} --append",
+            err=True,
+        )
+        failed = True
+    finally:
+        writer.close()
+    if failed:
+        # Fichier incomplet : un script doit pouvoir le détecter
+        raise click.exceptions.Exit(1)
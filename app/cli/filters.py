@@ -0,0 +1,344 @@
+import re
+from datetime import date, datetime
+
+import click
+from sqlalchemy import and_, not_, or_
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from app.security.crypto import blind_index
+
+# Opérateurs de comparaison de --where
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "~")
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<op><=|>=|!=|=|<|>|~)
+      | (?P<punct>[(),])
+      | '(?P<squoted>(?:[^']|'')*)'
+      | "(?P<dquoted>(?:[^"]|"")*)"
+      | (?P<word>[^\s()<>=!~,'"]+)
+    )""",
+    re.VERBOSE,
+)
+
+_TRUE = ("true", "vrai", "oui", "yes", "1")
+_FALSE = ("false", "faux", "non", "no", "0")
+
+
+class FilterError(ValueError):
+    """Expression --where ou --sort invalide."""
+
+
+class BlindIndexField:
+    """
+    Champ chiffré comparé par égalité via son index aveugle (ex. Client.email
+    -> Client.email_bidx) : la valeur recherchée est hachée, jamais déchiffrée.
+    """
+
+    operators = ("=", "!=")
+
+    def __init__(self, bidx_column):
+        self.bidx_column = bidx_column
+
+    def compile(self, op, value):
+        if value is None:
+            return self.bidx_column.is_(None) if op == "=" else self.bidx_column.isnot(None)
+        if isinstance(value, list):
+            return _in(self.bidx_column, value, lambda v: blind_index(str(v)))
+        predicate = self.bidx_column == blind_index(str(value))
+        return predicate if op == "=" else not_(predicate)
+
+
+class RelatedField:
+    """Colonne d'une entité liée, filtrée par EXISTS (ex. département d'un collaborateur)."""
+
+    operators = OPERATORS
+
+    def __init__(self, relationship, column):
+        self.relationship = relationship
+        self.column = column
+
+    def compile(self, op, value):
+        return self.relationship.has(_compare(self.column, op, value))
+
+
+def _in(column, values, convert):
+    """`column IN (...)`, un `null` de la liste devenant `OR column IS NULL`."""
+    present = [convert(v) for v in values if v is not None]
+    if len(present) == len(values):
+        return column.in_(present)
+    if not present:
+        return column.is_(None)
+    return or_(column.in_(present), column.is_(None))
+
+
+def _coerce(column, raw):
+    """Convertit la valeur textuelle `raw` dans le type Python de `column`."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    try:
+        if python_type is bool:
+            if raw.lower() in _TRUE:
+                return True
+            if raw.lower() in _FALSE:
+                return False
+            raise ValueError(raw)
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type is date:
+            return date.fromisoformat(raw)
+        if python_type in (int, float):
+            return python_type(raw)
+    except ValueError:
+        raise FilterError(
+            f"Valeur invalide pour {column.key} : {raw!r} ({python_type.__name__} attendu)"
+        )
+    return raw
+
+
+def _compare(column, op, value):
+    """Compile `column <op> value` (valeur brute, liste pour IN, None pour NULL)."""
+    if value is None:
+        if op not in ("=", "!="):
+            raise FilterError(f"NULL ne se compare qu'avec = ou != ({column.key})")
+        return column.is_(None) if op == "=" else column.isnot(None)
+    if isinstance(value, list):
+        return _in(column, value, lambda v: _coerce(column, v))
+    if op == "~":
+        if not isinstance(_coerce(column, value), str):
+            raise FilterError(f"L'opérateur ~ ne s'applique qu'au texte ({column.key})")
+        escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return column.ilike(f"%{escaped}%", escape="\\")
+
+    value = _coerce(column, value)
+    if isinstance(value, bool):
+        # IS true / IS false : même prédicat que les index partiels
+        if op not in ("=", "!="):
+            raise FilterError(f"Un booléen ne se compare qu'avec = ou != ({column.key})")
+        return column.is_(value) if op == "=" else column.isnot(value)
+    return {
+        "=": column.__eq__,
+        "!=": column.__ne__,
+        "<": column.__lt__,
+        "<=": column.__le__,
+        ">": column.__gt__,
+        ">=": column.__ge__,
+    }[op](value)
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise FilterError(f"Caractère inattendu à la position {position} : {text[position:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "squoted":
+            kind, value = "string", value.replace("''", "'")
+        elif kind == "dquoted":
+            kind, value = "string", value.replace('""', '"')
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Analyseur descendant de la grammaire :
+
+        expr       := and_expr ("or" and_expr)*
+        and_expr   := not_expr ("and" not_expr)*
+        not_expr   := "not" not_expr | "(" expr ")" | comparison
+        comparison := champ op valeur
+                    | champ "is" ["not"] "null"
+                    | champ ["not"] "in" "(" valeur ("," valeur)* ")"
+    """
+
+    def __init__(self, text, fields):
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.fields = fields
+
+    def parse(self):
+        predicate = self._or()
+        if self.position < len(self.tokens):
+            raise FilterError(f"Élément inattendu : {self.tokens[self.position][1]!r}")
+        return predicate
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        if token[0] is None:
+            raise FilterError("Expression incomplète")
+        self.position += 1
+        return token
+
+    def _keyword(self, word):
+        kind, value = self._peek()
+        if kind == "word" and value.lower() == word:
+            self.position += 1
+            return True
+        return False
+
+    def _expect(self, kind, value=None):
+        token = self._next()
+        if token[0] != kind or (value is not None and token[1].lower() != value):
+            raise FilterError(f"{value or kind!r} attendu, {token[1]!r} trouvé")
+        return token[1]
+
+    def _or(self):
+        predicates = [self._and()]
+        while self._keyword("or"):
+            predicates.append(self._and())
+        return predicates[0] if len(predicates) == 1 else or_(*predicates)
+
+    def _and(self):
+        predicates = [self._not()]
+        while self._keyword("and"):
+            predicates.append(self._not())
+        return predicates[0] if len(predicates) == 1 else and_(*predicates)
+
+    def _not(self):
+        if self._keyword("not"):
+            return not_(self._not())
+        if self._peek() == ("punct", "("):
+            self.position += 1
+            predicate = self._or()
+            self._expect("punct", ")")
+            return predicate
+        return self._comparison()
+
+    def _value(self):
+        kind, value = self._next()
+        if kind == "string":
+            return value
+        if kind == "word":
+            return None if value.lower() == "null" else value
+        raise FilterError(f"Valeur attendue, {value!r} trouvé")
+
+    def _comparison(self):
+        name = self._expect("word")
+        field = self.fields.get(name)
+        if field is None:
+            raise FilterError(f"Champ inconnu : {name!r} (champs : {', '.join(self.fields)})")
+
+        if self._keyword("is"):
+            op = "!=" if self._keyword("not") else "="
+            self._expect("word", "null")
+            value = None
+        else:
+            negate = self._keyword("not")
+            if self._keyword("in"):
+                self._expect("punct", "(")
+                value = [self._value()]
+                while self._peek() == ("punct", ","):
+                    self.position += 1
+                    value.append(self._value())
+                self._expect("punct", ")")
+                op = "="
+            elif negate:
+                raise FilterError(f"'in' attendu après 'not' ({name})")
+            else:
+                op = self._expect("op")
+                value = self._value()
+            if negate:
+                return not_(self._compile(name, field, op, value))
+        return self._compile(name, field, op, value)
+
+    def _compile(self, name, field, op, value):
+        if isinstance(field, InstrumentedAttribute):
+            return _compare(field, op, value)
+        if op not in field.operators:
+            raise FilterError(f"Opérateur {op} non disponible pour {name}")
+        return field.compile(op, value)
+
+
+def parse_where(text, fields):
+    """
+    Compile une expression de filtre en prédicat SQLAlchemy.
+
+    Exemple : `remaining_amount>0 and (signed=false or client_id in (3, 4))`.
+    Les valeurs sont converties dans le type de la colonne ; les textes
+    contenant des espaces s'écrivent entre guillemets, `~` cherche une
+    sous-chaîne sans tenir compte de la casse.
+
+    Args:
+        text (str): L'expression saisie par l'utilisateur.
+        fields (dict): Champs autorisés, nom -> colonne du modèle ou champ
+            spécial (`BlindIndexField`, `RelatedField`).
+
+    Returns:
+        ColumnElement: Le prédicat à passer à `Query.filter`.
+
+    Raises:
+        FilterError: Si l'expression est invalide.
+    """
+    return _Parser(text, fields).parse()
+
+
+def parse_sort(text, fields):
+    """
+    Analyse une clé de tri `champ` (croissant) ou `-champ` (décroissant).
+
+    Returns:
+        tuple: (colonne, décroissant) pour `iter_pages`.
+
+    Raises:
+        FilterError: Si le champ est inconnu ou ne peut pas être trié en base.
+    """
+    text = text.strip()
+    descending = text.startswith("-")
+    name = text.lstrip("-")
+    field = fields.get(name)
+    if not isinstance(field, InstrumentedAttribute):
+        sortable = [n for n, f in fields.items() if isinstance(f, InstrumentedAttribute)]
+        raise FilterError(f"Tri impossible sur {name!r} (champs : {', '.join(sortable)})")
+    return field, descending
+
+
+def filter_options(fields):
+    """
+    Ajoute à une commande list-* les options --where et --sort pour les
+    champs `fields`, analysées avant l'exécution de la commande (une
+    expression invalide est une erreur d'usage, sans accès à la base).
+    """
+
+    def where_callback(ctx, param, value):
+        if value is None:
+            return None
+        try:
+            return parse_where(value, fields)
+        except FilterError as e:
+            raise click.BadParameter(str(e))
+
+    def sort_callback(ctx, param, value):
+        if value is None:
+            return None
+        try:
+            return parse_sort(value, fields)
+        except FilterError as e:
+            raise click.BadParameter(str(e))
+
+    def decorator(f):
+        f = click.option(
+            "--sort",
+            default=None,
+            callback=sort_callback,
+            help="Tri en base : champ, ou -champ pour l'ordre décroissant",
+        )(f)
+        f = click.option(
+            "--where",
+            default=None,
+            callback=where_callback,
+            help=f"Filtre en base, ex. \"champ>valeur and champ=valeur\". Champs : {', '.join(fields)}",
+        )(f)
+        return f
+
+    return decorator
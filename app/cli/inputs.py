@@ -0,0 +1,46 @@
+import click
+
+
+def ask(value, text, **kwargs):
+    """
+    Retourne `value` si elle a été fournie en option, sinon la demande à
+    l'utilisateur (`click.prompt`). Les options permettent de piloter les
+    commandes depuis des scripts, l'invite ne sert que de repli.
+
+    `default` peut être une fonction : elle n'est appelée que si l'invite est
+    affichée (ex. valeur actuelle d'un champ chiffré, déchiffrée à la demande).
+    """
+    if value is not None:
+        return value
+    if callable(kwargs.get("default")):
+        kwargs["default"] = kwargs["default"]()
+    return click.prompt(text, **kwargs)
+
+
+def ask_confirm(value, text, default=False):
+    """Comme `ask`, pour une question oui/non (option --x/--no-x)."""
+    if value is not None:
+        return value
+    return click.confirm(text, default=default)
+
+
+def _resolve_token(ctx, param, value):
+    if value is None and not ctx.resilient_parsing:
+        from app.auth.token_cache import cached_access_token
+
+        value = cached_access_token() or click.prompt("Token", hide_input=True)
+    return value
+
+
+def token_option(f):
+    """
+    Ajoute l'option --token des commandes authentifiées. Le jeton vient, dans
+    l'ordre : de l'option, de la variable EPIC_TOKEN, du cache écrit par
+    `login` (renouvelé silencieusement s'il a expiré), sinon d'une invite.
+    """
+    return click.option(
+        "--token",
+        envvar="EPIC_TOKEN",
+        callback=_resolve_token,
+        help="Jeton JWT d'authentification (par défaut celui enregistré par login)",
+    )(f)
@@ -0,0 +1,45 @@
+import importlib
+
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    Groupe click dont les commandes sont importées à la demande.
+
+    `lazy_commands` associe chaque nom de commande à `("module:objet", aide
+    courte)` : seul le module de la commande exécutée est importé (modèles,
+    SQLAlchemy, bcrypt...), et `--help` liste les commandes à partir des aides
+    courtes sans rien importer.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, name):
+        if name in self.lazy_commands and name not in self.commands:
+            self.add_command(load_command(self.lazy_commands[name][0]), name)
+        return super().get_command(ctx, name)
+
+    def format_commands(self, ctx, formatter):
+        rows = []
+        for name in self.list_commands(ctx):
+            if name in self.lazy_commands and name not in self.commands:
+                rows.append((name, self.lazy_commands[name][1]))
+            else:
+                command = self.commands[name]
+                if not command.hidden:
+                    rows.append((name, command.get_short_help_str(formatter.width)))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+def load_command(path):
+    """Importe et retourne l'objet désigné par "module:objet"."""
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
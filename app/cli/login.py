@@ -0,0 +1,89 @@
+import click
+from sqlalchemy.orm import joinedload
+from app.auth import token_cache
+from app.auth.auth import verify_password, create_refresh_token, create_token
+from app.cli.output import output_option
+from app.db.session import session_scope
+from app.models.collaborator import Collaborator
+
+
+@click.command(
+    short_help="Authentifie un utilisateur et retourne un token JWT",
+)
+@click.option("--email", prompt=True)
+@click.option("--password", prompt=True, hide_input=True)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="N'enregistre pas les jetons dans le cache local",
+)
+@output_option
+def login(email, password, no_cache, output):
+    """Authentifie un utilisateur et retourne un token JWT"""
+    with session_scope() as session:
+        user = (
+            session.query(Collaborator)
+            .options(joinedload(Collaborator.department))
+            .filter_by(email=email)
+            .first()
+        )
+
+        if not user:
+            output.message("Utilisateur non trouvé.")
+            return
+
+        if not verify_password(password, user.password):
+            output.message("Mot de passe incorrect.")
+            return
+
+        department = user.department.name if user.department else None
+        token = create_token(user.id, department, user.token_version)
+        refresh_token = create_refresh_token(user.id, user.token_version)
+        user_id = user.id
+    if not no_cache:
+        path = token_cache.save(token, refresh_token, user_id)
+        output.message(f"Jetons enregistrés dans {path} : --token devient facultatif.")
+    output.row({"token": token}, f"Authentification réussie. Token :\n{token}")
+
+
+@click.command(
+    "refresh",
+    short_help="Renouvelle le token d'accès du cache sans mot de passe.",
+)
+@output_option
+def refresh(output):
+    """
+    Renouvelle le token d'accès du cache sans mot de passe.
+
+    Utilise le jeton de renouvellement enregistré par `login` : pas de
+    vérification bcrypt, une seule requête pour relire le département et la
+    version de jeton du collaborateur. Les commandes le font d'elles-mêmes
+    quand le token du cache a expiré ; cette commande sert aux scripts qui
+    veulent un token frais (EPIC_TOKEN).
+
+    Args:
+        output (Output): La sortie de la commande (--format).
+
+    Returns:
+        None
+    """
+    cache = token_cache.load()
+    if not cache or not cache.get("refresh_token"):
+        output.message("Aucun jeton enregistré : connectez-vous avec login.")
+        return
+    try:
+        token = token_cache.refresh_access_token(cache["refresh_token"])
+    except token_cache.RefreshError as e:
+        output.message(f"{e} Connectez-vous avec login.")
+        return
+    token_cache.save(token, cache["refresh_token"], cache.get("user_id"))
+    output.row({"token": token}, f"Token renouvelé :\n{token}")
+
+
+@click.command("logout")
+def logout():
+    """Supprime les jetons enregistrés par login."""
+    if token_cache.clear():
+        click.echo("Jetons supprimés.")
+    else:
+        click.echo("Aucun jeton enregistré.")
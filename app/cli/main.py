@@ -1,81 +1,129 @@
 import click
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from app.config import DATABASE_URL
-from app.models.collaborator import Collaborator
-from app.auth.auth import verify_password, create_token
-from app.cli.client import list_clients, create_client, update_client
-from app.cli.contract import (
-    list_contracts,
-    create_contract,
-    sign_contract,
-    update_contract,
-    filter_contracts,
-)
-from app.cli.event import (
-    assign_support_to_event,
-    list_events,
-    create_event,
-    update_event,
-    list_unassigned_events,
-)
-from app.cli.collaborator import (
-    create_collaborator,
-    update_collaborator,
-    delete_collaborator,
-    list_collaborators,
-)
-from app.logging.sentry import init_sentry
-
-init_sentry()
-
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+from app.cli.lazy import LazyGroup, load_command
 
+# Commandes de la CLI : nom -> ("module:objet", aide courte affichée par
+# --help). Le module d'une commande n'est importé que lorsqu'elle est exécutée.
+COMMANDS = {
+    "login": ("app.cli.login:login", "Authentifie un utilisateur et retourne un token JWT"),
+    "refresh": ("app.cli.login:refresh", "Renouvelle le token d'accès du cache sans mot de passe."),
+    "logout": ("app.cli.login:logout", "Supprime les jetons enregistrés par login."),
+    "list-clients": ("app.cli.client:list_clients", "Affiche la liste des clients."),
+    "search-clients": (
+        "app.cli.client:search_clients",
+        "Recherche des clients sur un champ chiffré (contient ou commence par).",
+    ),
+    "create-client": ("app.cli.client:create_client", "Crée un nouveau client."),
+    "update-client": (
+        "app.cli.client:update_client",
+        "Met à jour les informations d'un client existant.",
+    ),
+    "import-clients": (
+        "app.cli.bulk:import_clients",
+        "Importe des clients depuis un fichier CSV ou NDJSON (`-` pour stdin).",
+    ),
+    "upsert-clients": (
+        "app.cli.bulk:upsert_clients",
+        "Crée ou met à jour des clients depuis un fichier CSV ou NDJSON.",
+    ),
+    "export": ("app.cli.export:export", "Exporte une table ou une jointure en CSV ou NDJSON."),
+    "run-batch": (
+        "app.cli.batch:run_batch",
+        "Exécute un fichier d'opérations en une seule authentification.",
+    ),
+    "list-contracts": ("app.cli.contract:list_contracts", "Affiche la liste des contrats."),
+    "create-contract": ("app.cli.contract:create_contract", "Crée un contrat pour un client."),
+    "sign-contracts": ("app.cli.contract:sign_contract", "Signe un contrat."),
+    "filter-contracts": (
+        "app.cli.contract:filter_contracts",
+        "Affiche les contrats filtrés (non signés ou non payés)",
+    ),
+    "update-contract": (
+        "app.cli.contract:update_contract",
+        "Mise à jour d’un contrat existant si autorisé.",
+    ),
+    "list-events": ("app.cli.event:list_events", "Affiche la liste des événements."),
+    "list-unassigned-events": (
+        "app.cli.event:list_unassigned_events",
+        "Liste les événements sans collaborateur support assigné.",
+    ),
+    "create-event": (
+        "app.cli.event:create_event",
+        "Crée un événement en lien avec un contrat signé.",
+    ),
+    "update-event": (
+        "app.cli.event:update_event",
+        "Met à jour un événement pour les utilisateurs support ou gestion.",
+    ),
+    "assign-support-to-event": (
+        "app.cli.event:assign_support_to_event",
+        "Assigne un collaborateur support à un événement.",
+    ),
+    "create-collaborator": (
+        "app.cli.collaborator:create_collaborator",
+        "Crée un nouveau collaborateur.",
+    ),
+    "update-collaborator": (
+        "app.cli.collaborator:update_collaborator",
+        "Met à jour les informations d'un collaborateur existant.",
+    ),
+    "delete-collaborator": (
+        "app.cli.collaborator:delete_collaborator",
+        "Supprime un collaborateur.",
+    ),
+    "list-collaborators": (
+        "app.cli.collaborator:list_collaborators",
+        "Affiche la liste des collaborateurs (gestion uniquement)",
+    ),
+    "rotate-keys": (
+        "app.cli.security:rotate_keys",
+        "Rechiffre les données clients avec la clé principale.",
+    ),
+    "rebuild-search-index": (
+        "app.cli.security:rebuild_search_index",
+        "Reconstruit les jetons de recherche de tous les clients.",
+    ),
+    "shell": ("app.cli.shell:shell", "Ouvre un shell interactif authentifié."),
+    "serve": ("app.cli.daemon:serve", "Lance le démon qui exécute les commandes à chaud."),
+}
 
-@click.group()
-def cli():
-    pass
-
-
-cli.add_command(list_clients)
-cli.add_command(create_client)
-cli.add_command(list_contracts)
-cli.add_command(create_contract)
-cli.add_command(sign_contract)
-cli.add_command(filter_contracts)
-cli.add_command(list_events)
-cli.add_command(list_unassigned_events)
-cli.add_command(create_event)
-cli.add_command(update_event)
-cli.add_command(assign_support_to_event)
-cli.add_command(update_client)
-cli.add_command(update_contract)
-cli.add_command(create_collaborator)
-cli.add_command(update_collaborator)
-cli.add_command(delete_collaborator)
-cli.add_command(list_collaborators)
 
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option(
+    "--profile",
+    envvar="DB_PROFILE",
+    default=None,
+    metavar="stderr|FICHIER",
+    help="Mesure les requêtes SQL de la commande : résumé sur stderr ou "
+    "ligne JSON ajoutée au fichier indiqué",
+)
+@click.pass_context
+def cli(ctx, profile):
+    # Sentry et le moteur SQL ne sont initialisés qu'au premier usage
+    # (exception capturée, message journalisé, première session).
+    from app.logging.sentry import install_lazy_sentry
 
-@cli.command()
-@click.option("--email", prompt=True)
-@click.option("--password", prompt=True, hide_input=True)
-def login(email, password):
-    """Authentifie un utilisateur et retourne un token JWT"""
-    session = Session()
-    user = session.query(Collaborator).filter_by(email=email).first()
+    install_lazy_sentry()
+    if profile:
+        from app.db.profiling import profile_command
+        from app.db.session import engine
 
-    if not user:
-        click.echo("Utilisateur non trouvé.")
-        return
+        ctx.with_resource(profile_command(ctx.invoked_subcommand, profile, engine))
 
-    if not verify_password(password, user.password):
-        click.echo("Mot de passe incorrect.")
-        return
 
-    token = create_token(user.id)
-    click.echo(f"Authentification réussie. Token :\n{token}")
+def __getattr__(name):
+    """`from app.cli.main import login` : commandes importées à la demande."""
+    for path, _ in COMMANDS.values():
+        if path.rpartition(":")[2] == name:
+            return load_command(path)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
+    import sys
+    from app.cli.daemon_client import forward
+
+    # Démon `serve` joignable : il exécute la commande, sinon exécution sur place
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
     cli()
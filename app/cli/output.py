@@ -0,0 +1,93 @@
+import csv
+import json
+
+import click
+
+FORMATS = ("text", "json", "ndjson", "csv")
+
+
+class Output:
+    """
+    Sortie d'une commande, écrite ligne par ligne au fil de l'eau.
+
+    - text : les lignes lisibles historiques de la CLI ;
+    - json : un tableau JSON, ouvert à la première ligne et fermé en fin de
+      commande (jamais construit en mémoire) ;
+    - ndjson : un objet JSON par ligne ;
+    - csv : un en-tête (clés de la première ligne) puis une ligne par objet.
+
+    Dans les formats machine, les messages (succès, erreurs, invites de
+    sélection) vont sur stderr pour ne pas polluer les données de stdout.
+    """
+
+    def __init__(self, fmt="text"):
+        self.format = fmt
+        self.rows = 0
+        self._csv = None
+
+    @property
+    def is_text(self):
+        return self.format == "text"
+
+    def row(self, record, text=None):
+        """
+        Écrit un enregistrement.
+
+        Args:
+            record (dict): Les données de la ligne (formats machine).
+            text (str | None): La ligne affichée en format text.
+        """
+        if self.format == "text":
+            if text is not None:
+                click.echo(text)
+        elif self.format == "ndjson":
+            click.echo(_dumps(record))
+        elif self.format == "json":
+            click.echo(("[" if self.rows == 0 else ",") + _dumps(record))
+        else:
+            if self._csv is None:
+                self._csv = csv.DictWriter(
+                    click.get_text_stream("stdout"), fieldnames=list(record)
+                )
+                self._csv.writeheader()
+            self._csv.writerow(record)
+        self.rows += 1
+
+    def message(self, text):
+        """Affiche un message destiné à l'utilisateur (stderr hors format text)."""
+        click.echo(text, err=not self.is_text)
+
+    def close(self):
+        if self.format == "json":
+            click.echo("]" if self.rows else "[]")
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+
+def record(row, exclude=("sort_key",)):
+    """Convertit une ligne projetée (Row ou tuple nommé) en dict pour `Output.row`."""
+    return {k: v for k, v in row._asdict().items() if k not in exclude}
+
+
+def output_option(f):
+    """
+    Ajoute l'option --format à une commande. La commande reçoit un objet
+    `Output` (paramètre `output`), fermé automatiquement en fin de commande.
+    """
+
+    def callback(ctx, param, value):
+        output = Output(value)
+        ctx.call_on_close(output.close)
+        return output
+
+    return click.option(
+        "--format",
+        "output",
+        type=click.Choice(FORMATS),
+        default="text",
+        show_default=True,
+        callback=callback,
+        help="Format de sortie, écrit ligne par ligne",
+    )(f)
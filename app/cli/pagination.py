@@ -0,0 +1,122 @@
+from itertools import islice
+import click
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 500
+
+
+def pagination_options(f):
+    """
+    Ajoute aux commandes list-* les options de pagination par clé
+    (--limit, --after-id, --page-size) et le mode --stream.
+    """
+    options = [
+        click.option(
+            "--limit", type=int, default=None, help="Nombre maximal de lignes affichées"
+        ),
+        click.option(
+            "--after-id",
+            type=int,
+            default=None,
+            help="Ne liste que les lignes d'id strictement supérieur (reprise)",
+        ),
+        click.option(
+            "--page-size",
+            type=int,
+            default=DEFAULT_PAGE_SIZE,
+            show_default=True,
+            help="Nombre de lignes lues par requête",
+        ),
+        click.option(
+            "--stream",
+            is_flag=True,
+            help="Lecture en flux sur un curseur serveur plutôt que par pages",
+        ),
+    ]
+    for option in reversed(options):
+        f = option(f)
+    return f
+
+
+def _after(column, descending, id_column, last_value, last_id):
+    """
+    Prédicat « après la ligne (last_value, last_id) » pour un tri
+    (column ASC|DESC NULLS LAST, id ASC).
+    """
+    if last_value is None:
+        return and_(column.is_(None), id_column > last_id)
+    beyond = column < last_value if descending else column > last_value
+    return or_(
+        beyond,
+        and_(column == last_value, id_column > last_id),
+        column.is_(None),
+    )
+
+
+def iter_pages(
+    query,
+    id_column,
+    after_id=None,
+    limit=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    stream=False,
+    sort=None,
+):
+    """
+    Parcourt `query` par ordre d'id croissant (ou selon `sort`) et renvoie les
+    lignes par paquets d'au plus `page_size`, sans jamais charger toute la table.
+
+    - mode pages (défaut) : une requête `WHERE id > :dernier_id ORDER BY id
+      LIMIT :page_size` par paquet (pagination par clé) ;
+    - mode flux : une seule requête lue au fil de l'eau (`yield_per`, curseur
+      serveur sous PostgreSQL).
+
+    Avec `sort=(colonne, décroissant)` (voir `filters.parse_sort`), la clé de
+    pagination devient (colonne, id) : la colonne est ajoutée aux lignes sous
+    le nom `sort_key`, les valeurs NULL sont rendues en dernier.
+
+    Les objets déjà affichés ne sont plus référencés et peuvent être libérés :
+    la mémoire reste constante quelle que soit la taille de la table.
+    """
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    if sort is not None and sort[0] is id_column and not sort[1]:
+        sort = None
+    if sort is None:
+        query = query.order_by(id_column)
+    else:
+        column, descending = sort
+        direction = column.desc() if descending else column.asc()
+        query = query.add_columns(column.label("sort_key")).order_by(
+            direction.nulls_last(), id_column
+        )
+
+    if stream:
+        if limit is not None:
+            query = query.limit(limit)
+        rows = iter(query.yield_per(page_size))
+        while True:
+            page = list(islice(rows, page_size))
+            if not page:
+                return
+            yield page
+
+    remaining = limit
+    last = None
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        if last is None:
+            page_query = query
+        elif sort is None:
+            page_query = query.filter(id_column > last.id)
+        else:
+            page_query = query.filter(_after(*sort, id_column, last.sort_key, last.id))
+        page = page_query.limit(size).all()
+        if not page:
+            return
+        yield page
+        if len(page) < size:
+            return
+        last = page[-1]
+        if remaining is not None:
+            remaining -= len(page)
@@ -0,0 +1,138 @@
+"""
+Règles métier des commandes de contrats et d'événements, partagées par les
+commandes click (saisie interactive, options) et par `run-batch`.
+
+Les fonctions travaillent dans la session du contexte d'authentification,
+ne valident rien (commit à la charge de l'appelant) et signalent un refus par
+`OperationError`, dont le message est affiché tel quel.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.orm import joinedload
+
+from app.models.collaborator import Collaborator
+from app.models.contract import Contract
+from app.models.event import Event
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class OperationError(Exception):
+    """Opération refusée ou invalide : le message est rapporté à l'utilisateur."""
+
+
+def _owned_contract(auth, contract_id, message):
+    contract = auth.session.get(Contract, contract_id)
+    if contract is None:
+        raise OperationError("Contrat introuvable.")
+    if auth.department == "commercial" and contract.sales_contact_id != auth.user_id:
+        raise OperationError(message)
+    return contract
+
+
+def contract_to_update(auth, contract_id):
+    """
+    Le contrat que l'utilisateur peut modifier (un commercial : les siens).
+
+    Raises:
+        OperationError: Contrat introuvable ou d'un autre commercial.
+
+    Returns:
+        Contract: Le contrat.
+    """
+    return _owned_contract(
+        auth, contract_id, "Vous n’êtes pas autorisé à modifier ce contrat."
+    )
+
+
+def update_contract(auth, contract_id, amount=None, remaining_amount=None):
+    """
+    Met à jour les montants d'un contrat ; un montant None est inchangé.
+
+    Returns:
+        Contract: Le contrat modifié.
+    """
+    contract = contract_to_update(auth, contract_id)
+    if amount is not None:
+        contract.amount = amount
+    if remaining_amount is not None:
+        contract.remaining_amount = remaining_amount
+    return contract
+
+
+def contract_to_sign(auth, contract_id):
+    """
+    Le contrat que l'utilisateur peut signer (un commercial : les siens).
+
+    Raises:
+        OperationError: Contrat introuvable, d'un autre commercial ou déjà signé.
+
+    Returns:
+        Contract: Le contrat.
+    """
+    try:
+        contract = _owned_contract(
+            auth, contract_id, "Vous n'êtes pas autorisé à signer le contrat d'un autre commercial"
+        )
+    except OperationError:
+        logger.info("Tentative de signature de contrat par un utilisateur non autorisé")
+        raise
+    if contract.signed is True:
+        raise OperationError("Ce contrat est déjà signé")
+    return contract
+
+
+def sign_contract(auth, contract_id):
+    """
+    Signe un contrat et date la signature.
+
+    Returns:
+        Contract: Le contrat signé.
+    """
+    contract = contract_to_sign(auth, contract_id)
+    contract.signed = True
+    contract.signed_date = datetime.now()
+    return contract
+
+
+def event_to_assign(auth, event_id):
+    """
+    L'événement auquel assigner un support.
+
+    Raises:
+        OperationError: Événement introuvable.
+
+    Returns:
+        Event: L'événement.
+    """
+    event = auth.session.get(Event, event_id)
+    if event is None:
+        raise OperationError("Événement introuvable.")
+    return event
+
+
+def assign_support_to_event(auth, event_id, support_id):
+    """
+    Assigne un collaborateur du département support à un événement.
+
+    Raises:
+        OperationError: Événement introuvable, collaborateur absent ou non support.
+
+    Returns:
+        Event: L'événement modifié.
+    """
+    event = event_to_assign(auth, event_id)
+    support_user = auth.session.get(
+        Collaborator, support_id, options=[joinedload(Collaborator.department)]
+    )
+    if (
+        not support_user
+        or not support_user.department
+        or support_user.department.name.lower() != "support"
+    ):
+        raise OperationError("Collaborateur invalide ou non support.")
+    event.support_contact_id = support_id
+    return event
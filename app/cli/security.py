@@ -0,0 +1,209 @@
+import time
+from datetime import datetime
+import click
+from app.logging.sentry import capture_exception
+from sqlalchemy import delete, func, insert
+from app.auth.permissions import check_permission, pass_auth
+from app.cli.inputs import token_option
+from app.cli.output import output_option
+from app.models.client import Client, ENCRYPTED_FIELDS, SEARCH_INDEX_FIELDS
+from app.models.client_search_token import ClientSearchToken
+from app.models.key_rotation import KeyRotationCheckpoint
+from app.security.crypto import primary_key_version, reencrypt
+from app.security.search_index import rebuild_rows
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@click.command(
+    "rotate-keys",
+    short_help="Rechiffre les données clients avec la clé principale.",
+)
+@token_option
+@click.option("--batch-size", default=500, show_default=True, type=int)
+@click.option(
+    "--rows-per-second",
+    default=0,
+    type=int,
+    help="Débit maximal de clients traités par seconde (0 = illimité)",
+)
+@click.option("--restart", is_flag=True, help="Ignore le point de reprise existant")
+@output_option
+@check_permission(["gestion"])
+@pass_auth
+def rotate_keys(auth, token, batch_size, rows_per_second, restart, output):
+    """
+    Rechiffre les données clients avec la clé principale.
+
+    Les clients sont parcourus par lots ordonnés sur l'id (pagination par clé),
+    chaque lot étant verrouillé, rechiffré et validé dans sa propre courte
+    transaction avec la mise à jour du point de reprise. La commande peut donc
+    tourner en parallèle de l'usage normal de la CLI, être interrompue et
+    relancée.
+
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+        batch_size (int): Nombre de clients par transaction.
+        rows_per_second (int): Limite de débit, 0 pour aucune limite.
+        restart (bool): Recommence depuis le premier client.
+        output (Output): La sortie de la commande (--format).
+
+    Returns:
+        None
+    """
+
+    user_id = auth.user_id
+    session = auth.session
+    try:
+        key_version = primary_key_version()
+        checkpoint = (
+            session.query(KeyRotationCheckpoint)
+            .filter_by(key_version=key_version)
+            .first()
+        )
+        if checkpoint is None:
+            checkpoint = KeyRotationCheckpoint(key_version=key_version)
+            session.add(checkpoint)
+        elif restart:
+            checkpoint.last_client_id = 0
+            checkpoint.rows_scanned = 0
+            checkpoint.rows_rotated = 0
+            checkpoint.started_at = datetime.now()
+            checkpoint.finished_at = None
+        elif checkpoint.finished_at:
+            output.message(f"Rotation vers la clé {key_version} déjà terminée.")
+            return
+        session.commit()
+
+        total = checkpoint.rows_scanned + session.query(func.count(Client.id)).filter(
+            Client.id > checkpoint.last_client_id
+        ).scalar()
+        output.message(
+            f"Rotation vers la clé {key_version} : reprise après le client "
+            f"{checkpoint.last_client_id} ({checkpoint.rows_scanned}/{total})"
+        )
+
+        while True:
+            batch_started = time.monotonic()
+            clients = (
+                session.query(Client)
+                .filter(Client.id > checkpoint.last_client_id)
+                .order_by(Client.id)
+                .limit(batch_size)
+                .with_for_update()
+                .all()
+            )
+            if not clients:
+                break
+
+            rotated = 0
+            for client in clients:
+                changed = False
+                for field in ENCRYPTED_FIELDS:
+                    column_attr = f"_{field}"
+                    value = getattr(client, column_attr)
+                    new_value = reencrypt(value)
+                    if new_value is not value:
+                        setattr(client, column_attr, new_value)
+                        changed = True
+                rotated += changed
+
+            checkpoint.last_client_id = clients[-1].id
+            checkpoint.rows_scanned += len(clients)
+            checkpoint.rows_rotated += rotated
+            session.commit()
+
+            output.message(
+                f"{checkpoint.rows_scanned}/{total} clients parcourus, "
+                f"{checkpoint.rows_rotated} rechiffrés (dernier id : {checkpoint.last_client_id})"
+            )
+
+            if rows_per_second:
+                delay = len(clients) / rows_per_second - (time.monotonic() - batch_started)
+                if delay > 0:
+                    time.sleep(delay)
+
+        checkpoint.finished_at = datetime.now()
+        session.commit()
+        logger.info(
+            f"Rotation vers la clé {key_version} terminée par l'utilisateur {user_id}"
+        )
+        output.row(
+            {
+                "key_version": key_version,
+                "rows_scanned": checkpoint.rows_scanned,
+                "rows_rotated": checkpoint.rows_rotated,
+            },
+            "Rotation des clés terminée.",
+        )
+
+    except Exception as e:
+        session.rollback()
+        capture_exception(e)
+        output.message(f"Erreur lors de la rotation des clés : {e}")
+
+
+@click.command(
+    "rebuild-search-index",
+    short_help="Reconstruit les jetons de recherche de tous les clients.",
+)
+@token_option
+@click.option("--batch-size", default=500, show_default=True, type=int)
+@output_option
+@check_permission(["gestion"])
+@pass_auth
+def rebuild_search_index(auth, token, batch_size, output):
+    """
+    Reconstruit les jetons de recherche de tous les clients.
+
+    À lancer après l'ajout d'un champ dans SEARCH_INDEX_FIELDS, un changement
+    de BLIND_INDEX_KEY, ou pour indexer des clients créés avant l'index.
+
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+        batch_size (int): Nombre de clients par transaction.
+        output (Output): La sortie de la commande (--format).
+
+    Returns:
+        None
+    """
+
+    user_id = auth.user_id
+    session = auth.session
+    try:
+        last_id = 0
+        indexed = 0
+        while True:
+            clients = (
+                session.query(Client)
+                .filter(Client.id > last_id)
+                .order_by(Client.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not clients:
+                break
+            ids = [c.id for c in clients]
+            rows = [
+                row for c in clients for row in rebuild_rows(c, SEARCH_INDEX_FIELDS)
+            ]
+            session.execute(
+                delete(ClientSearchToken).where(ClientSearchToken.client_id.in_(ids))
+            )
+            if rows:
+                session.execute(insert(ClientSearchToken), rows)
+            session.commit()
+            last_id = ids[-1]
+            indexed += len(clients)
+            output.message(f"{indexed} clients indexés (dernier id : {last_id})")
+
+        logger.info(f"Index de recherche reconstruit par l'utilisateur {user_id}")
+        output.row({"indexed": indexed}, "Index de recherche reconstruit.")
+    except Exception as e:
+        session.rollback()
+        capture_exception(e)
+        output.message(f"Erreur lors de la reconstruction de l'index : {e}")
@@ -0,0 +1,422 @@
+import os
+import shlex
+import sys
+import time
+
+import click
+import jwt
+from app.auth.auth import verify_claims
+from app.auth.token_cache import cached_access_token
+from app.auth.permissions import authenticated, pass_auth
+from app.cli.inputs import token_option
+from app.cli.lazy import load_command
+from app.db.session import session_scope
+from app.logging.sentry import capture_exception
+from app.models.client import Client
+from app.models.collaborator import Collaborator
+from app.models.contract import Contract
+from app.models.department import Department
+from app.models.event import Event
+from app.security.crypto import decrypt_rows
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Options dont la valeur est complétée depuis l'index (option -> type d'entité)
+ID_OPTIONS = {
+    "--client-id": "client",
+    "--contract-id": "contract",
+    "--event-id": "event",
+    "--support-id": "collaborator",
+    "--collaborator-id": "collaborator",
+    "--commercial-id": "collaborator",
+}
+
+# Commandes qui n'ont pas de sens dans le shell
+EXCLUDED_COMMANDS = ("shell", "serve")
+
+# Commandes modifiant des lignes sans les désigner par option : l'index est
+# vidé après leur exécution, puis relu entièrement à la complétion suivante
+BULK_COMMANDS = ("upsert-clients", "run-batch")
+
+# Commandes propres au shell
+BUILTINS = ("help", "reload", "token", "exit", "quit")
+
+# Délai (secondes) au-delà duquel une complétion relit les nouvelles lignes
+INDEX_REFRESH_SECONDS = int(os.getenv("SHELL_INDEX_REFRESH_SECONDS", "30"))
+
+HISTORY_PATH = os.getenv("EPIC_HISTORY", os.path.expanduser("~/.epic_history"))
+HISTORY_LENGTH = 1000
+
+
+class CompletionIndex:
+    """
+    Index en mémoire des libellés des clients, contrats, événements et
+    collaborateurs (id -> libellé) servant à la complétion.
+
+    Chaque type est chargé à la première complétion qui en a besoin (les
+    contrats, libellés par leur client, chargent aussi les clients) : ouvrir
+    le shell ne lit ni ne déchiffre rien. Ensuite `refresh` ne lit que les
+    lignes d'id supérieur au dernier connu et les ids signalés par `touch`
+    (modifiés par une commande du shell) : seuls ces clients sont déchiffrés à
+    nouveau. Les modifications faites hors du shell apparaissent après `reload`.
+    """
+
+    KINDS = ("client", "contract", "event", "collaborator")
+
+    def __init__(self):
+        self.labels = {kind: {} for kind in self.KINDS}
+        self.refreshed_at = None
+        self._loaded = set()
+        self._last_id = dict.fromkeys(self.KINDS, 0)
+        self._stale = {kind: set() for kind in self.KINDS}
+
+    def clear(self):
+        """Oublie tout l'index : chaque type est relu à sa prochaine complétion."""
+        self.__init__()
+
+    def touch(self, kind, ids):
+        """Signale des lignes modifiées, relues au prochain `refresh`."""
+        if kind in self._loaded:
+            self._stale[kind].update(ids)
+
+    def refresh(self, session, kinds=None):
+        """
+        Charge ou relit les libellés de `kinds` (par défaut, les types déjà
+        chargés).
+
+        Args:
+            session (Session): La session SQLAlchemy.
+            kinds (Iterable[str] | None): Les types d'entité à lire.
+        """
+        kinds = set(self._loaded if kinds is None else kinds)
+        if "contract" in kinds:
+            kinds.add("client")
+        for kind in self.KINDS:
+            if kind in kinds:
+                self._refresh(session, kind, *self._source(session, kind))
+                self._loaded.add(kind)
+        self.refreshed_at = time.monotonic()
+
+    def refresh_if_stale(self, kind, session_factory=session_scope):
+        """
+        Charge les libellés de `kind` s'ils ne l'ont jamais été, et relit
+        l'index s'il ne l'a pas été depuis INDEX_REFRESH_SECONDS.
+        """
+        if (
+            kind not in self._loaded
+            or time.monotonic() - self.refreshed_at > INDEX_REFRESH_SECONDS
+            or any(self._stale.values())
+        ):
+            with session_factory() as session:
+                self.refresh(session, self._loaded | {kind})
+
+    def _source(self, session, kind):
+        """(modèle, requête, libellé, champs chiffrés) des libellés de `kind`."""
+        if kind == "client":
+            return (
+                Client,
+                session.query(
+                    Client.id,
+                    Client.first_name.label("first_name"),
+                    Client.last_name.label("last_name"),
+                    Client.company_name.label("company_name"),
+                ),
+                lambda c: f"{c.first_name} {c.last_name} ({c.company_name})",
+                ("first_name", "last_name", "company_name"),
+            )
+        if kind == "contract":
+            return (
+                Contract,
+                session.query(Contract.id, Contract.client_id, Contract.amount, Contract.signed),
+                lambda c: f"{self._client_label(c.client_id)} | {c.amount} €"
+                + (" | signé" if c.signed else ""),
+                (),
+            )
+        if kind == "event":
+            return (
+                Event,
+                session.query(Event.id, Event.name, Event.date_start),
+                lambda e: f"{e.name} | {e.date_start:%Y-%m-%d}",
+                (),
+            )
+        return (
+            Collaborator,
+            session.query(
+                Collaborator.id,
+                Collaborator.first_name,
+                Collaborator.last_name,
+                Department.name.label("department"),
+            ).outerjoin(Collaborator.department),
+            lambda c: f"{c.first_name} {c.last_name} ({c.department or '-'})",
+            (),
+        )
+
+    def _refresh(self, session, kind, model, query, label, encrypted=()):
+        labels = self.labels[kind]
+        stale = self._stale[kind]
+        condition = model.id > self._last_id[kind]
+        if stale:
+            condition = condition | model.id.in_(stale)
+        rows = query.filter(condition).order_by(model.id).all()
+        seen = set()
+        for row in decrypt_rows(rows, encrypted) if encrypted else rows:
+            labels[row.id] = label(row)
+            seen.add(row.id)
+            self._last_id[kind] = max(self._last_id[kind], row.id)
+        for deleted in stale - seen:
+            labels.pop(deleted, None)
+        stale.clear()
+
+    def _client_label(self, client_id):
+        return self.labels["client"].get(client_id, f"Client {client_id}")
+
+    def matches(self, kind, text):
+        """
+        Les (id, libellé) dont l'id commence par `text` ou dont le libellé
+        contient `text` (sans casse), triés par id.
+        """
+        labels = self.labels.get(kind, {})
+        needle = text.lower()
+        return [
+            (entity_id, label)
+            for entity_id, label in sorted(labels.items())
+            if str(entity_id).startswith(text) or (needle and needle in label.lower())
+        ]
+
+
+def touched_ids(args):
+    """Les (type d'entité, id) passés en option dans une ligne de commande."""
+    touched = []
+    for option, value in zip(args, args[1:]):
+        kind = ID_OPTIONS.get(option)
+        if kind and value.isdigit():
+            touched.append((kind, int(value)))
+    return touched
+
+
+class Completer:
+    """
+    Complétion readline : noms de commande, options de la commande, puis
+    ids des options de `ID_OPTIONS` (recherchés par id ou par libellé).
+    """
+
+    def __init__(self, commands, index, prompt="epic> "):
+        self.commands = commands
+        self.index = index
+        self.prompt = prompt
+        self._matches = []
+        self._labels = {}
+
+    def candidates(self, before, text):
+        """Les complétions du mot `text`, précédé sur la ligne de `before`."""
+        words = shlex.split(before)
+        if not words:
+            return [name for name in sorted(self.commands) + list(BUILTINS) if name.startswith(text)]
+        kind = ID_OPTIONS.get(words[-1])
+        if kind is not None:
+            self.index.refresh_if_stale(kind)
+            found = self.index.matches(kind, text)
+            self._labels = {str(entity_id): label for entity_id, label in found}
+            return [str(entity_id) for entity_id, _ in found]
+        if text.startswith("-") and words[0] in self.commands:
+            command = load_command(self.commands[words[0]][0])
+            options = [opt for param in command.params for opt in getattr(param, "opts", ())]
+            return sorted(opt for opt in options + ["--help"] if opt.startswith(text))
+        return []
+
+    def complete(self, text, state):
+        import readline
+
+        if state == 0:
+            try:
+                self._labels = {}
+                before = readline.get_line_buffer()[: readline.get_begidx()]
+                self._matches = self.candidates(before, text)
+            except Exception:
+                # Une erreur de complétion ne doit jamais interrompre la saisie
+                self._matches = []
+        return self._matches[state] if state < len(self._matches) else None
+
+    def display(self, substitution, matches, longest):
+        """Affiche les ids proposés avec leur libellé."""
+        import readline
+
+        click.echo()
+        if not self._labels:
+            click.echo("  ".join(matches))
+        for match in matches if self._labels else ():
+            click.echo(f"  {match:>6}  {self._labels.get(match, '')}")
+
+        click.echo(self.prompt + readline.get_line_buffer(), nl=False)
+
+
+def _setup_readline(completer):
+    """Active la complétion et l'historique si readline est disponible."""
+    try:
+        import readline
+    except ImportError:
+        return None
+    readline.set_completer(completer.complete)
+    readline.set_completer_delims(" \t\n")
+    readline.set_completion_display_matches_hook(completer.display)
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    readline.set_history_length(HISTORY_LENGTH)
+    try:
+        readline.read_history_file(HISTORY_PATH)
+    except OSError:
+        pass
+    return readline
+
+
+def _save_history(readline):
+    if readline is None:
+        return
+    # L'historique ne contient pas de jetons (voir _forget_secret) mais reste privé
+    old_umask = os.umask(0o077)
+    try:
+        readline.write_history_file(HISTORY_PATH)
+    except OSError:
+        pass
+    finally:
+        os.umask(old_umask)
+
+
+def _forget_secret(readline, line):
+    """Retire de l'historique une ligne contenant un jeton."""
+    if readline is not None and "token" in line:
+        length = readline.get_current_history_length()
+        if length:
+            readline.remove_history_item(length - 1)
+
+
+def _token_expired(token):
+    try:
+        verify_claims(token)
+    except jwt.ExpiredSignatureError:
+        return True
+    except jwt.InvalidTokenError:
+        return False
+    return False
+
+
+def run_line(cli, args, token):
+    """Exécute une commande de la CLI dans le processus du shell, avec le jeton du shell."""
+    previous = os.environ.get("EPIC_TOKEN")
+    os.environ["EPIC_TOKEN"] = token
+    try:
+        cli.main(args=args, prog_name="epic", standalone_mode=False)
+    except click.exceptions.Abort:
+        click.echo("Commande interrompue.", err=True)
+    except click.ClickException as e:
+        e.show()
+    except (click.exceptions.Exit, SystemExit):
+        pass
+    except Exception as e:
+        capture_exception(e)
+        click.echo(f"Erreur : {e}", err=True)
+    finally:
+        if previous is None:
+            del os.environ["EPIC_TOKEN"]
+        else:
+            os.environ["EPIC_TOKEN"] = previous
+
+
+@click.command("shell")
+@token_option
+@authenticated
+@pass_auth
+def shell(auth, token):
+    """
+    Ouvre un shell interactif authentifié.
+
+    Le jeton est lu une fois (--token, EPIC_TOKEN ou cache de login, qui
+    le renouvelle à son expiration) et passé à toutes les commandes ; moteur,
+    pool de connexions, mappers et cache des permissions restent chauds entre
+    les commandes. Tab complète les commandes, leurs options et les ids de
+    clients, contrats, événements et collaborateurs (par id ou par libellé),
+    depuis un index en mémoire chargé à la première complétion puis relu de
+    façon incrémentale. L'historique est gardé dans ~/.epic_history
+    (EPIC_HISTORY). Commandes du shell : help, reload (relit tout l'index),
+    token <jeton>, exit.
+
+    Args:
+        auth (AuthContext): Le contexte d'authentification de la commande.
+        token (str): Le jeton JWT d'authentification.
+
+    Returns:
+        None
+    """
+    from app.cli.main import COMMANDS, cli
+
+    user = auth.user
+    name = f"{user.first_name} {user.last_name}" if user else f"#{auth.user_id}"
+    prompt = f"epic ({name}, {auth.department})> "
+
+    # Libellés chargés à la première complétion d'id, pas à l'ouverture
+    index = CompletionIndex()
+    # La connexion retourne au pool pendant la saisie
+    auth.session.close()
+
+    commands = {n: spec for n, spec in COMMANDS.items() if n not in EXCLUDED_COMMANDS}
+    completer = Completer(commands, index, prompt)
+    readline = _setup_readline(completer) if sys.stdin.isatty() else None
+    logger.info(f"Shell ouvert par l'utilisateur {auth.user_id}")
+    click.echo("Tab pour compléter, help pour l'aide, exit pour quitter.")
+
+    try:
+        while True:
+            try:
+                line = input(prompt)
+            except EOFError:
+                click.echo()
+                break
+            except KeyboardInterrupt:
+                click.echo()
+                continue
+            _forget_secret(readline, line)
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                click.echo(f"Ligne invalide : {e}")
+                continue
+            if not args:
+                continue
+
+            command = args[0]
+            if command in ("exit", "quit"):
+                break
+            if command == "help":
+                run_line(cli, args[1:] + ["--help"], token)
+                continue
+            if command == "reload":
+                index.clear()
+                click.echo("Index vidé : il sera relu à la prochaine complétion.")
+                continue
+            if command == "token":
+                if len(args) != 2:
+                    click.echo("Usage : token <jeton>")
+                else:
+                    token = args[1]
+                continue
+            if command in EXCLUDED_COMMANDS:
+                click.echo(f"{command} n'est pas disponible dans le shell.")
+                continue
+            if _token_expired(token):
+                # Renouvellement silencieux par le cache de login, si possible
+                token = cached_access_token() or token
+                if _token_expired(token):
+                    click.echo("Token expiré : reconnectez-vous (login) puis `token <jeton>`.")
+                    continue
+
+            run_line(cli, args, token)
+            if command in BULK_COMMANDS:
+                index.clear()
+            for kind, entity_id in touched_ids(args):
+                index.touch(kind, [entity_id])
+    finally:
+        _save_history(readline)
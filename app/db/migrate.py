@@ -0,0 +1,147 @@
+"""
+Migrations versionnées du schéma.
+
+Chaque migration est un module `app/db/migrations/vNNNN_<nom>.py` qui expose
+une fonction `upgrade(conn)` et, facultativement, `TRANSACTIONAL = False`
+lorsqu'elle doit tourner hors transaction (CREATE INDEX CONCURRENTLY, ou
+migration qui gère elle-même ses lots). Les versions appliquées sont
+enregistrées dans la table `schema_migrations`.
+
+Les migrations doivent rester idempotentes : une base créée par
+`Base.metadata.create_all` (migration 0001) possède déjà le schéma courant.
+
+Usage :
+    python -m app.db.migrate upgrade [--to 4]
+    python -m app.db.migrate status
+"""
+
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+
+import click
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.schema import CreateIndex
+from app.db.session import engine
+
+MIGRATIONS_PACKAGE = "app.db.migrations"
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def available_migrations():
+    """Retourne les migrations connues, [(version, nom, module)] par version croissante."""
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        match = re.fullmatch(r"v(\d{4})_(\w+)", info.name)
+        if match:
+            module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+            migrations.append((int(match[1]), match[2], module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def applied_versions(bind):
+    """Retourne l'ensemble des versions déjà appliquées sur la base `bind`."""
+    with bind.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(bind=engine, target=None):
+    """
+    Applique, dans l'ordre, les migrations pas encore appliquées.
+
+    Args:
+        bind (Engine): Le moteur de la base à migrer.
+        target (int | None): Dernière version à appliquer, toutes par défaut.
+
+    Returns:
+        list: Les versions appliquées par cet appel.
+    """
+    applied = applied_versions(bind)
+    done = []
+    for version, name, module in available_migrations():
+        if version in applied or (target is not None and version > target):
+            continue
+        click.echo(f"Migration {version:04d} : {name}...")
+        if getattr(module, "TRANSACTIONAL", True):
+            with bind.begin() as conn:
+                module.upgrade(conn)
+                _record(conn, version, name)
+        else:
+            with bind.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT")
+                module.upgrade(conn)
+            with bind.begin() as conn:
+                _record(conn, version, name)
+        done.append(version)
+    return done
+
+
+def _record(conn, version, name):
+    conn.execute(
+        schema_migrations.insert().values(
+            version=version, name=name, applied_at=datetime.now()
+        )
+    )
+
+
+def create_index(conn, index):
+    """
+    Crée `index` (déclaré sur un modèle) s'il n'existe pas encore.
+
+    Sous PostgreSQL l'index est créé avec CONCURRENTLY pour ne pas bloquer les
+    écritures sur la table : `conn` doit alors être en autocommit (migration
+    avec `TRANSACTIONAL = False`).
+    """
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+    if conn.dialect.name == "postgresql":
+        # Un CREATE INDEX CONCURRENTLY interrompu laisse un index invalide que
+        # IF NOT EXISTS ignorerait : on le supprime avant de recommencer.
+        invalid = conn.execute(
+            text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": index.name},
+        ).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+        ddl = re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl)
+    conn.execute(text(ddl))
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command("upgrade")
+@click.option("--to", "target", type=int, default=None, help="Dernière version à appliquer")
+def upgrade_command(target):
+    """Applique les migrations en attente."""
+    done = upgrade(target=target)
+    click.echo(
+        f"{len(done)} migration(s) appliquée(s)." if done else "Base déjà à jour."
+    )
+
+
+@cli.command("status")
+def status_command():
+    """Affiche les migrations appliquées et en attente."""
+    applied = applied_versions(engine)
+    for version, name, _ in available_migrations():
+        state = "appliquée" if version in applied else "en attente"
+        click.echo(f"{version:04d} {name} : {state}")
+
+
+if __name__ == "__main__":
+    cli()
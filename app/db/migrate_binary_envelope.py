@@ -0,0 +1,97 @@
+"""
+Migration des colonnes chiffrées de `clients` du format texte (jeton Fernet
+base64) vers l'enveloppe binaire de `app.security.crypto`.
+
+Les lignes sont converties par lots ordonnés sur l'id, chaque lot dans sa
+propre transaction : la migration peut être interrompue puis relancée, elle
+reprend là où elle s'était arrêtée.
+
+Usage :
+    python -m app.db.migrate_binary_envelope [--batch-size 1000]
+"""
+
+import click
+from sqlalchemy import inspect, text
+from app.db.session import engine
+from app.models.client import ENCRYPTED_FIELDS
+from app.security.crypto import encrypt, pack_envelope
+
+
+def _to_envelope(value):
+    if value is None:
+        return None
+    if value.startswith("gAAAA"):
+        return pack_envelope(value.encode("utf-8"))
+    # Ligne antérieure au chiffrement : encore en clair
+    return encrypt(value)
+
+
+def _python_type_is_bytes(column_type):
+    try:
+        return column_type.python_type is bytes
+    except NotImplementedError:
+        return False
+
+
+def migrate(batch_size=1000, bind=engine):
+    with bind.begin() as conn:
+        columns = {c["name"]: c for c in inspect(conn).get_columns("clients")}
+        pending = [
+            name
+            for name in ENCRYPTED_FIELDS
+            if not _python_type_is_bytes(columns[name]["type"])
+        ]
+        if not pending:
+            click.echo("Colonnes déjà au format binaire, rien à faire.")
+            return
+        for name in pending:
+            if f"{name}_bin" not in columns:
+                conn.execute(text(f"ALTER TABLE clients ADD COLUMN {name}_bin BYTEA"))
+
+    select_cols = ", ".join(pending)
+    set_clause = ", ".join(f"{name}_bin = :{name}" for name in pending)
+    not_migrated = " OR ".join(
+        f"({name}_bin IS NULL AND {name} IS NOT NULL)" for name in pending
+    )
+
+    last_id = 0
+    converted = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                text(
+                    f"SELECT id, {select_cols} FROM clients "
+                    f"WHERE id > :last_id AND ({not_migrated}) "
+                    "ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": batch_size},
+            ).all()
+            if not rows:
+                break
+            conn.execute(
+                text(f"UPDATE clients SET {set_clause} WHERE id = :id"),
+                [
+                    {"id": row.id, **{name: _to_envelope(getattr(row, name)) for name in pending}}
+                    for row in rows
+                ],
+            )
+        last_id = rows[-1].id
+        converted += len(rows)
+        click.echo(f"{converted} clients convertis (dernier id : {last_id})")
+
+    with bind.begin() as conn:
+        for name in pending:
+            conn.execute(text(f"ALTER TABLE clients DROP COLUMN {name}"))
+            conn.execute(text(f"ALTER TABLE clients RENAME COLUMN {name}_bin TO {name}"))
+            conn.execute(text(f"ALTER TABLE clients ALTER COLUMN {name} SET NOT NULL"))
+    click.echo("Migration vers l'enveloppe binaire terminée.")
+
+
+@click.command()
+@click.option("--batch-size", default=1000, show_default=True, type=int)
+def main(batch_size):
+    migrate(batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Migrations du schéma, appliquées dans l'ordre par `app.db.migrate`."""
@@ -0,0 +1,8 @@
+"""Crée les tables manquantes à partir des modèles (base vide ou créée par init_db)."""
+
+import app.models  # noqa: F401  (enregistre toutes les tables dans Base.metadata)
+from app.models.base import Base
+
+
+def upgrade(conn):
+    Base.metadata.create_all(conn)
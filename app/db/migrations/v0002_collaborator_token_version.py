@@ -0,0 +1,14 @@
+"""Ajoute collaborators.token_version (révocation des tokens, voir check_permission)."""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("collaborators")}
+    if "token_version" not in columns:
+        conn.execute(
+            text(
+                "ALTER TABLE collaborators "
+                "ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"
+            )
+        )
@@ -0,0 +1,10 @@
+"""Convertit les colonnes chiffrées de clients vers l'enveloppe binaire."""
+
+from app.db.migrate_binary_envelope import migrate
+
+# La conversion valide elle-même chaque lot dans sa propre transaction
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    migrate(bind=conn.engine)
@@ -0,0 +1,30 @@
+"""Index des filtres de la CLI et des clés étrangères (créés CONCURRENTLY)."""
+
+import app.models  # noqa: F401
+from app.db.migrate import create_index
+from app.models.base import Base
+
+TRANSACTIONAL = False
+
+INDEXES = {
+    "clients": ["ix_clients_commercial_contact_id"],
+    "collaborators": ["ix_collaborators_department_id"],
+    "contracts": [
+        "ix_contracts_client_id",
+        "ix_contracts_sales_contact_id",
+        "ix_contracts_unsigned",
+        "ix_contracts_unpaid",
+    ],
+    "events": [
+        "ix_events_contract_id",
+        "ix_events_support_contact_id_id",
+        "ix_events_unassigned",
+    ],
+}
+
+
+def upgrade(conn):
+    for table_name, index_names in INDEXES.items():
+        indexes = {i.name: i for i in Base.metadata.tables[table_name].indexes}
+        for name in index_names:
+            create_index(conn, indexes[name])
@@ -0,0 +1,13 @@
+"""
+Ajoute clients.content_digest (empreinte du contenu en clair, voir
+upsert-clients). Les clients existants gardent une empreinte NULL : ils sont
+comparés en clair à leur première synchronisation, qui la renseigne.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("clients")}
+    if "content_digest" not in columns:
+        conn.execute(text("ALTER TABLE clients ADD COLUMN content_digest VARCHAR(64)"))
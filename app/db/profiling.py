@@ -0,0 +1,155 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import click
+from sqlalchemy import event
+
+# Requêtes plus lentes que ce seuil (ms) : plan EXPLAIN capturé automatiquement
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+# Nombre de requêtes les plus lentes rapportées par commande
+DB_PROFILE_TOP = int(os.getenv("DB_PROFILE_TOP", "5"))
+
+# Profil de la commande en cours (None hors d'une commande profilée)
+_active = None
+_installed = set()
+
+
+class CommandProfile:
+    """
+    Mesures SQL d'une invocation de commande.
+
+    Attributes:
+        command (str): Le nom de la commande click.
+        statements (int): Nombre de requêtes exécutées.
+        db_time (float): Temps total passé dans la base (secondes).
+        slowest (list): Les DB_PROFILE_TOP requêtes les plus lentes,
+            (durée, sql, plan EXPLAIN ou None), de la plus lente à la plus rapide.
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest = []
+        self.started = time.perf_counter()
+
+    def record(self, statement, duration, plan=None):
+        self.statements += 1
+        self.db_time += duration
+        if len(self.slowest) < DB_PROFILE_TOP or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement, plan))
+            self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+            del self.slowest[DB_PROFILE_TOP:]
+
+    def as_dict(self):
+        return {
+            "command": self.command,
+            "statements": self.statements,
+            "db_time_ms": round(self.db_time * 1000, 2),
+            "wall_time_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "slowest": [
+                {"ms": round(duration * 1000, 2), "sql": statement, "explain": plan}
+                for duration, statement, plan in self.slowest
+            ],
+        }
+
+
+def _explain(conn, statement, parameters):
+    """
+    Retourne le plan d'exécution de `statement`, lu sur un curseur distinct pour
+    ne pas écraser le résultat de la requête en cours. None si indisponible.
+    """
+    if conn.dialect.name == "postgresql":
+        prefix = "EXPLAIN "
+    elif conn.dialect.name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    cursor = conn.connection.cursor()
+    try:
+        if conn.dialect.name == "postgresql":
+            # Un EXPLAIN en échec ne doit pas annuler la transaction de la commande
+            cursor.execute("SAVEPOINT profiling_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            # Le texte du plan est la dernière colonne (seule colonne sous PostgreSQL)
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        except Exception as e:
+            plan = f"EXPLAIN impossible : {e}"
+            if conn.dialect.name == "postgresql":
+                cursor.execute("ROLLBACK TO SAVEPOINT profiling_explain")
+        if conn.dialect.name == "postgresql":
+            cursor.execute("RELEASE SAVEPOINT profiling_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active is not None:
+        conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active is None or not conn.info.get("profiling_started"):
+        return
+    duration = time.perf_counter() - conn.info["profiling_started"].pop()
+    plan = None
+    if duration * 1000 >= DB_SLOW_QUERY_MS and not executemany:
+        plan = _explain(conn, statement, parameters)
+    _active.record(statement, duration, plan)
+
+
+def install_profiling(engine):
+    """Branche (une seule fois) les hooks de mesure sur `engine`."""
+    if engine in _installed:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _installed.add(engine)
+
+
+def _report(profile, output):
+    data = profile.as_dict()
+    if output in ("1", "stderr"):
+        click.echo(
+            f"[DB_PROFILE] {data['command']} : {data['statements']} requêtes, "
+            f"{data['db_time_ms']} ms en base ({data['wall_time_ms']} ms au total)",
+            err=True,
+        )
+        for entry in data["slowest"]:
+            sql = " ".join(entry["sql"].split())
+            click.echo(f"[DB_PROFILE]   {entry['ms']:>9} ms  {sql[:200]}", err=True)
+            if entry["explain"]:
+                for line in entry["explain"].splitlines():
+                    click.echo(f"[DB_PROFILE]       {line}", err=True)
+    else:
+        with open(output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+
+@contextmanager
+def profile_command(command, output, engine):
+    """
+    Mesure les requêtes SQL exécutées sur `engine` pendant le bloc et rapporte
+    à la fin le nombre de requêtes, le temps passé en base et les requêtes les
+    plus lentes (avec leur plan au-delà de DB_SLOW_QUERY_MS).
+
+    Args:
+        command (str): Le nom de la commande profilée.
+        output (str): "stderr" pour un résumé lisible, sinon le chemin d'un
+            fichier JSON lines auquel ajouter une ligne par commande.
+        engine (Engine): Le moteur SQLAlchemy à instrumenter.
+    """
+    global _active
+    install_profiling(engine)
+    profile = CommandProfile(command)
+    _active = profile
+    try:
+        yield profile
+    finally:
+        _active = None
+        _report(profile, output)
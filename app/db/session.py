@@ -1,6 +1,121 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import atexit
+import os
+import traceback
+import weakref
+from contextlib import contextmanager
+
+import click
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+# Pool de connexions partagé par toutes les commandes
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Durée maximale d'une requête côté PostgreSQL, 0 pour aucune limite
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+# Signale à la sortie les sessions jamais fermées et connexions jamais rendues
+DB_LEAK_DEBUG = os.getenv("DB_LEAK_DEBUG", "").lower() in ("1", "true", "yes")
+
+_connect_args = {}
+if DB_STATEMENT_TIMEOUT_MS and DATABASE_URL.startswith("postgresql"):
+    _connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+# Sessions ouvertes et connexions empruntées, avec la pile d'appel d'origine
+_open_sessions = weakref.WeakKeyDictionary()
+_checked_out = {}
+
+
+def _create_engine():
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        connect_args=_connect_args,
+    )
+    if DB_LEAK_DEBUG:
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            _checked_out[id(connection_record)] = "".join(traceback.format_stack(limit=12)[:-1])
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            _checked_out.pop(id(connection_record), None)
+
+        atexit.register(_report_leaks)
+    return engine
+
+
+def get_engine():
+    """
+    Le moteur partagé, créé au premier appel (pilote PostgreSQL, pool) : les
+    commandes qui n'accèdent pas à la base ne le construisent jamais.
+    `app.db.session.engine` y donne accès et peut être remplacé (tests).
+    """
+    if "engine" not in globals():
+        globals()["engine"] = _create_engine()
+    return globals()["engine"]
+
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class AppSession(Session):
+    """Session liée par défaut au moteur partagé, créé à la première session."""
+
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind if bind is not None else get_engine(), **kwargs)
+
+
+class TrackedSession(AppSession):
+    """Session qui mémorise où elle a été ouverte tant qu'elle n'est pas fermée."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _open_sessions[self] = "".join(traceback.format_stack(limit=8)[:-2])
+
+    def close(self):
+        _open_sessions.pop(self, None)
+        super().close()
+
+
+def _report_leaks():
+    for origin in list(_open_sessions.values()):
+        click.echo(f"[DB_LEAK_DEBUG] Session jamais fermée, ouverte ici :\n{origin}", err=True)
+    for origin in list(_checked_out.values()):
+        click.echo(
+            f"[DB_LEAK_DEBUG] Connexion jamais rendue au pool, empruntée ici :\n{origin}",
+            err=True,
+        )
+
+
+SessionLocal = sessionmaker(class_=TrackedSession if DB_LEAK_DEBUG else AppSession)
+
+
+@contextmanager
+def session_scope(commit=False):
+    """
+    Unité de travail : fournit une session, l'annule en cas d'exception et la
+    ferme toujours (la connexion retourne au pool).
+
+    Args:
+        commit (bool): Valide la transaction en sortie normale. Par défaut les
+            commandes valident elles-mêmes ce qu'elles veulent persister.
+    """
+    session = SessionLocal()
+    try:
+        yield session
+        if commit:
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
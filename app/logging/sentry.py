@@ -1,6 +1,4 @@
-import sentry_sdk
 import logging
-from sentry_sdk.integrations.logging import LoggingIntegration
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -10,9 +8,27 @@ BASE_DIR = Path(__file__).resolve().parent.parent  # = epic_events/
 load_dotenv(dotenv_path=BASE_DIR / ".env")
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 
+# Niveaux de l'intégration logging : breadcrumbs et logs dès INFO, événements
+# Sentry à partir d'ERROR
+LOG_LEVEL = logging.INFO
+EVENT_LEVEL = logging.ERROR
+
+_initialized = False
+
 
 def init_sentry():
-    sentry_logging = LoggingIntegration(level=logging.INFO, event_level=logging.ERROR)
+    """Initialise le SDK Sentry (une seule fois). Import et initialisation
+    coûtent plus que la plupart des commandes : ils n'ont lieu qu'à la
+    première exception capturée ou au premier message journalisé."""
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+
+    import sentry_sdk
+    from sentry_sdk.integrations.logging import LoggingIntegration
+
+    sentry_logging = LoggingIntegration(level=LOG_LEVEL, event_level=EVENT_LEVEL)
 
     def before_send_filter(event, hint):
         message = event.get("message", "")
@@ -30,3 +46,45 @@ def init_sentry():
             "enable_logs": True,
         },
     )
+
+
+def capture_exception(error):
+    """`sentry_sdk.capture_exception`, en initialisant Sentry si nécessaire."""
+    init_sentry()
+    import sentry_sdk
+
+    return sentry_sdk.capture_exception(error)
+
+
+class _LazySentryHandler(logging.Handler):
+    """
+    Handler posé sur le logger `app` : au premier message, initialise Sentry
+    (dont l'intégration logging prend le relais pour les messages suivants)
+    et lui transmet ce premier message, puis se retire.
+    """
+
+    def emit(self, record):
+        logging.getLogger("app").removeHandler(self)
+        init_sentry()
+        from sentry_sdk.integrations.logging import (
+            BreadcrumbHandler,
+            EventHandler,
+            SentryLogsHandler,
+        )
+
+        for handler in (
+            BreadcrumbHandler(level=LOG_LEVEL),
+            SentryLogsHandler(level=LOG_LEVEL),
+            EventHandler(level=EVENT_LEVEL),
+        ):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def install_lazy_sentry():
+    """Reporte l'initialisation de Sentry au premier besoin (voir init_sentry)."""
+    if _initialized:
+        return
+    app_logger = logging.getLogger("app")
+    if not any(isinstance(h, _LazySentryHandler) for h in app_logger.handlers):
+        app_logger.addHandler(_LazySentryHandler(level=LOG_LEVEL))
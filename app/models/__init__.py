@@ -3,3 +3,5 @@ from .contract import Contract
 from .event import Event
 from .collaborator import Collaborator
 from .department import Department
+from .key_rotation import KeyRotationCheckpoint
+from .client_search_token import ClientSearchToken
@@ -25,31 +25,104 @@ from sqlalchemy.orm import relationship
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from app.models.base import Base
-from app.security.crypto import EncryptedText, blind_index
-from sqlalchemy import event
+from app.models.client_search_token import ClientSearchToken
+from app.security.crypto import EncryptedAttribute, EncryptedText, blind_index, blind_index_digest
+from app.security.search_index import PREFIX, TRIGRAM, register_search_index
+from sqlalchemy import event, inspect
+
+ENCRYPTED_FIELDS = ("first_name", "last_name", "email", "phone", "company_name")
+
+# Champs chiffrés interrogeables par `search-clients`, et types de jetons
+SEARCH_INDEX_FIELDS = {
+    "first_name": (PREFIX,),
+    "last_name": (PREFIX, TRIGRAM),
+    "company_name": (PREFIX, TRIGRAM),
+}
+
+
+def content_digest(values):
+    """
+    Empreinte HMAC (BLIND_INDEX_KEY) des champs chiffrés d'un client : permet
+    à `upsert-clients` de repérer les clients inchangés sans les déchiffrer.
+
+    Args:
+        values: Mapping champ -> valeur en clair, ou instance de Client.
+    """
+    get = values.get if isinstance(values, dict) else lambda field: getattr(values, field)
+    return blind_index_digest(
+        "\x1f".join(get(field) or "" for field in ENCRYPTED_FIELDS).encode("utf-8")
+    )
+
 
 class Client(Base):
     __tablename__ = "clients"
 
     id = Column(Integer, primary_key=True)
 
-    first_name = Column(EncryptedText, nullable=False)
-    last_name  = Column(EncryptedText, nullable=False)
-    email      = Column(EncryptedText, nullable=False)
-    phone      = Column(EncryptedText, nullable=False)
-    company_name = Column(EncryptedText, nullable=False)
+    # Colonnes chiffrées : le texte chiffré est chargé tel quel, le clair n'est
+    # calculé qu'au premier accès à l'attribut public correspondant.
+    _first_name = Column("first_name", EncryptedText, nullable=False)
+    _last_name  = Column("last_name", EncryptedText, nullable=False)
+    _email      = Column("email", EncryptedText, nullable=False)
+    _phone      = Column("phone", EncryptedText, nullable=False)
+    _company_name = Column("company_name", EncryptedText, nullable=False)
+
+    first_name = EncryptedAttribute("_first_name")
+    last_name = EncryptedAttribute("_last_name")
+    email = EncryptedAttribute("_email")
+    phone = EncryptedAttribute("_phone")
+    company_name = EncryptedAttribute("_company_name")
 
     # Blind index pour recherche/unique sur email
     email_bidx = Column(String(64), unique=True, index=True)
+    # Empreinte du contenu en clair (voir content_digest)
+    content_digest = Column(String(64))
 
-    commercial_contact_id = Column(Integer, ForeignKey("collaborators.id"), nullable=False)
+    commercial_contact_id = Column(
+        Integer, ForeignKey("collaborators.id"), nullable=False, index=True
+    )
     commercial_contact = relationship("Collaborator", back_populates="clients")
+    contracts = relationship("Contract", back_populates="client")
+
+def _refresh_derived_columns(target: "Client", insert: bool):
+    """
+    Recalcule email_bidx et content_digest quand un champ chiffré change.
+
+    Seuls les champs modifiés sont lus en clair (valeur qui vient d'être
+    affectée, déjà en cache) ; les autres ne sont jamais déchiffrés : si le
+    clair de l'un d'eux n'est pas connu, l'empreinte est effacée (NULL), ce
+    qu'`upsert-clients` traite comme un contenu modifié.
+    """
+    state = inspect(target)
+    changed = [
+        field
+        for field in ENCRYPTED_FIELDS
+        if insert or state.attrs[f"_{field}"].history.has_changes()
+    ]
+    if not changed:
+        return
+    if "email" in changed:
+        target.email_bidx = blind_index(target.email) if target.email else None
+    values = {}
+    for field in ENCRYPTED_FIELDS:
+        if field in changed:
+            values[field] = getattr(target, field)
+        else:
+            values[field] = Client.__dict__[field].cached(target)
+            if values[field] is None:
+                target.content_digest = None
+                return
+    target.content_digest = content_digest(values)
 
-# Gère automatiquement l'email_bidx à chaque set / update
+
+# Gère automatiquement l'email_bidx et l'empreinte à chaque insert / update
 @event.listens_for(Client, "before_insert")
 def client_before_insert(mapper, connection, target: "Client"):
-    target.email_bidx = blind_index(target.email) if target.email else None
+    _refresh_derived_columns(target, insert=True)
 
 @event.listens_for(Client, "before_update")
 def client_before_update(mapper, connection, target: "Client"):
-    target.email_bidx = blind_index(target.email) if target.email else None
+    _refresh_derived_columns(target, insert=False)
+
+
+register_search_index(Client, ClientSearchToken, SEARCH_INDEX_FIELDS)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from app.models.base import Base
+
+
+class ClientSearchToken(Base):
+    """Jetons d'index aveugle (préfixes / trigrammes HMAC) des champs chiffrés
+    d'un client, utilisés par `search-clients`."""
+
+    __tablename__ = "client_search_tokens"
+
+    client_id = Column(
+        Integer, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True
+    )
+    field = Column(String(32), primary_key=True)
+    token = Column(String(32), primary_key=True)
+
+    __table_args__ = (Index("ix_client_search_tokens_field_token", "field", "token"),)
@@ -15,9 +15,13 @@ class Collaborator(Base):
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
 
-    department_id = Column(Integer, ForeignKey("departments.id"))
+    department_id = Column(Integer, ForeignKey("departments.id"), index=True)
+    # Incrémentée à chaque changement de département : invalide les tokens
+    # dont les claims ne correspondent plus (voir check_permission).
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     department = relationship("Department", back_populates="collaborators")
+    clients = relationship("Client", back_populates="commercial_contact")
     contracts = relationship("Contract", back_populates="sales_contact")
     events = relationship("Event", back_populates="support_contact")
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Boolean, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Boolean, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
@@ -12,9 +12,27 @@ class Contract(Base):
     signed = Column(Boolean, default=False)
     signed_date = Column(Date)
 
-    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
-    sales_contact_id = Column(Integer, ForeignKey("collaborators.id"), nullable=False)
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, index=True)
+    sales_contact_id = Column(
+        Integer, ForeignKey("collaborators.id"), nullable=False, index=True
+    )
 
     client = relationship("Client", back_populates="contracts")
     sales_contact = relationship("Collaborator", back_populates="contracts")
     event = relationship("Event", back_populates="contract", uselist=False)
+
+    # Index partiels des filtres de filter-contracts (parcours dans l'ordre des id)
+    __table_args__ = (
+        Index(
+            "ix_contracts_unsigned",
+            "id",
+            postgresql_where=signed.is_(False),
+            sqlite_where=signed.is_(False),
+        ),
+        Index(
+            "ix_contracts_unpaid",
+            "id",
+            postgresql_where=remaining_amount > 0,
+            sqlite_where=remaining_amount > 0,
+        ),
+    )
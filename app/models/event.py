@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
@@ -14,8 +14,20 @@ class Event(Base):
     attendees = Column(Integer, nullable=False)
     notes = Column(String)
 
-    contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=False)
+    contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=False, index=True)
     support_contact_id = Column(Integer, ForeignKey("collaborators.id"), nullable=True)
 
     contract = relationship("Contract", back_populates="event")
     support_contact = relationship("Collaborator", back_populates="events")
+
+    __table_args__ = (
+        # Événements d'un support, dans l'ordre des id (update-event)
+        Index("ix_events_support_contact_id_id", "support_contact_id", "id"),
+        # Événements sans support (list-unassigned-events, assign-support-to-event)
+        Index(
+            "ix_events_unassigned",
+            "id",
+            postgresql_where=support_contact_id.is_(None),
+            sqlite_where=support_contact_id.is_(None),
+        ),
+    )
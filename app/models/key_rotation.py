@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer
+from app.models.base import Base
+
+
+class KeyRotationCheckpoint(Base):
+    """Avancement d'une rotation de clés : permet à `rotate-keys` de reprendre
+    après une interruption à partir du dernier client traité."""
+
+    __tablename__ = "key_rotation_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    key_version = Column(Integer, nullable=False, unique=True)
+    last_client_id = Column(Integer, nullable=False, default=0)
+    rows_scanned = Column(Integer, nullable=False, default=0)
+    rows_rotated = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, default=datetime.now)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+    finished_at = Column(DateTime)
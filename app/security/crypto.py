@@ -1,39 +1,249 @@
 import os
+import base64
 import hmac
 import hashlib
-from typing import Iterable, Optional, Dict, Type
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Dict, Sequence, Tuple, Type
 
-from cryptography.fernet import Fernet, InvalidToken
-from sqlalchemy import event
+from cryptography.fernet import Fernet
+from sqlalchemy import LargeBinary, event
 from sqlalchemy.orm import Mapper
+from sqlalchemy.types import TypeDecorator
 
-_FERNET: Optional[Fernet] = None
+# HMAC préparé avec BLIND_INDEX_KEY, copié pour chaque valeur indexée
+_BLIND_INDEX_HMAC: Optional["hmac.HMAC"] = None
 
-def _fernet() -> Fernet:
-    global _FERNET
-    if _FERNET is None:
-        key = os.getenv("ENCRYPTION_KEY")
-        if not key:
-            raise RuntimeError("ENCRYPTION_KEY missing in environment")
-        if isinstance(key, str):
-            key = key.encode("utf-8")
-        _FERNET = Fernet(key)
-    return _FERNET
+# Trousseau de clés : version -> Fernet, et version de la clé principale
+_KEYRING: Optional[Tuple[Dict[int, Fernet], int]] = None
 
-def encrypt(value: Optional[str]) -> Optional[str]:
-    if value is None:
-        return None
-    if isinstance(value, str) and value.startswith("gAAAA"):
+# Enveloppe binaire stockée en base : 1 octet d'en-tête puis le jeton Fernet
+# brut (non base64). En-tête = algorithme (4 bits forts) | version de clé
+# (4 bits faibles).
+ALGORITHM_FERNET = 0x1
+MAX_KEY_VERSION = 0x0F
+
+# Déchiffrement par lots : cryptography relâche le GIL pendant AES/HMAC,
+# un pool de threads suffit donc à occuper plusieurs cœurs.
+DECRYPT_WORKERS = int(os.getenv("DECRYPT_WORKERS", os.cpu_count() or 1))
+DECRYPT_CHUNK_SIZE = int(os.getenv("DECRYPT_CHUNK_SIZE", "256"))
+
+def _keyring() -> Tuple[Dict[int, Fernet], int]:
+    """Charge les clés de chiffrement.
+
+    ENCRYPTION_KEYS="2:<clé>,1:<clé>" déclare plusieurs clés versionnées, la
+    première étant la clé principale (utilisée pour chiffrer) ; les autres ne
+    servent plus qu'à relire les données pas encore migrées par `rotate-keys`.
+    À défaut, ENCRYPTION_KEY seule est utilisée avec la version 0.
+    """
+    global _KEYRING
+    if _KEYRING is None:
+        spec = os.getenv("ENCRYPTION_KEYS")
+        if spec:
+            entries = []
+            for item in spec.split(","):
+                version, _, key = item.strip().partition(":")
+                entries.append((int(version), key))
+        else:
+            key = os.getenv("ENCRYPTION_KEY")
+            if not key:
+                raise RuntimeError("ENCRYPTION_KEY missing in environment")
+            entries = [(0, key)]
+        keys: Dict[int, Fernet] = {}
+        for version, key in entries:
+            if not 0 <= version <= MAX_KEY_VERSION:
+                raise RuntimeError(f"Encryption key version {version} out of range")
+            keys[version] = Fernet(key.encode("utf-8"))
+        _KEYRING = (keys, entries[0][0])
+    return _KEYRING
+
+def primary_key_version() -> int:
+    return _keyring()[1]
+
+def _fernet(key_version: Optional[int] = None) -> Fernet:
+    keys, primary = _keyring()
+    version = primary if key_version is None else key_version
+    try:
+        return keys[version]
+    except KeyError:
+        raise RuntimeError(f"No encryption key configured for version {version}")
+
+class DecryptCache:
+    """Cache LRU borné des valeurs déchiffrées, indexé par l'empreinte
+    SHA-256 du texte chiffré (le jeton lui-même n'est pas conservé).
+
+    - max_size: nombre maximal d'entrées, 0 pour désactiver le cache
+    - ttl: durée de vie d'une entrée en secondes, 0 pour ne jamais expirer
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def _key(ciphertext: bytes) -> bytes:
+        return hashlib.sha256(ciphertext).digest()
+
+    def get(self, ciphertext: bytes) -> Optional[str]:
+        key = self._key(ciphertext)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and entry[1] < time.monotonic()):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, ciphertext: bytes, plaintext: str) -> None:
+        key = self._key(ciphertext)
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._entries[key] = (plaintext, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+decrypt_cache = DecryptCache(
+    max_size=int(os.getenv("DECRYPT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("DECRYPT_CACHE_TTL", "300")),
+)
+
+def pack_envelope(token: bytes, key_version: Optional[int] = None) -> bytes:
+    """Convertit un jeton Fernet base64 en enveloppe binaire (par défaut
+    étiquetée avec la version de la clé principale)."""
+    if key_version is None:
+        key_version = primary_key_version()
+    header = (ALGORITHM_FERNET << 4) | key_version
+    return bytes([header]) + base64.urlsafe_b64decode(token)
+
+def unpack_envelope(envelope: bytes):
+    """Retourne (version de clé, jeton Fernet base64) d'une enveloppe.
+    Lève ValueError si l'en-tête ne correspond à aucun format connu.
+    """
+    if not envelope:
+        raise ValueError("Empty encrypted envelope")
+    header = envelope[0]
+    if header >> 4 != ALGORITHM_FERNET:
+        raise ValueError(f"Unknown encryption algorithm in header {header:#04x}")
+    return header & 0x0F, base64.urlsafe_b64encode(envelope[1:])
+
+def encrypt(value: Optional[str]) -> Optional[bytes]:
+    """Chiffre une chaîne en clair. Les valeurs déjà chiffrées (bytes) sont
+    renvoyées telles quelles : c'est le type, pas un préfixe, qui les distingue.
+    """
+    if value is None or isinstance(value, bytes):
         return value
-    return _fernet().encrypt(value.encode("utf-8")).decode("utf-8")
+    return pack_envelope(_fernet().encrypt(value.encode("utf-8")))
 
-def decrypt(value: Optional[str]) -> Optional[str]:
+def decrypt(value: Optional[bytes]) -> Optional[str]:
+    """Déchiffre une enveloppe binaire. Une enveloppe invalide ou un jeton
+    falsifié lèvent une exception au lieu de renvoyer le texte chiffré.
+    """
     if value is None:
         return None
-    try:
-        return _fernet().decrypt(value.encode("utf-8")).decode("utf-8")
-    except (InvalidToken, ValueError, TypeError):
+    if decrypt_cache.enabled:
+        cached = decrypt_cache.get(value)
+        if cached is not None:
+            return cached
+    key_version, token = unpack_envelope(value)
+    plaintext = _fernet(key_version).decrypt(token).decode("utf-8")
+    if decrypt_cache.enabled:
+        decrypt_cache.put(value, plaintext)
+    return plaintext
+
+def needs_rotation(value: Optional[bytes]) -> bool:
+    """Indique si une enveloppe a été chiffrée avec une autre clé que la
+    clé principale."""
+    return value is not None and unpack_envelope(value)[0] != primary_key_version()
+
+def reencrypt(value: Optional[bytes]) -> Optional[bytes]:
+    """Rechiffre une enveloppe avec la clé principale si nécessaire."""
+    if not needs_rotation(value):
         return value
+    return encrypt(decrypt(value))
+
+def _decrypt_chunk(values: Sequence[Optional[bytes]]) -> List[Optional[str]]:
+    return [decrypt(value) for value in values]
+
+def _encrypt_chunk(values: Sequence[Optional[str]]) -> List[Optional[bytes]]:
+    return [encrypt(value) for value in values]
+
+def _map_chunks(func, values, workers, chunk_size):
+    """Applique `func` à `values` découpées en paquets répartis sur un pool de
+    threads ; l'ordre des résultats suit celui de `values`."""
+    workers = workers or DECRYPT_WORKERS
+    chunk_size = chunk_size or DECRYPT_CHUNK_SIZE
+    if workers <= 1 or len(values) <= chunk_size:
+        return func(values)
+
+    _keyring()  # initialise les clés avant de partir dans les threads
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    results = []
+    with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        for chunk in pool.map(func, chunks):
+            results.extend(chunk)
+    return results
+
+def decrypt_many(
+    values: Sequence[Optional[bytes]],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Optional[str]]:
+    """Déchiffre une liste de jetons en la découpant en paquets répartis sur
+    un pool de threads. L'ordre des résultats suit celui de `values`.
+    En dessous d'un paquet (ou avec un seul worker), tout reste séquentiel.
+    """
+    return _map_chunks(_decrypt_chunk, values, workers, chunk_size)
+
+def encrypt_many(
+    values: Sequence[Optional[str]],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Optional[bytes]]:
+    """Pendant de `decrypt_many` pour le chiffrement en lot (imports)."""
+    return _map_chunks(_encrypt_chunk, values, workers, chunk_size)
+
+def _blind_index_hmac() -> "hmac.HMAC":
+    """HMAC-SHA256 initialisé une seule fois avec BLIND_INDEX_KEY : le
+    traitement de la clé (pad interne/externe) n'est plus refait par valeur."""
+    global _BLIND_INDEX_HMAC
+    if _BLIND_INDEX_HMAC is None:
+        secret = os.getenv("BLIND_INDEX_KEY")
+        if not secret:
+            raise RuntimeError("BLIND_INDEX_KEY missing in environment")
+        _BLIND_INDEX_HMAC = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+    return _BLIND_INDEX_HMAC
+
+def blind_index_digest(data: bytes) -> str:
+    """HMAC-SHA256 (hex) de `data` avec BLIND_INDEX_KEY."""
+    mac = _blind_index_hmac().copy()
+    mac.update(data)
+    return mac.hexdigest()
 
 def blind_index(value: Optional[str]) -> Optional[str]:
     """Index aveugle non réversible pour recherche/unique (égalité exacte).
@@ -41,27 +251,160 @@ def blind_index(value: Optional[str]) -> Optional[str]:
     """
     if value is None:
         return None
-    secret = os.getenv("BLIND_INDEX_KEY")
-    if not secret:
-        raise RuntimeError("BLIND_INDEX_KEY missing in environment")
-    normalized = value.strip().lower().encode("utf-8")
-    return hmac.new(secret.encode("utf-8"), normalized, hashlib.sha256).hexdigest()
+    return blind_index_digest(value.strip().lower().encode("utf-8"))
+
+def blind_index_many(values: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """`blind_index` appliqué à une liste (imports, rotations...), avec un
+    seul HMAC préparé pour tout le lot."""
+    base = _blind_index_hmac()
+    results: List[Optional[str]] = []
+    for value in values:
+        if value is None:
+            results.append(None)
+            continue
+        mac = base.copy()
+        mac.update(value.strip().lower().encode("utf-8"))
+        results.append(mac.hexdigest())
+    return results
+
+class EncryptedText(TypeDecorator):
+    """Colonne binaire (bytea) contenant une enveloppe chiffrée.
+
+    Le type chiffre les valeurs encore en clair à l'écriture mais ne déchiffre
+    jamais à la lecture : la colonne chargée garde l'enveloppe, le
+    déchiffrement est laissé à `EncryptedAttribute` (au premier accès).
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encrypt(value)
+
+    def process_result_value(self, value, dialect):
+        # psycopg2 renvoie un memoryview pour bytea
+        return bytes(value) if value is not None else None
+
+
+class EncryptedAttribute:
+    """Descripteur exposant en clair une colonne `EncryptedText`.
+
+    - lecture : déchiffre au premier accès puis garde le résultat tant que le
+      texte chiffré sous-jacent ne change pas (expire/refresh invalident donc
+      naturellement le cache) ;
+    - écriture : chiffre la nouvelle valeur, sauf si elle est identique au
+      clair déjà connu (évite de marquer la ligne modifiée pour rien).
+
+    Usage :
+        _email = Column("email", EncryptedText, nullable=False)
+        email = EncryptedAttribute("_email")
+    """
+
+    def __init__(self, column_attr: str):
+        self.column_attr = column_attr
+        self.cache_attr = f"_plain{column_attr}"
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return getattr(owner, self.column_attr)
+        ciphertext = getattr(instance, self.column_attr)
+        cached = instance.__dict__.get(self.cache_attr)
+        if cached is not None and cached[0] == ciphertext:
+            return cached[1]
+        plaintext = decrypt(ciphertext)
+        instance.__dict__[self.cache_attr] = (ciphertext, plaintext)
+        return plaintext
+
+    def __set__(self, instance, value):
+        cached = instance.__dict__.get(self.cache_attr)
+        if (
+            cached is not None
+            and cached[1] == value
+            and cached[0] == getattr(instance, self.column_attr)
+        ):
+            return
+        ciphertext = encrypt(value)
+        setattr(instance, self.column_attr, ciphertext)
+        instance.__dict__[self.cache_attr] = (ciphertext, value)
+
+    def cached(self, instance):
+        """Le clair déjà connu de `instance` (lecture ou écriture précédente),
+        ou None s'il faudrait déchiffrer pour l'obtenir."""
+        cached = instance.__dict__.get(self.cache_attr)
+        if cached is not None and cached[0] == getattr(instance, self.column_attr):
+            return cached[1]
+        return None
+
+
+def decrypt_attributes(
+    instances: Sequence[object],
+    attrs: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> None:
+    """Pré-remplit en un seul lot le cache des `EncryptedAttribute` `attrs`
+    pour toutes les instances (ex. résultat d'un `query(...).all()`), afin
+    que les accès suivants n'aient plus rien à déchiffrer.
+    """
+    if not instances:
+        return
+    owner = type(instances[0])
+    for attr in attrs:
+        descriptor = next(
+            klass.__dict__[attr] for klass in owner.__mro__ if attr in klass.__dict__
+        )
+        ciphertexts = [getattr(obj, descriptor.column_attr) for obj in instances]
+        plaintexts = decrypt_many(ciphertexts, workers, chunk_size)
+        for obj, ciphertext, plaintext in zip(instances, ciphertexts, plaintexts):
+            obj.__dict__[descriptor.cache_attr] = (ciphertext, plaintext)
+
+
+@lru_cache(maxsize=None)
+def _row_type(fields: Tuple[str, ...]):
+    return namedtuple("Row", fields)
+
+
+def decrypt_rows(
+    rows: Sequence[Tuple],
+    fields: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Tuple]:
+    """Déchiffre en lot les colonnes `fields` de lignes projetées (résultat
+    d'un `query(Client.id, Client._email.label("email"), ...)`) et renvoie
+    des tuples nommés légers, sans passer par des entités ORM.
+    """
+    if not rows:
+        return []
+    names = tuple(rows[0]._fields)
+    columns = [list(column) for column in zip(*rows)]
+    for field in fields:
+        index = names.index(field)
+        columns[index] = decrypt_many(columns[index], workers, chunk_size)
+    row_type = _row_type(names)
+    return [row_type._make(values) for values in zip(*columns)]
+
 
 def register_encryption(
     model: Type,
     fields: Iterable[str],
     blind_index_map: Optional[Dict[str, str]] = None,
+    lazy: bool = False,
 ):
     """
     Branche le chiffrement transparent sur un modèle donné.
     - fields: noms d’attributs (colonnes) à chiffrer
     - blind_index_map: mapping { 'email': 'email_bidx', ... } pour conserver une recherche/unique
+    - lazy: si True, pas de déchiffrement au chargement ; les champs doivent
+      alors être exposés via `EncryptedAttribute`, qui déchiffre à l'accès.
     """
     blind_index_map = blind_index_map or {}
+    # En mode lazy, EncryptedAttribute chiffre déjà à l'affectation
+    encrypted_fields = () if lazy else tuple(fields)
 
     @event.listens_for(model, "before_insert")
     def _before_insert(mapper: Mapper, connection, target):
-        for attr in fields:
+        for attr in encrypted_fields:
             val = getattr(target, attr, None)
             setattr(target, attr, encrypt(val))
         for source_attr, bidx_attr in blind_index_map.items():
@@ -69,12 +412,15 @@ def register_encryption(
 
     @event.listens_for(model, "before_update")
     def _before_update(mapper: Mapper, connection, target):
-        for attr in fields:
+        for attr in encrypted_fields:
             val = getattr(target, attr, None)
             setattr(target, attr, encrypt(val))
         for source_attr, bidx_attr in blind_index_map.items():
             setattr(target, bidx_attr, blind_index(getattr(target, source_attr, None)))
 
+    if lazy:
+        return
+
     @event.listens_for(model, "load")
     def _after_load(target, context):
         for attr in fields:
@@ -0,0 +1,137 @@
+"""
+Index aveugles de recherche partielle sur des champs chiffrés.
+
+Chaque valeur indexée est découpée en préfixes et/ou trigrammes normalisés,
+chacun étant passé dans un HMAC (BLIND_INDEX_KEY) avec le nom du champ et le
+type de jeton : la table de jetons ne révèle donc ni les valeurs, ni des
+jetons comparables d'un champ à l'autre. Une recherche est traduite en
+jetons, résolue par l'index de la table, puis les quelques candidats sont
+déchiffrés pour écarter les faux positifs.
+"""
+
+from typing import Dict, Iterable, Sequence, Set, Type
+
+from sqlalchemy import delete, event, inspect, insert
+
+from app.security.crypto import blind_index_digest
+
+PREFIX = "prefix"
+TRIGRAM = "trigram"
+
+# Au-delà, une recherche par préfixe utilise le préfixe tronqué puis vérifie
+# les candidats en clair.
+PREFIX_MAX_LENGTH = 10
+# Nombre de caractères hexadécimaux conservés par jeton
+TOKEN_LENGTH = 32
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _hash(field: str, kind: str, gram: str) -> str:
+    return blind_index_digest(f"{field}\x1f{kind}\x1f{gram}".encode("utf-8"))[
+        :TOKEN_LENGTH
+    ]
+
+
+def _prefixes(text: str) -> Iterable[str]:
+    return (text[:i] for i in range(1, min(len(text), PREFIX_MAX_LENGTH) + 1))
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_tokens(field: str, value: str, kinds: Sequence[str]) -> Set[str]:
+    """Jetons à stocker pour `value`."""
+    text = normalize(value or "")
+    tokens = set()
+    if PREFIX in kinds:
+        tokens.update(_hash(field, PREFIX, gram) for gram in _prefixes(text))
+    if TRIGRAM in kinds:
+        tokens.update(_hash(field, TRIGRAM, gram) for gram in _trigrams(text))
+    return tokens
+
+
+def query_tokens(field: str, query: str, kinds: Sequence[str], prefix: bool) -> Set[str]:
+    """Jetons qu'un client doit tous posséder pour correspondre à `query`.
+
+    Recherche « contient » par trigrammes, recherche par préfixe (ou sur un
+    champ sans trigrammes) par l'index de préfixes. Une recherche « contient »
+    de moins de 3 caractères n'a pas de trigramme : elle est refusée plutôt
+    que ramenée en silence à une recherche par préfixe.
+    """
+    text = normalize(query)
+    if not text:
+        raise ValueError("Empty search query")
+    if not prefix and TRIGRAM in kinds:
+        if len(text) < 3:
+            raise ValueError(
+                f"Substring search needs at least 3 characters, got {text!r}: "
+                "use a prefix search for shorter queries"
+            )
+        return {_hash(field, TRIGRAM, gram) for gram in _trigrams(text)}
+    if PREFIX in kinds:
+        return {_hash(field, PREFIX, text[:PREFIX_MAX_LENGTH])}
+    raise ValueError(f"Field {field} has no index for this kind of search")
+
+
+def matches(value: str, query: str, prefix: bool) -> bool:
+    """Vérification en clair d'un candidat remonté par l'index."""
+    text, needle = normalize(value or ""), normalize(query)
+    return text.startswith(needle) if prefix else needle in text
+
+
+def register_search_index(
+    model: Type,
+    token_model: Type,
+    fields: Dict[str, Sequence[str]],
+    owner_key: str = "client_id",
+):
+    """
+    Maintient la table de jetons `token_model` (colonnes owner_key, field,
+    token) à chaque insertion, mise à jour ou suppression de `model`.
+    - fields: mapping { 'last_name': ('prefix', 'trigram'), ... }
+    """
+    table = token_model.__table__
+    owner_column = table.c[owner_key]
+
+    def _rows(target, names):
+        return rebuild_rows(target, {name: fields[name] for name in names}, owner_key)
+
+    @event.listens_for(model, "after_insert")
+    def _after_insert(mapper, connection, target):
+        rows = _rows(target, fields)
+        if rows:
+            connection.execute(insert(table), rows)
+
+    @event.listens_for(model, "after_update")
+    def _after_update(mapper, connection, target):
+        state = inspect(target)
+        changed = [
+            name
+            for name in fields
+            if state.attrs[getattr(model, name).key].history.has_changes()
+        ]
+        if not changed:
+            return
+        connection.execute(
+            delete(table).where(owner_column == target.id, table.c.field.in_(changed))
+        )
+        rows = _rows(target, changed)
+        if rows:
+            connection.execute(insert(table), rows)
+
+    @event.listens_for(model, "before_delete")
+    def _before_delete(mapper, connection, target):
+        connection.execute(delete(table).where(owner_column == target.id))
+
+
+def rebuild_rows(target, fields: Dict[str, Sequence[str]], owner_key: str = "client_id"):
+    """Toutes les lignes de jetons d'une instance (reconstruction de l'index)."""
+    return [
+        {owner_key: target.id, "field": name, "token": token}
+        for name, kinds in fields.items()
+        for token in index_tokens(name, getattr(target, name), kinds)
+    ]
@@ -0,0 +1,47 @@
+"""
+Micro-benchmark du calcul des index aveugles sur 100 000 emails.
+
+Compare l'ancienne implémentation (clé relue et HMAC recréé à chaque appel),
+`blind_index` (HMAC préparé puis copié) et `blind_index_many`.
+
+Usage :
+    python -m benchmarks.bench_blind_index [--count 100000]
+"""
+
+import hashlib
+import hmac
+import os
+import time
+
+import click
+
+from app.security.crypto import blind_index, blind_index_many
+
+
+def _legacy_blind_index(value):
+    secret = os.getenv("BLIND_INDEX_KEY")
+    normalized = value.strip().lower().encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), normalized, hashlib.sha256).hexdigest()
+
+
+def _measure(label, func, count):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    click.echo(f"{label:<28} {elapsed:8.3f} s  {count / elapsed:12,.0f} emails/s")
+    return elapsed
+
+
+@click.command()
+@click.option("--count", default=100_000, show_default=True, type=int)
+def main(count):
+    os.environ.setdefault("BLIND_INDEX_KEY", "benchmark-blind-index-key")
+    emails = [f"Client.{i}@Example.com" for i in range(count)]
+
+    _measure("hmac.new par appel", lambda: [_legacy_blind_index(e) for e in emails], count)
+    _measure("blind_index", lambda: [blind_index(e) for e in emails], count)
+    _measure("blind_index_many", lambda: blind_index_many(emails), count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark de l'import en masse de clients (`import-clients`).
+
+Génère un fichier CSV de N clients puis l'importe dans une base SQLite
+temporaire avec `import_records` : lecture en flux, chiffrement et index
+aveugle par lots, insertion multi-lignes. Affiche le débit obtenu ; l'objectif
+est de rester nettement sous la minute pour 100 000 clients. Avec l'index de
+recherche (une quarantaine de jetons par client), l'écriture des jetons domine :
+comparer avec --skip-search-index.
+
+Usage :
+    python -m benchmarks.bench_import_clients [--count 100000] [--batch-size 1000]
+"""
+
+import os
+import tempfile
+import time
+
+import click
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import Session
+
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode("utf-8"))
+os.environ.setdefault("BLIND_INDEX_KEY", "benchmark-blind-index-key")
+os.environ.setdefault("DB_PORT", "5432")
+
+from app.cli.bulk import RejectFile, import_records, read_records  # noqa: E402
+from app.models import Client, Collaborator  # noqa: E402
+from app.models.base import Base  # noqa: E402
+
+
+def _write_source(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("first_name,last_name,email,phone,company_name\n")
+        for i in range(count):
+            f.write(f"Prénom{i},Nom{i},client{i}@example.com,0600000000,Entreprise {i % 500}\n")
+
+
+@click.command()
+@click.option("--count", default=100_000, show_default=True, type=int)
+@click.option("--batch-size", default=1000, show_default=True, type=int)
+@click.option("--skip-search-index", is_flag=True)
+def main(count, batch_size, skip_search_index):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+
+        @event.listens_for(engine, "connect")
+        def _pragmas(dbapi_connection, record):
+            # Cache assez grand pour garder les index aléatoires des jetons en
+            # mémoire, comme shared_buffers sous PostgreSQL
+            dbapi_connection.execute("PRAGMA cache_size=-500000")
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+        Base.metadata.create_all(engine)
+        source = os.path.join(tmp, "clients.csv")
+        _write_source(source, count)
+
+        with Session(engine) as session:
+            session.add(
+                Collaborator(id=1, first_name="B", last_name="B", email="b@b", password="x")
+            )
+            session.commit()
+
+            rejects = RejectFile(os.path.join(tmp, "rejects.ndjson"))
+            started = time.perf_counter()
+            with open(source, encoding="utf-8") as f:
+                imported = import_records(
+                    session,
+                    read_records(f, "csv"),
+                    1,
+                    rejects,
+                    batch_size=batch_size,
+                    with_search_index=not skip_search_index,
+                )
+            elapsed = time.perf_counter() - started
+            rejects.close()
+
+            assert session.query(func.count(Client.id)).scalar() == imported
+        click.echo(
+            f"{imported} clients importés en {elapsed:.2f} s "
+            f"({imported / elapsed:,.0f} clients/s), {rejects.count} rejetés"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark de lecture d'une liste de clients : entités ORM complètes contre
+projection de colonnes.
+
+Compare, sur une base SQLite temporaire de N clients chiffrés :
+- `query(Client).all()` puis déchiffrement des trois colonnes affichées
+  (`decrypt_attributes`) ;
+- `query(*LIST_COLUMNS)` puis `decrypt_rows` (commande list-clients).
+
+Affiche le temps et le pic mémoire (tracemalloc) de chaque variante.
+
+Usage :
+    python -m benchmarks.bench_list_projection [--count 100000]
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import click
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode("utf-8"))
+os.environ.setdefault("BLIND_INDEX_KEY", "benchmark-blind-index-key")
+os.environ.setdefault("DB_PORT", "5432")
+
+from app.cli.client import LIST_COLUMNS, LIST_ENCRYPTED_FIELDS  # noqa: E402
+from app.models import Client, Collaborator  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.security.crypto import (  # noqa: E402
+    decrypt_attributes,
+    decrypt_cache,
+    decrypt_rows,
+    encrypt,
+)
+
+
+def _populate(engine, count):
+    with Session(engine) as session:
+        session.add(
+            Collaborator(
+                id=1, first_name="B", last_name="B", email="b@b", password="x"
+            )
+        )
+        session.commit()
+        rows = [
+            {
+                "_first_name": encrypt(f"Prénom{i}"),
+                "_last_name": encrypt(f"Nom{i}"),
+                "_email": encrypt(f"client{i}@example.com"),
+                "_phone": encrypt("0600000000"),
+                "_company_name": encrypt(f"Entreprise {i}"),
+                "email_bidx": str(i),
+                "commercial_contact_id": 1,
+            }
+            for i in range(count)
+        ]
+        # Insertion en Core : pas de listeners ORM (index de recherche)
+        session.execute(insert(Client), rows)
+        session.commit()
+
+
+def _entities(engine):
+    with Session(engine) as session:
+        clients = session.query(Client).all()
+        decrypt_attributes(clients, LIST_ENCRYPTED_FIELDS)
+        return len([(c.id, c.first_name, c.last_name, c.email) for c in clients])
+
+
+def _projection(engine):
+    with Session(engine) as session:
+        rows = session.query(*LIST_COLUMNS).all()
+        return len(decrypt_rows(rows, LIST_ENCRYPTED_FIELDS))
+
+
+def _measure(label, func, engine):
+    decrypt_cache.clear()
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func(engine)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    click.echo(f"{label:<22} {count} lignes  {elapsed:7.2f} s  pic {peak / 2**20:8.1f} Mo")
+
+
+@click.command()
+@click.option("--count", default=100_000, show_default=True, type=int)
+def main(count):
+    # Le cache de déchiffrement fausserait la comparaison
+    decrypt_cache.max_size = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        click.echo(f"Création de {count} clients chiffrés...")
+        _populate(engine, count)
+
+        _measure("entités ORM", _entities, engine)
+        _measure("projection", _projection, engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark du temps de démarrage de la CLI, commande par commande.
+
+Pour chaque commande de `app.cli.main.COMMANDS` (et pour `--help` seul),
+lance `python -X importtime -m app.cli.main <commande> --help` dans un
+nouvel interpréteur et rapporte :
+- le temps d'import cumulé des modules (somme des imports de premier niveau
+  rapportés par -X importtime) ;
+- les modules les plus coûteux importés par la commande ;
+- le temps total du processus.
+
+`--json` écrit une ligne JSON par commande pour suivre l'évolution dans le
+temps (CI, comparaison entre deux versions).
+
+Usage :
+    python -m benchmarks.bench_startup [--runs 5] [--json] [commande ...]
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+
+from app.cli.main import COMMANDS
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _run(args):
+    """Lance la CLI une fois ; retourne (durée totale, [(cumul µs, module)] de premier niveau)."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "app.cli.main", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    elapsed = time.perf_counter() - started
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        # Niveau 1 : importés directement par le processus (site, app.cli.main...)
+        if match and len(match[3]) == 1:
+            imports.append((int(match[2]), match[4]))
+    return elapsed, imports
+
+
+def measure(args, runs):
+    """Médiane sur `runs` lancements (le premier sert à chauffer le cache disque)."""
+    _run(args)
+    samples = [_run(args) for _ in range(runs)]
+    wall = statistics.median(s[0] for s in samples)
+    import_us = statistics.median(sum(us for us, _ in s[1]) for s in samples)
+    # Modules les plus lents du dernier lancement
+    top = sorted(samples[-1][1], reverse=True)[:3]
+    return {
+        "command": " ".join(args),
+        "wall_ms": round(wall * 1000, 1),
+        "import_ms": round(import_us / 1000, 1),
+        "top_imports": [{"module": name, "ms": round(us / 1000, 1)} for us, name in top],
+    }
+
+
+@click.command()
+@click.option("--runs", default=5, show_default=True, type=int)
+@click.option("--json", "as_json", is_flag=True, help="Une ligne JSON par commande")
+@click.argument("commands", nargs=-1)
+def main(runs, as_json, commands):
+    targets = [["--help"]] + [[name, "--help"] for name in (commands or sorted(COMMANDS))]
+    for args in targets:
+        data = measure(args, runs)
+        if as_json:
+            click.echo(json.dumps(data, ensure_ascii=False))
+        else:
+            top = ", ".join(f"{t['module']} {t['ms']} ms" for t in data["top_imports"])
+            click.echo(
+                f"{data['command']:<32} {data['wall_ms']:8.1f} ms  "
+                f"imports {data['import_ms']:7.1f} ms  ({top})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,9 @@
-from sqlalchemy import create_engine
-from app.config import DATABASE_URL
-from app.models.base import Base
-from app.models.client import Client
-from app.models.contract import Contract
-from app.models.event import Event
-from app.models.collaborator import Collaborator
-from app.models.department import Department
+from app.db.migrate import upgrade
 
 
 def init_db():
-    engine = create_engine(DATABASE_URL)
-    Base.metadata.create_all(engine)
+    # Crée le schéma puis applique les migrations versionnées (voir app/db/migrate.py)
+    upgrade()
     print("Base de données initialisée.")
 
 
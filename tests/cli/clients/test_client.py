@@ -1,8 +1,12 @@
+import json
 from click.testing import CliRunner
-from app.cli.client import create_client, update_client
+from app.cli.bulk import import_clients, upsert_clients
+from app.cli.client import create_client, list_clients, update_client
 from app.auth.auth import create_token
 from app.db.session import SessionLocal
-from app.models.client import Client
+from app.models.client import Client, ENCRYPTED_FIELDS, content_digest
+from app.models.client_search_token import ClientSearchToken
+from app.security.crypto import blind_index
 
 
 def test_create_client_success(fake_sales_user):
@@ -76,6 +80,37 @@ def test_update_client_success(fake_sales_user, existing_client):
     session.close()
 
 
+def test_update_client_from_options_decrypts_nothing(
+    fake_sales_user, existing_client, assert_max_decrypts
+):
+    runner = CliRunner()
+    token = create_token(fake_sales_user.id)
+    args = ["--token", token, "--client-id", str(existing_client.id)]
+    for option, value in (
+        ("--first-name", "Alice"),
+        ("--last-name", "Options"),
+        ("--email", "alice@options.com"),
+        ("--phone", "0707070707"),
+        ("--company-name", "OptionsCorp"),
+    ):
+        args += [option, value]
+
+    # Toutes les valeurs en option : les valeurs actuelles ne sont pas déchiffrées
+    with assert_max_decrypts(0):
+        result = runner.invoke(update_client, args)
+
+    assert result.exit_code == 0
+    assert "Client mis à jour avec succès" in result.output
+
+    # Un seul champ demandé : seule sa valeur actuelle est déchiffrée
+    args = args[:-2]
+    with assert_max_decrypts(1):
+        result = runner.invoke(update_client, args, input="\n")
+
+    assert result.exit_code == 0
+    assert "Entreprise [OptionsCorp]" in result.output
+
+
 def test_update_client_unauthorized(fake_support_user, another_client):
     runner = CliRunner()
     token = create_token(fake_support_user.id)
@@ -90,3 +125,192 @@ def test_update_client_unauthorized(fake_support_user, another_client):
         "Accès refusé : cette action est réservée au(x) département(s) : commercial"
         in result.output
     )
+
+
+def test_client_update_decrypts_only_changed_fields(
+    fake_sales_user, fake_manager_user, existing_client, assert_max_decrypts
+):
+    session = SessionLocal()
+    client = session.get(Client, existing_client.id)
+    digest, bidx = client.content_digest, client.email_bidx
+
+    # Mise à jour sans champ chiffré : empreinte et index aveugle inchangés
+    with assert_max_decrypts(0):
+        client.commercial_contact_id = fake_manager_user.id
+        session.commit()
+    assert (client.content_digest, client.email_bidx) == (digest, bidx)
+
+    # Un seul champ chiffré modifié : les autres ne sont pas déchiffrés, et
+    # sans leur clair l'empreinte est effacée plutôt que recalculée
+    with assert_max_decrypts(0):
+        client.phone = "0101010101"
+        client.commercial_contact_id = fake_sales_user.id
+        session.commit()
+    assert client.content_digest is None
+    assert client.email_bidx == bidx
+
+    # Clairs connus : l'empreinte est recalculée sans déchiffrement
+    values = {field: getattr(client, field) for field in ENCRYPTED_FIELDS}
+    with assert_max_decrypts(0):
+        client.company_name = values["company_name"] = "NewCorp"
+        session.commit()
+    assert client.content_digest == content_digest(values)
+    session.close()
+
+
+def test_list_clients_keyset_page(fake_sales_user, existing_client):
+    runner = CliRunner()
+    token = create_token(fake_sales_user.id)
+
+    result = runner.invoke(
+        list_clients,
+        args=[
+            "--token",
+            token,
+            "--after-id",
+            str(existing_client.id - 1),
+            "--limit",
+            "1",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert f"{existing_client.id} - Alice Client (alice@old.com)" in result.output
+
+
+def test_list_clients_query_count(fake_sales_user, existing_client, assert_max_queries):
+    runner = CliRunner()
+    token = create_token(fake_sales_user.id)
+
+    # Authentification + une page : indépendant du nombre de clients
+    with assert_max_queries(2):
+        result = runner.invoke(list_clients, args=["--token", token])
+
+    assert result.exit_code == 0
+
+
+def test_create_client_from_options_ndjson(fake_sales_user):
+    runner = CliRunner()
+    token = create_token(fake_sales_user.id)
+
+    result = runner.invoke(
+        create_client,
+        args=[
+            "--token",
+            token,
+            "--first-name",
+            "Script",
+            "--last-name",
+            "Client",
+            "--email",
+            "script@example.com",
+            "--phone",
+            "0102030405",
+            "--company-name",
+            "ScriptCorp",
+            "--format",
+            "ndjson",
+        ],
+    )
+
+    assert result.exit_code == 0
+    created = json.loads(result.output)
+    assert created["email"] == "script@example.com"
+    assert created["commercial_contact_id"] == fake_sales_user.id
+
+
+def test_import_clients_batches_and_rejects(fake_sales_user, tmp_path):
+    runner = CliRunner()
+    token = create_token(fake_sales_user.id)
+    source = tmp_path / "clients.csv"
+    source.write_text(
+        "first_name,last_name,email,phone,company_name\n"
+        "Ana,Import,ana.import@example.com,0600000001,Acme\n"
+        "Bob,Import,bob.import@example.com,0600000002,Acme\n"
+        "Eve,Import,pas-un-email,0600000003,Acme\n"
+        "Ana,Doublon,ana.import@example.com,0600000004,Acme\n"
+        "Cid,Import,cid.import@example.com,0600000005,Acme\n",
+        encoding="utf-8",
+    )
+
+    result = runner.invoke(
+        import_clients,
+        ["--token", token, str(source), "--batch-size", "2", "--format", "json"],
+    )
+
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result.stdout)[0]
+    assert summary["imported"] == 3
+    assert summary["rejected"] == 2
+    rejects = [
+        json.loads(line)
+        for line in (tmp_path / "clients.csv.rejects.ndjson").read_text().splitlines()
+    ]
+    assert [(r["line"], r["error"]) for r in rejects] == [
+        (4, "email invalide : pas-un-email"),
+        (5, "email déjà existant"),
+    ]
+
+    session = SessionLocal()
+    emails = ["ana.import@example.com", "bob.import@example.com", "cid.import@example.com"]
+    clients = (
+        session.query(Client)
+        .filter(Client.email_bidx.in_([blind_index(e) for e in emails]))
+        .order_by(Client.id)
+        .all()
+    )
+    assert [c.email for c in clients] == emails
+    assert {c.commercial_contact_id for c in clients} == {fake_sales_user.id}
+    # Jetons de recherche écrits avec le lot (search-clients)
+    assert session.query(ClientSearchToken).filter(
+        ClientSearchToken.client_id == clients[0].id
+    ).count()
+    for client in clients:
+        session.delete(client)
+    session.commit()
+    session.close()
+
+
+def test_upsert_clients_rewrites_only_changes(fake_sales_user, tmp_path):
+    runner = CliRunner()
+    token = create_token(fake_sales_user.id)
+    header = "first_name,last_name,email,phone,company_name\n"
+    source = tmp_path / "crm.csv"
+    source.write_text(
+        header
+        + "Ana,Sync,ana.sync@example.com,0600000001,Acme\n"
+        + "Bob,Sync,bob.sync@example.com,0600000002,Acme\n",
+        encoding="utf-8",
+    )
+    args = ["--token", token, str(source), "--format", "json"]
+
+    first = json.loads(runner.invoke(upsert_clients, args).stdout)[0]
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (2, 0, 0)
+
+    session = SessionLocal()
+    ana = session.query(Client).filter(Client.email_bidx == blind_index("ana.sync@example.com")).one()
+    ana_id, ana_first_name, ana_phone = ana.id, ana._first_name, ana._phone
+    session.close()
+
+    source.write_text(
+        header
+        + "Ana,Sync,ana.sync@example.com,0700000001,Acme\n"
+        + "Bob,Sync,bob.sync@example.com,0600000002,Acme\n"
+        + "Cid,Sync,cid.sync@example.com,0600000003,Acme\n",
+        encoding="utf-8",
+    )
+    second = json.loads(runner.invoke(upsert_clients, args).stdout)[0]
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (1, 1, 1)
+
+    session = SessionLocal()
+    ana = session.get(Client, ana_id)
+    assert ana.phone == "0700000001"
+    assert ana._phone != ana_phone
+    # Champ inchangé : texte chiffré conservé, pas rechiffré
+    assert ana._first_name == ana_first_name
+    for email in ("ana.sync@example.com", "bob.sync@example.com", "cid.sync@example.com"):
+        session.delete(
+            session.query(Client).filter(Client.email_bidx == blind_index(email)).one()
+        )
+    session.commit()
+    session.close()
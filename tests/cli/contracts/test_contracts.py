@@ -1,5 +1,5 @@
 from click.testing import CliRunner
-from app.cli.contract import create_contract, update_contract
+from app.cli.contract import create_contract, sign_contract, update_contract
 from app.auth.auth import create_token
 from app.models import Contract
 from app.db.session import SessionLocal
@@ -93,3 +93,15 @@ def test_update_contract_unauthorized_user(fake_sales_user, existing_client):
     session.delete(contract)
     session.commit()
     session.close()
+
+
+def test_sign_contract_not_found(fake_manager_user):
+    runner = CliRunner()
+    token = create_token(fake_manager_user.id)
+
+    result = runner.invoke(
+        sign_contract, ["--token", token, "--contract-id", "999999", "--yes"]
+    )
+
+    assert result.exit_code == 0
+    assert "Contrat introuvable." in result.output
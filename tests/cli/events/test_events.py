@@ -1,5 +1,5 @@
 from app.auth.auth import create_token
-from app.cli.event import create_event, update_event
+from app.cli.event import create_event, list_events, update_event
 from click.testing import CliRunner
 from app.db.session import SessionLocal
 from app.models.event import Event
@@ -73,3 +73,35 @@ def test_update_event_unauthorized():
         result.exit_code != 0
         or "Utilisateur ou département introuvable" in result.output
     )
+
+
+def test_create_event_query_count(contract, assert_max_queries):
+    runner = CliRunner()
+    token = create_token(contract.sales_contact_id)
+
+    # Le client du contrat est chargé avec lui (joinedload), pas à la demande
+    with assert_max_queries(5):
+        result = runner.invoke(
+            create_event,
+            input=f"{contract.id}\nqueryCount\nLieu\n2025-10-10 12:00\n2025-10-11 12:00\n5\n\n",
+            args=["--token", token],
+        )
+
+    assert result.exit_code == 0
+
+    session = SessionLocal()
+    created_event = session.query(Event).filter_by(name="queryCount").first()
+    if created_event:
+        session.delete(created_event)
+        session.commit()
+    session.close()
+
+
+def test_list_events_query_count(fake_manager_user, assert_max_queries):
+    runner = CliRunner()
+    token = create_token(fake_manager_user.id)
+
+    with assert_max_queries(2):
+        result = runner.invoke(list_events, args=["--token", token])
+
+    assert result.exit_code == 0
@@ -0,0 +1,107 @@
+import json
+from click.testing import CliRunner
+from app.cli.batch import run_batch
+from app.auth.auth import create_token
+from app.db.session import SessionLocal
+from app.models.contract import Contract
+
+
+def _contracts(client, count):
+    session = SessionLocal()
+    contracts = [
+        Contract(
+            client_id=client.id,
+            sales_contact_id=client.commercial_contact_id,
+            amount=1000,
+            remaining_amount=1000,
+            signed=False,
+        )
+        for _ in range(count)
+    ]
+    session.add_all(contracts)
+    session.commit()
+    ids = [c.id for c in contracts]
+    session.close()
+    return ids
+
+
+def _cleanup(ids):
+    session = SessionLocal()
+    session.query(Contract).filter(Contract.id.in_(ids)).delete()
+    session.commit()
+    session.close()
+
+
+def _write(path, operations):
+    path.write_text("\n".join(json.dumps(op) for op in operations) + "\n", encoding="utf-8")
+
+
+def test_run_batch_reports_errors_per_line(fake_sales_user, existing_client, tmp_path):
+    first, second = _contracts(existing_client, 2)
+    path = tmp_path / "ops.ndjson"
+    _write(
+        path,
+        [
+            {"op": "sign-contracts", "contract_id": first},
+            {"op": "update-contract", "contract-id": second, "amount": 1500},
+            {"op": "sign-contracts", "contract_id": 999999},
+            {"op": "assign-support-to-event", "event_id": 1, "support_id": 1},
+        ],
+    )
+    token = create_token(fake_sales_user.id)
+
+    try:
+        result = CliRunner().invoke(
+            run_batch,
+            ["--token", token, str(path), "--transaction-size", "2", "--format", "ndjson"],
+        )
+
+        assert result.exit_code == 0, result.output
+        rows = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [(r["line"], r["status"]) for r in rows] == [
+            (1, "ok"),
+            (2, "ok"),
+            (3, "error"),
+            (4, "error"),
+        ]
+        assert rows[2]["error"] == "Contrat introuvable."
+        assert "gestion" in rows[3]["error"]
+
+        session = SessionLocal()
+        assert session.get(Contract, first).signed is True
+        assert session.get(Contract, second).amount == 1500
+        session.close()
+    finally:
+        _cleanup([first, second])
+
+
+def test_run_batch_all_or_nothing_yaml(fake_sales_user, existing_client, tmp_path):
+    (first,) = _contracts(existing_client, 1)
+    path = tmp_path / "ops.yaml"
+    path.write_text(
+        f"- op: sign-contracts\n  contract_id: {first}\n"
+        "- op: update-contract\n  contract_id: abc\n",
+        encoding="utf-8",
+    )
+    token = create_token(fake_sales_user.id)
+
+    try:
+        result = CliRunner().invoke(
+            run_batch, ["--token", token, str(path), "--all-or-nothing", "--format", "ndjson"]
+        )
+
+        assert result.exit_code == 0, result.output
+        rows = [json.loads(line) for line in result.stdout.splitlines()]
+        # Aucune ligne n'est rapportée "ok" avant l'annulation
+        assert [(r["line"], r["status"]) for r in rows] == [(1, "rolled_back"), (3, "error")]
+        assert rows[1]["error"].startswith("contract_id")
+        assert "aucune opération n'a été appliquée" in result.stderr
+
+        # Rien n'a été écrit en base
+        session = SessionLocal()
+        contract = session.get(Contract, first)
+        assert contract.signed is False
+        assert contract.signed_date is None
+        session.close()
+    finally:
+        _cleanup([first])
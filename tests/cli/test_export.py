@@ -0,0 +1,118 @@
+import csv
+import gzip
+import json
+import pytest
+from click.testing import CliRunner
+from app.cli.export import export
+from app.auth.auth import create_token, hash_password
+from app.db.session import SessionLocal
+from app.models import Collaborator, Department
+
+
+def test_export_contracts_with_decrypted_client_gzip(fake_manager_user, contract, tmp_path):
+    runner = CliRunner()
+    token = create_token(fake_manager_user.id)
+    path = tmp_path / "contracts.ndjson.gz"
+
+    result = runner.invoke(
+        export,
+        ["--token", token, "contracts-clients", "-o", str(path), "--where", f"id={contract.id}"],
+    )
+
+    assert result.exit_code == 0, result.output
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 1
+    assert rows[0]["id"] == contract.id
+    assert rows[0]["client_company_name"] == "OldCorp"
+    assert rows[0]["client_email"] == "alice@old.com"
+
+
+def test_export_resumes_after_id_without_repeating_header(
+    fake_manager_user, existing_client, another_client, tmp_path
+):
+    runner = CliRunner()
+    token = create_token(fake_manager_user.id)
+    path = tmp_path / "clients.csv"
+    first, second = sorted((existing_client.id, another_client.id))
+    where = ["--where", f"id in ({first}, {second})"]
+
+    runner.invoke(export, ["--token", token, "clients", "-o", str(path), "--page-size", "1"] + where)
+    # Reprise après le premier client, comme après une interruption
+    lines = path.read_text(encoding="utf-8").splitlines()
+    path.write_text("\n".join(lines[:2]) + "\n", encoding="utf-8")
+    result = runner.invoke(
+        export,
+        ["--token", token, "clients", "-o", str(path), "--after-id", str(first), "--append"] + where,
+    )
+
+    assert result.exit_code == 0, result.output
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row["id"]) for row in rows] == [first, second]
+    assert "alice@old.com" in {row["email"] for row in rows}
+
+
+
+def test_export_invalid_where_is_a_usage_error(fake_manager_user, tmp_path, assert_max_queries):
+    token = create_token(fake_manager_user.id)
+    path = tmp_path / "contracts.csv"
+
+    with assert_max_queries(0):
+        result = CliRunner().invoke(
+            export, ["--token", token, "contracts", "-o", str(path), "--where", "nope=1"]
+        )
+
+    assert result.exit_code == 2
+    assert "--where" in result.output
+    assert "Erreur de permission" not in result.output
+    assert not path.exists()
+
+
+def test_failed_export_exits_non_zero(fake_manager_user, contract, tmp_path, monkeypatch):
+    def fail(rows, fields):
+        raise RuntimeError("disque plein")
+
+    monkeypatch.setattr("app.cli.export.decrypt_rows", fail)
+    token = create_token(fake_manager_user.id)
+
+    result = CliRunner().invoke(
+        export, ["--token", token, "contracts", "-o", str(tmp_path / "contracts.csv")]
+    )
+
+    assert result.exit_code == 1
+    assert "Reprendre avec --after-id 0 --append" in result.output
+
+@pytest.fixture
+def support_user():
+    """Un collaborateur du département support, résolu par son nom."""
+    session = SessionLocal()
+    department = session.query(Department).filter_by(name="support").one()
+    user = Collaborator(
+        first_name="Sam",
+        last_name="Support",
+        email="export.support@test.com",
+        password=hash_password("test123"),
+        department_id=department.id,
+    )
+    session.add(user)
+    session.commit()
+    yield user
+    session.delete(user)
+    session.commit()
+    session.close()
+
+
+def test_export_refused_to_support(support_user, tmp_path):
+    runner = CliRunner()
+    token = create_token(support_user.id)
+    path = tmp_path / "clients.csv"
+
+    result = runner.invoke(export, ["--token", token, "clients", "-o", str(path)])
+
+    assert result.exit_code == 0
+    assert (
+        "Accès refusé : cette action est réservée au(x) département(s) : gestion"
+        in result.output
+    )
+    assert not path.exists()
@@ -1,5 +1,12 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
 from click.testing import CliRunner
-from app.cli.main import login
+from app.auth import token_cache
+from app.auth.auth import JWT_ALGORITHM, JWT_SECRET, create_refresh_token, create_token, verify_claims
+from app.cli.main import list_events, login, refresh
+from app.db.session import SessionLocal
+from app.models.collaborator import Collaborator
 
 
 def test_login_success(fake_user):
@@ -24,3 +31,52 @@ def test_login_user_not_found():
 
     assert result.exit_code == 0
     assert "Utilisateur non trouvé" in result.output
+
+
+def test_login_caches_tokens_used_by_commands(fake_user, token_cache_path):
+    runner = CliRunner()
+    runner.invoke(login, input="test@login.com\ntest123\n")
+    cache = token_cache.load()
+    assert cache["user_id"] == fake_user.id
+
+    # Aucun --token ni invite : le token du cache est utilisé
+    result = runner.invoke(list_events, [])
+    assert "Token:" not in result.output
+    assert "Erreur" not in result.output
+
+
+def test_expired_cached_token_is_renewed_without_password(fake_user, token_cache_path):
+    expired = jwt.encode(
+        {"user_id": fake_user.id, "exp": datetime.now(timezone.utc) - timedelta(minutes=1)},
+        JWT_SECRET,
+        algorithm=JWT_ALGORITHM,
+    )
+    token_cache.save(expired, create_refresh_token(fake_user.id, 0), fake_user.id)
+
+    assert token_cache.cached_access_token() != expired
+    assert verify_claims(token_cache.load()["access_token"])["user_id"] == fake_user.id
+
+    result = CliRunner().invoke(refresh, [])
+    assert "Token renouvelé" in result.output
+
+
+def test_refresh_rejected_after_revocation(fake_user, token_cache_path):
+    token_cache.save("expired", create_refresh_token(fake_user.id, 0), fake_user.id)
+    session = SessionLocal()
+    session.get(Collaborator, fake_user.id).token_version = 1
+    session.commit()
+    session.close()
+
+    result = CliRunner().invoke(refresh, [])
+
+    assert "révoqué" in result.output
+    assert token_cache.cached_access_token() is None
+
+
+def test_token_prompt_hides_input(fake_user):
+    token = create_token(fake_user.id)
+    result = CliRunner().invoke(list_events, input=f"{token}\n")
+
+    assert result.exit_code == 0
+    assert "Token:" in result.output
+    assert token not in result.output
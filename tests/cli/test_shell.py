@@ -0,0 +1,80 @@
+from click.testing import CliRunner
+from app.cli.main import COMMANDS
+from app.cli.shell import CompletionIndex, Completer, shell, touched_ids
+from app.auth.auth import create_token
+from app.db.session import SessionLocal
+
+
+def test_completion_index_refreshes_incrementally(existing_client, contract, assert_max_decrypts):
+    session = SessionLocal()
+    index = CompletionIndex()
+    # Les contrats sont libellés par leur client : les clients sont chargés aussi
+    index.refresh(session, ["contract"])
+
+    assert (existing_client.id, "Alice Client (OldCorp)") in index.matches("client", "alice")
+    assert index.matches("contract", str(contract.id))[0][1].startswith("Alice Client (OldCorp)")
+
+    client = session.get(type(existing_client), existing_client.id)
+    client.company_name = "NewCorp"
+    session.commit()
+    session.expire_all()
+
+    # Sans `touch`, seules les nouvelles lignes sont lues : rien à déchiffrer
+    with assert_max_decrypts(0):
+        index.refresh(session)
+    assert index.labels["client"][existing_client.id] == "Alice Client (OldCorp)"
+
+    index.touch("client", [existing_client.id])
+    index.refresh(session)
+    session.close()
+
+    assert index.labels["client"][existing_client.id] == "Alice Client (NewCorp)"
+
+
+def test_completer_proposes_commands_options_and_ids(existing_client):
+    index = CompletionIndex()
+    completer = Completer(COMMANDS, index)
+
+    assert "update-event" in completer.candidates("", "update-e")
+    assert "--client-id" in completer.candidates("create-contract ", "--cl")
+    assert str(existing_client.id) in completer.candidates("create-contract --client-id ", "oldc")
+    assert index.labels["contract"] == {}
+    assert touched_ids(["update-event", "--event-id", "12", "--name", "x"]) == [("event", 12)]
+
+
+def test_shell_runs_commands_with_session_token(fake_sales_user, existing_client):
+    token = create_token(fake_sales_user.id, "commercial")
+    result = CliRunner().invoke(
+        shell,
+        ["--token", token],
+        input="list-clients --where 'email=alice@old.com'\nserve\nexit\n",
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Token" not in result.output
+    assert f"{existing_client.id} - Alice Client (alice@old.com)" in result.output
+    assert "serve n'est pas disponible dans le shell." in result.output
+
+
+def test_completion_index_loads_each_kind_on_first_use(existing_client, assert_max_decrypts):
+    index = CompletionIndex()
+
+    # Compléter un événement ne lit ni ne déchiffre les clients
+    with assert_max_decrypts(0):
+        index.refresh_if_stale("event")
+    assert index.labels["client"] == {}
+
+    index.refresh_if_stale("client")
+    assert index.labels["client"][existing_client.id] == "Alice Client (OldCorp)"
+
+    index.clear()
+    assert index.labels["client"] == {}
+
+
+def test_shell_opens_without_loading_labels(fake_sales_user, existing_client, assert_max_decrypts):
+    token = create_token(fake_sales_user.id, "commercial")
+
+    with assert_max_decrypts(0):
+        result = CliRunner().invoke(shell, ["--token", token], input="exit\n")
+
+    assert result.exit_code == 0, result.output
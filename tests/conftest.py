@@ -1,9 +1,86 @@
 import pytest
-from app.db.session import SessionLocal
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.db.session import SessionLocal, engine
 from app.models import Collaborator
 from app.auth.auth import hash_password
 from app.models.client import Client
 from app.models.contract import Contract
+from app.security import crypto
+
+
+@pytest.fixture(autouse=True)
+def token_cache_path(tmp_path, monkeypatch):
+    """Isole le cache de jetons de `login` dans un dossier temporaire."""
+    path = tmp_path / "credentials.json"
+    monkeypatch.setenv("EPIC_TOKEN_CACHE", str(path))
+    return path
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Vérifie qu'un bloc n'exécute pas plus de `max_queries` requêtes SQL.
+
+    Usage :
+        with assert_max_queries(3):
+            runner.invoke(list_clients, ...)
+
+    Permet de détecter les requêtes N+1 (chargements paresseux en boucle) :
+    la liste des requêtes exécutées est affichée en cas d'échec.
+    """
+
+    @contextmanager
+    def _assert_max_queries(max_queries):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+        assert len(statements) <= max_queries, (
+            f"{len(statements)} requêtes exécutées (maximum {max_queries}) :\n"
+            + "\n\n".join(statements)
+        )
+
+    return _assert_max_queries
+
+
+@pytest.fixture
+def assert_max_decrypts(monkeypatch):
+    """
+    Vérifie qu'un bloc ne déchiffre pas plus de `max_decrypts` valeurs.
+
+    Usage :
+        with assert_max_decrypts(0):
+            session.commit()
+    """
+
+    @contextmanager
+    def _assert_max_decrypts(max_decrypts):
+        calls = []
+        decrypt = crypto.decrypt
+
+        def _record(value):
+            calls.append(value)
+            return decrypt(value)
+
+        monkeypatch.setattr(crypto, "decrypt", _record)
+        try:
+            yield calls
+        finally:
+            monkeypatch.setattr(crypto, "decrypt", decrypt)
+
+        assert len(calls) <= max_decrypts, (
+            f"{len(calls)} valeurs déchiffrées (maximum {max_decrypts})"
+        )
+
+    return _assert_max_decrypts
 
 
 @pytest.fixture
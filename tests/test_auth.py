@@ -1,4 +1,17 @@
-from app.auth.auth import hash_password, verify_password, create_token, decode_token
+import os
+
+import jwt
+import pytest
+from app.auth import token_cache
+from app.auth.auth import (
+    hash_password,
+    verify_password,
+    create_refresh_token,
+    create_token,
+    decode_token,
+    verify_claims,
+    verify_refresh_claims,
+)
 
 
 def test_hash_and_verify_password():
@@ -10,3 +23,46 @@ def test_hash_and_verify_password():
 def test_token_creation_and_decoding():
     token = create_token(42)
     assert decode_token(token) == 42
+
+
+def test_token_embeds_department_claims():
+    token = create_token(42, "gestion", 3)
+    claims = verify_claims(token)
+    assert claims["user_id"] == 42
+    assert claims["department"] == "gestion"
+    assert claims["ver"] == 3
+
+
+def test_refresh_token_is_not_an_access_token():
+    refresh_token = create_refresh_token(42, 3)
+
+    assert verify_refresh_claims(refresh_token)["ver"] == 3
+    assert decode_token(refresh_token) is None
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_claims(refresh_token)
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_refresh_claims(create_token(42, "gestion", 3))
+
+
+def test_token_cache_is_private(token_cache_path):
+    token_cache.save("access", "refresh", 42)
+
+    assert os.stat(token_cache_path).st_mode & 0o777 == 0o600
+    assert token_cache.load()["refresh_token"] == "refresh"
+
+    # Lisible par d'autres utilisateurs : ignoré
+    os.chmod(token_cache_path, 0o644)
+    assert token_cache.load() is None
+    assert token_cache.clear() is True
+
+
+def test_warmed_token_versions_need_no_query(fake_user, assert_max_queries):
+    from app.auth.permissions import current_token_version, warm_token_versions
+    from app.db.session import SessionLocal
+
+    user_id, version = fake_user.id, fake_user.token_version
+    session = SessionLocal()
+    warm_token_versions(session)
+    with assert_max_queries(0):
+        assert current_token_version(session, user_id) == version
+    session.close()
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import click
+import pytest
+from app.cli.lazy import load_command
+from app.cli.main import COMMANDS, cli
+
+
+def test_help_imports_no_command_module():
+    code = (
+        "import sys\n"
+        "from app.cli.main import cli\n"
+        "try:\n"
+        "    cli(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = ('sqlalchemy', 'sentry_sdk', 'bcrypt', 'jwt', 'cryptography', 'app.models')\n"
+        "print(','.join(m for m in heavy if m in sys.modules), file=sys.stderr)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert "list-clients" in result.stdout
+    assert result.stderr.strip() == ""
+
+
+@pytest.mark.parametrize("name", sorted(COMMANDS))
+def test_lazy_command_matches_registry(name):
+    path, short_help = COMMANDS[name]
+    command = load_command(path)
+
+    assert isinstance(command, click.Command)
+    assert command.name == name
+    # L'aide affichée par --help sans import doit rester celle de la commande
+    # chargée (démon, shell), telle que click la tronque par défaut
+    assert command.get_short_help_str() == short_help
+
+
+def test_group_resolves_lazy_commands():
+    ctx = click.Context(cli)
+    assert cli.get_command(ctx, "export").name == "export"
+    assert cli.get_command(ctx, "inconnue") is None
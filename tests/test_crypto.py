@@ -0,0 +1,165 @@
+import pytest
+from cryptography.fernet import Fernet
+from app.security import crypto
+from app.models.client import Client
+
+
+@pytest.fixture(autouse=True)
+def encryption_keys(monkeypatch):
+    monkeypatch.setenv("ENCRYPTION_KEY", Fernet.generate_key().decode("utf-8"))
+    monkeypatch.setenv("BLIND_INDEX_KEY", "test-blind-index-key")
+    monkeypatch.delenv("ENCRYPTION_KEYS", raising=False)
+    monkeypatch.setattr(crypto, "_KEYRING", None)
+    monkeypatch.setattr(crypto, "_BLIND_INDEX_HMAC", None)
+    crypto.decrypt_cache.clear()
+
+
+def test_encrypted_attribute_stores_ciphertext():
+    client = Client(first_name="Alice", email="alice@test.com")
+
+    assert isinstance(client._first_name, bytes)
+    assert crypto.decrypt(client._first_name) == "Alice"
+    assert client.first_name == "Alice"
+
+
+def test_encrypted_attribute_decrypts_once(monkeypatch):
+    client = Client(first_name="Alice")
+    client.__dict__.pop("_plain_first_name")
+
+    calls = []
+    real_decrypt = crypto.decrypt
+    monkeypatch.setattr(
+        crypto, "decrypt", lambda value: calls.append(value) or real_decrypt(value)
+    )
+
+    assert client.first_name == "Alice"
+    assert client.first_name == "Alice"
+    assert len(calls) == 1
+
+
+def test_encrypted_attribute_unchanged_value_keeps_ciphertext():
+    client = Client(first_name="Alice")
+    ciphertext = client._first_name
+
+    client.first_name = "Alice"
+    assert client._first_name == ciphertext
+
+    client.first_name = "Bob"
+    assert client._first_name != ciphertext
+    assert client.first_name == "Bob"
+
+
+def test_decrypt_many_keeps_order_across_chunks():
+    plaintexts = [f"client-{i}" for i in range(50)]
+    ciphertexts = [crypto.encrypt(value) for value in plaintexts] + [None]
+
+    result = crypto.decrypt_many(ciphertexts, workers=4, chunk_size=7)
+
+    assert result == plaintexts + [None]
+
+
+def test_encrypt_many_round_trips_across_chunks():
+    plaintexts = [f"client-{i}" for i in range(50)] + [None]
+
+    ciphertexts = crypto.encrypt_many(plaintexts, workers=4, chunk_size=7)
+
+    assert all(isinstance(value, bytes) for value in ciphertexts[:-1])
+    assert crypto.decrypt_many(ciphertexts) == plaintexts
+
+
+def test_decrypt_attributes_fills_cache():
+    clients = [Client(first_name=f"Alice{i}") for i in range(3)]
+    for client in clients:
+        client.__dict__.pop("_plain_first_name")
+
+    crypto.decrypt_attributes(clients, ["first_name"])
+
+    assert [c.__dict__["_plain_first_name"][1] for c in clients] == [
+        "Alice0",
+        "Alice1",
+        "Alice2",
+    ]
+
+
+def test_decrypt_cache_counts_hits_and_misses():
+    ciphertext = crypto.encrypt("alice@test.com")
+
+    assert crypto.decrypt(ciphertext) == "alice@test.com"
+    assert crypto.decrypt(ciphertext) == "alice@test.com"
+
+    stats = crypto.decrypt_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_decrypt_cache_evicts_least_recently_used():
+    cache = crypto.DecryptCache(max_size=2, ttl=0)
+    cache.put(b"a", "A")
+    cache.put(b"b", "B")
+    cache.get(b"a")
+    cache.put(b"c", "C")
+
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == "A"
+    assert cache.get(b"c") == "C"
+
+
+def test_decrypt_cache_expires_entries(monkeypatch):
+    cache = crypto.DecryptCache(max_size=2, ttl=10)
+    monkeypatch.setattr(crypto.time, "monotonic", lambda: 100.0)
+    cache.put(b"a", "A")
+    monkeypatch.setattr(crypto.time, "monotonic", lambda: 111.0)
+
+    assert cache.get(b"a") is None
+
+
+def test_envelope_header_and_legacy_token():
+    envelope = crypto.encrypt("alice@test.com")
+    assert envelope[0] == crypto.ALGORITHM_FERNET << 4
+
+    legacy_token = crypto._fernet().encrypt(b"alice@test.com")
+    assert crypto.decrypt(crypto.pack_envelope(legacy_token)) == "alice@test.com"
+    assert len(crypto.pack_envelope(legacy_token)) < len(legacy_token)
+
+
+def test_decrypt_rejects_unknown_header():
+    with pytest.raises(ValueError):
+        crypto.decrypt(b"\xff" + crypto.encrypt("alice")[1:])
+
+
+def test_rotation_reads_old_key_and_reencrypts_with_primary(monkeypatch):
+    old_key = Fernet.generate_key().decode("utf-8")
+    new_key = Fernet.generate_key().decode("utf-8")
+
+    monkeypatch.setenv("ENCRYPTION_KEYS", f"1:{old_key}")
+    monkeypatch.setattr(crypto, "_KEYRING", None)
+    envelope = crypto.encrypt("alice@test.com")
+
+    monkeypatch.setenv("ENCRYPTION_KEYS", f"2:{new_key},1:{old_key}")
+    monkeypatch.setattr(crypto, "_KEYRING", None)
+
+    assert crypto.needs_rotation(envelope)
+    assert crypto.decrypt(envelope) == "alice@test.com"
+
+    rotated = crypto.reencrypt(envelope)
+    assert rotated[0] & 0x0F == 2
+    assert not crypto.needs_rotation(rotated)
+    assert crypto.reencrypt(rotated) is rotated
+
+
+def test_blind_index_many_matches_blind_index():
+    emails = ["Alice@Test.com ", None, "bob@test.com"]
+
+    assert crypto.blind_index_many(emails) == [crypto.blind_index(e) for e in emails]
+    assert crypto.blind_index("alice@test.com") == crypto.blind_index_many(emails)[0]
+
+
+def test_decrypt_rows_only_decrypts_projected_fields():
+    Row = crypto._row_type(("id", "email", "phone"))
+    rows = [Row(1, crypto.encrypt("a@test.com"), b"opaque")]
+
+    result = crypto.decrypt_rows(rows, ["email"])
+
+    assert result[0].id == 1
+    assert result[0].email == "a@test.com"
+    assert result[0].phone == b"opaque"
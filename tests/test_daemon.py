@@ -0,0 +1,185 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app.cli.daemon_client import forward, receive_message, send_message, socket_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _read_all(fd):
+    chunks = []
+    while chunk := os.read(fd, 65536):
+        chunks.append(chunk)
+    os.close(fd)
+    return b"".join(chunks).decode("utf-8")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    # Démon dans un processus à part : ses fils n'héritent pas des
+    # descripteurs ouverts par le test
+    path = str(tmp_path / "epic.sock")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.cli.main", "serve", "--socket", path, "--idle-timeout", "60"],
+        cwd=ROOT,
+        stdin=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(path):
+        assert process.poll() is None and time.monotonic() < deadline
+        time.sleep(0.05)
+    assert os.stat(path).st_mode & 0o077 == 0
+    yield path
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def _start(path, argv, cwd, stdin_r=None):
+    """Transmet `argv` au démon. Retourne (socket, pid du fils, stdout, stderr)."""
+    if stdin_r is None:
+        stdin_r, stdin_w = os.pipe()
+        os.close(stdin_w)
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    send_message(
+        sock,
+        {"argv": argv, "env": {"EPIC_TEST": "1"}, "cwd": cwd},
+        fds=(stdin_r, stdout_w, stderr_w),
+    )
+    for fd in (stdin_r, stdout_w, stderr_w):
+        os.close(fd)
+    hello, _ = receive_message(sock)
+    return sock, hello["pid"], stdout_r, stderr_r
+
+
+def test_daemon_runs_forwarded_command(daemon, tmp_path):
+    sock, pid, stdout_r, stderr_r = _start(daemon, ["list-clients", "--help"], str(tmp_path))
+    with sock:
+        reply, _ = receive_message(sock)
+
+    assert reply == {"exit": 0}
+    assert "Usage: epic list-clients" in _read_all(stdout_r)
+    assert _read_all(stderr_r) == ""
+
+
+def test_daemon_serves_clients_concurrently(daemon, tmp_path):
+    # Le premier client reste bloqué sur l'invite de login
+    stdin_r, stdin_w = os.pipe()
+    first, _, first_out, first_err = _start(daemon, ["login"], str(tmp_path), stdin_r)
+    with first:
+        second, _, second_out, second_err = _start(
+            daemon, ["list-clients", "--help"], str(tmp_path)
+        )
+        with second:
+            second.settimeout(10)
+            reply, _ = receive_message(second)
+        assert reply == {"exit": 0}
+        assert "Usage: epic list-clients" in _read_all(second_out)
+        _read_all(second_err)
+
+        # Le premier est toujours en attente de sa saisie
+        first.setblocking(False)
+        with pytest.raises(BlockingIOError):
+            first.recv(1)
+        first.setblocking(True)
+        os.close(stdin_w)
+        first.settimeout(10)
+        reply, _ = receive_message(first)
+    assert reply == {"exit": 1}
+    assert "Email" in _read_all(first_out)
+    _read_all(first_err)
+
+
+def test_forward_falls_back_without_daemon(tmp_path, monkeypatch):
+    monkeypatch.setenv("EPIC_SOCKET", str(tmp_path / "absent.sock"))
+    assert forward(["list-clients"]) is None
+
+    monkeypatch.setenv("EPIC_NO_DAEMON", "1")
+    assert forward(["list-clients"]) is None
+    assert forward(["serve"]) is None
+
+    monkeypatch.delenv("EPIC_NO_DAEMON")
+    assert forward(["shell"]) is None
+
+
+def _fake_daemon(path, received, timeout=5):
+    """Démon minimal : enregistre la requête reçue et répond exit 0."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    server.settimeout(timeout)
+
+    def serve():
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            return
+        with conn:
+            request, fds = receive_message(conn, max_fds=3)
+            for fd in fds:
+                os.close(fd)
+            received.append(request)
+            send_message(conn, {"pid": 0})
+            send_message(conn, {"exit": 0})
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    return server, thread
+
+
+def test_forward_sends_only_forwarded_variables(tmp_path, monkeypatch):
+    directory = tmp_path / "run"
+    directory.mkdir(mode=0o700)
+    path = str(directory / "daemon.sock")
+    monkeypatch.setenv("EPIC_SOCKET", path)
+    monkeypatch.setenv("EPIC_TOKEN", "jeton")
+    monkeypatch.setenv("DB_PASSWORD", "secret")
+    monkeypatch.setenv("ENCRYPTION_KEY", "secret")
+    received = []
+    server, thread = _fake_daemon(path, received)
+    previous = signal.getsignal(signal.SIGINT)
+    try:
+        assert forward(["list-clients"]) == 0
+    finally:
+        signal.signal(signal.SIGINT, previous)
+        thread.join(timeout=10)
+        server.close()
+
+    env = received[0]["env"]
+    assert env["EPIC_TOKEN"] == "jeton"
+    assert "DB_PASSWORD" not in env and "ENCRYPTION_KEY" not in env
+
+
+def test_forward_refuses_socket_in_shared_directory(tmp_path, monkeypatch):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    directory.chmod(0o777)
+    path = str(directory / "daemon.sock")
+    monkeypatch.setenv("EPIC_SOCKET", path)
+    received = []
+    server, thread = _fake_daemon(path, received, timeout=0.5)
+    try:
+        # Un autre utilisateur aurait pu créer ce socket : exécution sur place
+        assert forward(["list-clients"]) is None
+    finally:
+        thread.join(timeout=10)
+        server.close()
+    assert received == []
+
+
+def test_default_socket_is_never_in_tmp(monkeypatch, tmp_path):
+    monkeypatch.delenv("EPIC_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert socket_path() == str(tmp_path / ".cache" / "epic" / "daemon.sock")
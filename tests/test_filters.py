@@ -0,0 +1,114 @@
+import click
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.cli.client import FILTER_FIELDS as CLIENT_FIELDS
+from app.cli.contract import FILTER_FIELDS as CONTRACT_FIELDS
+from app.cli.contract import LIST_COLUMNS as CONTRACT_COLUMNS
+from app.cli.event import FILTER_FIELDS as EVENT_FIELDS
+from app.cli.filters import FilterError, filter_options, parse_sort, parse_where
+from app.cli.pagination import iter_pages
+from app.models import Contract
+from app.models.base import Base
+
+
+def _sql(predicate):
+    return str(predicate.compile(compile_kwargs={"literal_binds": True}))
+
+
+def test_where_compiles_typed_predicates():
+    predicate = parse_where("remaining_amount>0 and signed=false", CONTRACT_FIELDS)
+
+    assert _sql(predicate) == "contracts.remaining_amount > 0.0 AND contracts.signed IS false"
+
+
+def test_where_precedence_parentheses_and_in():
+    predicate = parse_where(
+        "not (client_id in (1, 2) or amount <= 10) and signed_date is not null",
+        CONTRACT_FIELDS,
+    )
+
+    assert _sql(predicate) == (
+        "NOT (contracts.client_id IN (1, 2) OR contracts.amount <= 10.0) "
+        "AND contracts.signed_date IS NOT NULL"
+    )
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("client_id in (3, null)", "contracts.client_id IN (3) OR contracts.client_id IS NULL"),
+        ("signed_date in (null)", "contracts.signed_date IS NULL"),
+        ("signed in (true, null)", "contracts.signed IN (true) OR contracts.signed IS NULL"),
+    ],
+)
+def test_where_null_in_list_is_null_test(text, expected):
+    assert _sql(parse_where(text, CONTRACT_FIELDS)) == expected
+
+
+def test_where_null_in_blind_index_list():
+    predicate = parse_where("email in ('a@b.fr', null)", CLIENT_FIELDS)
+
+    assert _sql(predicate).endswith("OR clients.email_bidx IS NULL")
+    assert "'None'" not in _sql(predicate)
+
+
+def test_where_quoted_text_and_substring():
+    predicate = parse_where("location ~ 'salle_A' or name='Gala d''été'", EVENT_FIELDS)
+
+    assert "lower(events.location) LIKE lower('%salle\\_A%') ESCAPE '\\'" in _sql(predicate)
+    assert "events.name = 'Gala d''été'" in _sql(predicate)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["unknown=1", "amount>", "amount>abc", "signed<true", "amount ~ 3", "(amount>1", "amount=1 amount=2"],
+)
+def test_where_rejects_invalid_expressions(text):
+    with pytest.raises(FilterError):
+        parse_where(text, CONTRACT_FIELDS)
+
+
+def test_invalid_where_is_a_usage_error():
+    @click.command()
+    @filter_options(CONTRACT_FIELDS)
+    def command(where, sort):
+        pass
+
+    result = CliRunner().invoke(command, ["--where", "montant>0"])
+
+    assert result.exit_code == 2
+    assert "Champ inconnu" in result.output
+
+
+def test_sorted_pages_follow_sort_key(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/filters.db")
+    Base.metadata.create_all(engine)
+    remaining = [5, 1, 3, 1, None, 4, 2, None, 3]
+    with Session(engine) as session:
+        session.execute(
+            insert(Contract.__table__),
+            [
+                {"id": i, "amount": 10, "remaining_amount": amount, "client_id": 1, "sales_contact_id": 1}
+                for i, amount in enumerate(remaining, start=1)
+            ],
+        )
+
+        query = session.query(*CONTRACT_COLUMNS).filter(parse_where("amount>0", CONTRACT_FIELDS))
+        pages = list(
+            iter_pages(
+                query, Contract.id, page_size=2, sort=parse_sort("-remaining_amount", CONTRACT_FIELDS)
+            )
+        )
+
+    ids = [row.id for page in pages for row in page]
+    # Décroissant sur remaining_amount, puis id croissant, NULL en dernier
+    assert ids == [1, 6, 3, 9, 7, 2, 4, 5, 8]
+    assert all(len(page) <= 2 for page in pages)
+
+
+def test_sort_rejects_unknown_field():
+    with pytest.raises(FilterError):
+        parse_sort("-montant", CONTRACT_FIELDS)
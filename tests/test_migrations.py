@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from app.cli.contract import LIST_COLUMNS as CONTRACT_COLUMNS
+from app.cli.event import LIST_COLUMNS as EVENT_COLUMNS
+from app.db.migrate import applied_versions, available_migrations, upgrade
+from app.models import Client, Contract, Event
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrations.db")
+    upgrade(engine)
+    return engine
+
+
+def test_upgrade_applies_every_migration_once(engine):
+    versions = [version for version, _, _ in available_migrations()]
+
+    assert applied_versions(engine) == set(versions)
+    assert upgrade(engine) == []
+
+
+def test_upgrade_adds_token_version_to_legacy_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE collaborators (id INTEGER PRIMARY KEY, first_name VARCHAR, "
+                "last_name VARCHAR, email VARCHAR, password VARCHAR, department_id INTEGER)"
+            )
+        )
+
+    upgrade(engine)
+
+    columns = {c["name"] for c in inspect(engine).get_columns("collaborators")}
+    indexes = {i["name"] for i in inspect(engine).get_indexes("collaborators")}
+    assert "token_version" in columns
+    assert "ix_collaborators_department_id" in indexes
+
+
+def _plan(engine, query):
+    # Paramètres en clair, comme psycopg2 les envoie à PostgreSQL : les index
+    # partiels ne sont utilisables que si le planificateur voit les valeurs.
+    sql = str(
+        query.statement.compile(
+            dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    with engine.connect() as conn:
+        return "\n".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+@pytest.mark.parametrize(
+    "build_query, indexes",
+    [
+        # filter-contracts
+        (
+            lambda s: s.query(*CONTRACT_COLUMNS).filter(Contract.signed.is_(False)).order_by(Contract.id),
+            ("ix_contracts_unsigned",),
+        ),
+        (
+            lambda s: s.query(*CONTRACT_COLUMNS).filter(Contract.remaining_amount > 0).order_by(Contract.id),
+            ("ix_contracts_unpaid",),
+        ),
+        # list-unassigned-events, assign-support-to-event
+        (
+            lambda s: s.query(*EVENT_COLUMNS).filter(Event.support_contact_id.is_(None)).order_by(Event.id),
+            # SQLite préfère l'index composite, PostgreSQL l'index partiel plus petit
+            ("ix_events_unassigned", "ix_events_support_contact_id_id"),
+        ),
+        # update-event (support)
+        (
+            lambda s: s.query(*EVENT_COLUMNS).filter(Event.support_contact_id == 7).order_by(Event.id),
+            ("ix_events_support_contact_id_id",),
+        ),
+        # create-event : contrats signés sans événement
+        (
+            lambda s: s.query(Contract.id).filter(Contract.signed.is_(True), ~Contract.event.has()),
+            ("ix_events_contract_id",),
+        ),
+        # clés étrangères
+        (lambda s: s.query(Contract.id).filter(Contract.client_id == 3), ("ix_contracts_client_id",)),
+        (
+            lambda s: s.query(Client.id).filter(Client.commercial_contact_id == 3),
+            ("ix_clients_commercial_contact_id",),
+        ),
+    ],
+)
+def test_filter_queries_use_an_index(engine, build_query, indexes):
+    with Session(engine) as session:
+        plan = _plan(engine, build_query(session))
+
+    assert any(
+        f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan
+        for index in indexes
+    ), plan
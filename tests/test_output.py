@@ -0,0 +1,43 @@
+import json
+
+import click
+from click.testing import CliRunner
+
+from app.cli.output import output_option
+
+
+@click.command()
+@click.option("--count", type=int, default=2)
+@output_option
+def rows(count, output):
+    for i in range(count):
+        output.row({"id": i, "name": f"n{i}"}, f"{i} - n{i}")
+    if not count:
+        output.message("Aucune ligne.")
+
+
+def test_json_array_is_closed_at_end_of_command():
+    result = CliRunner().invoke(rows, ["--format", "json"])
+
+    assert json.loads(result.output) == [{"id": 0, "name": "n0"}, {"id": 1, "name": "n1"}]
+
+
+def test_empty_json_output_is_an_empty_array():
+    result = CliRunner().invoke(rows, ["--format", "json", "--count", "0"])
+
+    assert json.loads(result.stdout) == []
+    assert "Aucune ligne." in result.stderr
+
+
+def test_ndjson_and_csv_are_written_line_by_line():
+    ndjson = CliRunner().invoke(rows, ["--format", "ndjson"]).output.splitlines()
+    csv = CliRunner().invoke(rows, ["--format", "csv"]).output.splitlines()
+
+    assert [json.loads(line)["id"] for line in ndjson] == [0, 1]
+    assert csv == ["id,name", "0,n0", "1,n1"]
+
+
+def test_text_format_keeps_readable_lines():
+    result = CliRunner().invoke(rows)
+
+    assert result.output == "0 - n0\n1 - n1\n"
@@ -0,0 +1,46 @@
+import json
+from sqlalchemy import create_engine, text
+from app.db import profiling
+
+
+def test_profile_counts_statements_and_writes_json_line(tmp_path):
+    engine = create_engine("sqlite://")
+    output = tmp_path / "profile.jsonl"
+
+    with profiling.profile_command("list-clients", str(output), engine):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    data = json.loads(output.read_text(encoding="utf-8"))
+    assert data["command"] == "list-clients"
+    assert data["statements"] == 2
+    assert len(data["slowest"]) == 2
+
+
+def test_slow_queries_capture_explain_plan(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "DB_SLOW_QUERY_MS", 0)
+    engine = create_engine("sqlite://")
+    output = tmp_path / "profile.jsonl"
+
+    with profiling.profile_command("list-events", str(output), engine):
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            rows = conn.execute(text("SELECT id FROM t WHERE id > :id"), {"id": 0})
+            assert rows.fetchall() == []
+
+    data = json.loads(output.read_text(encoding="utf-8"))
+    select = next(e for e in data["slowest"] if e["sql"].startswith("SELECT"))
+    assert "SEARCH" in select["explain"] or "SCAN" in select["explain"]
+
+
+def test_queries_outside_a_profile_are_ignored(tmp_path):
+    engine = create_engine("sqlite://")
+    output = tmp_path / "profile.jsonl"
+    with profiling.profile_command("login", str(output), engine):
+        pass
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert json.loads(output.read_text(encoding="utf-8"))["statements"] == 0
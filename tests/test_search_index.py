@@ -0,0 +1,46 @@
+import pytest
+from app.security import crypto
+from app.security.search_index import (
+    PREFIX,
+    TRIGRAM,
+    index_tokens,
+    matches,
+    query_tokens,
+)
+
+
+@pytest.fixture(autouse=True)
+def blind_index_key(monkeypatch):
+    monkeypatch.setenv("BLIND_INDEX_KEY", "test-blind-index-key")
+    monkeypatch.setattr(crypto, "_BLIND_INDEX_HMAC", None)
+
+
+def test_substring_query_tokens_are_indexed():
+    stored = index_tokens("last_name", "Dupont", (PREFIX, TRIGRAM))
+
+    assert query_tokens("last_name", "UPON", (PREFIX, TRIGRAM), prefix=False) <= stored
+    assert query_tokens("last_name", "du", (PREFIX, TRIGRAM), prefix=True) <= stored
+    assert not query_tokens("last_name", "pond", (PREFIX, TRIGRAM), prefix=False) <= stored
+
+
+def test_tokens_depend_on_field():
+    assert not index_tokens("last_name", "Acme", (PREFIX,)) & index_tokens(
+        "company_name", "Acme", (PREFIX,)
+    )
+
+
+def test_query_without_matching_index_is_rejected():
+    with pytest.raises(ValueError):
+        query_tokens("first_name", "jean", (TRIGRAM,), prefix=True)
+
+
+def test_short_substring_query_is_rejected():
+    # Pas de trigramme sous 3 caractères : pas de repli silencieux sur les préfixes
+    with pytest.raises(ValueError, match="at least 3 characters"):
+        query_tokens("last_name", "po", (PREFIX, TRIGRAM), prefix=False)
+
+
+def test_matches_checks_plaintext():
+    assert matches("Jean  Dupont", "jean dup", prefix=True)
+    assert not matches("Jean Dupont", "dup", prefix=True)
+    assert matches("Jean Dupont", "dup", prefix=False)